@@ -0,0 +1,33 @@
+"""add section hashes to ai_analyses
+
+Revision ID: 202610171000
+Revises: 202610170900
+Create Date: 2026-10-17 10:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "202610171000"
+down_revision = "202610170900"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ai_analyses",
+        sa.Column("section_hashes", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.add_column(
+        "ai_analyses",
+        sa.Column("section_results", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("ai_analyses", "section_results")
+    op.drop_column("ai_analyses", "section_hashes")
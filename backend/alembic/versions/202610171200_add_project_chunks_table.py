@@ -0,0 +1,66 @@
+"""add project_chunks table (pgvector)
+
+Revision ID: 202610171200
+Revises: 202610171100
+Create Date: 2026-10-17 12:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = "202610171200"
+down_revision = "202610171100"
+branch_labels = None
+depends_on = None
+
+# Deve coincidir com EMBEDDING_DIMENSIONS
+EMBEDDING_DIMENSIONS = 384
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.create_table(
+        "project_chunks",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column(
+            "project_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("projects.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "document_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("documents.id", ondelete="CASCADE"),
+            nullable=True,
+        ),
+        sa.Column("source", sa.String(length=100), nullable=False),
+        sa.Column("title", sa.String(length=200), nullable=True),
+        sa.Column("chunk_index", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("token_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("embedding_backend", sa.String(length=50), nullable=False),
+        sa.Column("embedding", Vector(EMBEDDING_DIMENSIONS), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_project_chunks_project_source", "project_chunks", ["project_id", "source"])
+    op.create_index(
+        "ix_project_chunks_embedding_hnsw",
+        "project_chunks",
+        ["embedding"],
+        postgresql_using="hnsw",
+        postgresql_with={"m": 16, "ef_construction": 64},
+        postgresql_ops={"embedding": "vector_cosine_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_project_chunks_embedding_hnsw", table_name="project_chunks")
+    op.drop_index("ix_project_chunks_project_source", table_name="project_chunks")
+    op.drop_table("project_chunks")
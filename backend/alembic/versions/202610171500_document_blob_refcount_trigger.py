@@ -0,0 +1,42 @@
+"""decrement document_blobs.ref_count on every document delete
+
+Revision ID: 202610171500
+Revises: 202610171400
+Create Date: 2026-10-17 15:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "202610171500"
+down_revision = "202610171400"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No banco, e não na rota: cobre também as cascatas de projetos e usuários
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION release_document_blob() RETURNS trigger AS $$
+        BEGIN
+            UPDATE document_blobs SET ref_count = ref_count - 1 WHERE sha256 = OLD.content_hash;
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER documents_release_blob
+        AFTER DELETE ON documents
+        FOR EACH ROW WHEN (OLD.content_hash IS NOT NULL)
+        EXECUTE FUNCTION release_document_blob()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS documents_release_blob ON documents")
+    op.execute("DROP FUNCTION IF EXISTS release_document_blob()")
@@ -0,0 +1,40 @@
+"""unique (project_id, source, chunk_index, content_hash) on project_chunks
+
+Revision ID: 202610171600
+Revises: 202610171500
+Create Date: 2026-10-17 16:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "202610171600"
+down_revision = "202610171500"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Remove duplicatas gravadas por indexações concorrentes antes do índice único
+    op.execute(
+        """
+        DELETE FROM project_chunks a
+        USING project_chunks b
+        WHERE a.project_id = b.project_id
+          AND a.source = b.source
+          AND a.chunk_index = b.chunk_index
+          AND a.content_hash = b.content_hash
+          AND a.ctid > b.ctid
+        """
+    )
+    op.create_index(
+        "uq_project_chunks_chunk",
+        "project_chunks",
+        ["project_id", "source", "chunk_index", "content_hash"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_project_chunks_chunk", table_name="project_chunks")
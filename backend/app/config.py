@@ -5,7 +5,7 @@ Carrega variáveis de ambiente e define constantes
 
 from pydantic_settings import BaseSettings
 from pydantic import Field, model_validator
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.engine.url import URL, make_url
 
 
@@ -42,6 +42,8 @@ class Settings(BaseSettings):
     REDIS_HOST: str = Field("redis", description="Host do Redis")
     REDIS_PORT: int = Field(6379, description="Porta do Redis")
     REDIS_PASSWORD: str = Field(..., description="Senha do Redis")
+    REDIS_DB: int = Field(0, description="Database do Redis")
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = Field(2.0, description="Timeout de socket do Redis")
     
     # ============================================
     # OPENAI - MODELO FINE-TUNED
@@ -53,13 +55,199 @@ class Settings(BaseSettings):
     )
     OPENAI_MAX_TOKENS: int = Field(4000, description="Máximo de tokens OpenAI")
     OPENAI_TEMPERATURE: float = Field(0.7, description="Temperatura OpenAI")
+    OPENAI_TIMEOUT_SECONDS: float = Field(60.0, description="Timeout total das requisições OpenAI")
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = Field(5.0, description="Timeout de conexão OpenAI")
+    OPENAI_MAX_CONNECTIONS: int = Field(100, description="Máximo de conexões no pool HTTP OpenAI")
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = Field(
+        20, description="Conexões keep-alive mantidas no pool HTTP OpenAI"
+    )
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = Field(
+        30.0, description="Tempo ocioso até fechar conexões keep-alive OpenAI"
+    )
+    OPENAI_MAX_RETRIES: int = Field(
+        0, description="Retentativas automáticas do SDK OpenAI (o limitador de taxa já repete)"
+    )
     
     # ============================================
     # GOOGLE GEMINI
     # ============================================
     GEMINI_API_KEY: str = Field(..., description="Chave API Google Gemini")
     GEMINI_MODEL: str = Field("gemini-2.5-flash", description="Modelo Gemini")
-    
+    GEMINI_MAX_CONCURRENCY: int = Field(
+        4, description="Chamadas simultâneas ao Gemini por worker (pool de threads dedicado)"
+    )
+    GEMINI_TIMEOUT_SECONDS: float = Field(
+        60.0, description="Timeout de cada chamada ao Gemini (a partir do início da execução)"
+    )
+
+    # ============================================
+    # ANÁLISE COMBINADA (FAN-OUT)
+    # ============================================
+    AI_PROVIDER_TIMEOUT_SECONDS: float = Field(
+        45.0, description="Timeout por provedor na análise combinada (segundos)"
+    )
+    ANALYSIS_CHUNK_CONCURRENCY: int = Field(
+        4, description="Trechos analisados em paralelo por provedor (map-reduce)"
+    )
+    INCREMENTAL_BATCH_MIN_RATIO: float = Field(
+        0.5, description="Fração de seções alteradas a partir da qual elas vão juntas em uma única análise"
+    )
+
+    # ============================================
+    # PRÉ-VALIDAÇÃO LOCAL (CONFORMIDADE)
+    # ============================================
+    COMPLIANCE_PRECHECK_ENABLED: bool = Field(
+        True, description="Valida anexos, CNPJ e orçamento antes de chamar os LLMs"
+    )
+    COMPLIANCE_BUDGET_TOLERANCE: float = Field(
+        0.01, description="Diferença máxima (R$) aceita entre totais declarados e calculados"
+    )
+    COMPLIANCE_MIN_MAIN_FORM_WORDS: int = Field(
+        150, description="Palavras mínimas do Anexo III antes de pedir mais detalhes"
+    )
+    BUDGET_CATEGORY_CAPS: Dict[str, float] = Field(
+        {"captação de recursos": 0.05, "despesas administrativas": 0.15},
+        description="Participação máxima de cada categoria no total do orçamento (fração)"
+    )
+    BUDGET_OUTLIER_ZSCORE: float = Field(
+        3.5, description="Z-score robusto a partir do qual um item do orçamento é atípico"
+    )
+
+    # ============================================
+    # LIMITE DE TAXA DOS PROVEDORES
+    # ============================================
+    PROVIDER_RATE_LIMIT_ENABLED: bool = Field(True, description="Habilita o limitador de taxa")
+    OPENAI_RPM_LIMIT: int = Field(500, description="Requisições por minuto ao OpenAI")
+    OPENAI_TPM_LIMIT: int = Field(150000, description="Tokens por minuto ao OpenAI")
+    GEMINI_RPM_LIMIT: int = Field(1000, description="Requisições por minuto ao Gemini")
+    GEMINI_TPM_LIMIT: int = Field(1000000, description="Tokens por minuto ao Gemini")
+    PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS: float = Field(
+        120.0, description="Espera máxima na fila do limitador antes de falhar"
+    )
+    PROVIDER_MAX_RETRIES: int = Field(5, description="Retentativas em 429 e erros transitórios")
+    PROVIDER_RETRY_BASE_SECONDS: float = Field(1.0, description="Backoff inicial das retentativas")
+    PROVIDER_RETRY_MAX_SECONDS: float = Field(60.0, description="Backoff máximo das retentativas")
+
+    # ============================================
+    # BACKEND DOS PROVEDORES (TESTES DE CARGA)
+    # ============================================
+    LLM_BACKEND: str = Field(
+        "live", description="live, stub (local, sem rede), record ou replay (cassetes em disco)"
+    )
+    LLM_CASSETTE_DIR: str = Field("./cassettes", description="Diretório das cassetes record/replay")
+    LLM_REPLAY_FALLBACK_TO_STUB: bool = Field(
+        False, description="No replay, responder com o stub quando não houver cassete"
+    )
+    LLM_STUB_LATENCY_P50_MS: float = Field(800.0, description="Latência mediana simulada pelo stub")
+    LLM_STUB_LATENCY_P95_MS: float = Field(3000.0, description="Latência p95 simulada pelo stub")
+    LLM_STUB_ERROR_RATE: float = Field(
+        0.0, description="Fração de chamadas do stub que falham com erro transitório"
+    )
+
+    # ============================================
+    # CIRCUIT BREAKER DOS PROVEDORES
+    # ============================================
+    CIRCUIT_BREAKER_FAILURE_RATE: float = Field(
+        0.5, description="Fração de falhas na janela que abre o circuito"
+    )
+    CIRCUIT_BREAKER_MIN_CALLS: int = Field(5, description="Chamadas mínimas na janela para avaliar")
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = Field(60.0, description="Janela da taxa de erro")
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = Field(
+        30.0, description="Tempo aberto antes de testar o provedor (meio-aberto)"
+    )
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = Field(1, description="Chamadas de teste no meio-aberto")
+
+    # ============================================
+    # RAG (BUSCA SEMÂNTICA NO PROJETO)
+    # ============================================
+    EMBEDDING_BACKEND: str = Field(
+        "local", description="Backend de embeddings: local (hashing, offline) ou openai"
+    )
+    EMBEDDING_MODEL: str = Field("text-embedding-3-small", description="Modelo de embeddings OpenAI")
+    EMBEDDING_DIMENSIONS: int = Field(
+        384, description="Dimensão dos vetores (fixa na coluna pgvector)"
+    )
+    RAG_CHUNK_CHARS: int = Field(1200, description="Tamanho máximo de cada trecho indexado")
+    RAG_TOP_K: int = Field(8, description="Trechos mais similares buscados por pergunta")
+    RAG_CONTEXT_TOKEN_BUDGET: int = Field(
+        1500, description="Tokens máximos de trechos recuperados no prompt do chat"
+    )
+
+    # ============================================
+    # ORÇAMENTO DE TOKENS DOS PROMPTS
+    # ============================================
+    TOKENIZER_ENCODING: str = Field(
+        "o200k_base", description="Vocabulário tiktoken (vazio usa só a estimativa offline)"
+    )
+    OPENAI_CONTEXT_WINDOW: int = Field(128000, description="Janela de contexto do modelo OpenAI")
+    GEMINI_CONTEXT_WINDOW: int = Field(1048576, description="Janela de contexto do modelo Gemini")
+    PROMPT_TOTAL_TOKEN_BUDGET: int = Field(
+        16000, description="Tokens máximos por chamada (prompt + resposta)"
+    )
+    PROMPT_MIN_OUTPUT_TOKENS: int = Field(256, description="Mínimo de tokens reservados à resposta")
+    PROMPT_SYSTEM_TOKEN_BUDGET: int = Field(600, description="Orçamento da seção system")
+    PROMPT_CONTEXT_TOKEN_BUDGET: int = Field(
+        600, description="Orçamento do contexto do projeto em análises de seção"
+    )
+    PROMPT_CONTENT_TOKEN_BUDGET: int = Field(
+        3000, description="Orçamento do conteúdo analisado (projeto, seção ou pergunta); define o tamanho dos trechos da análise"
+    )
+
+    # ============================================
+    # CONVERSAS DO CHAT
+    # ============================================
+    CHAT_HISTORY_TOKEN_BUDGET: int = Field(
+        2000, description="Tokens máximos de mensagens recentes no prompt do chat"
+    )
+    CHAT_SUMMARY_MAX_TOKENS: int = Field(
+        500, description="Tamanho máximo do resumo acumulado da conversa"
+    )
+    CHAT_MESSAGE_MAX_CHARS: int = Field(8000, description="Tamanho máximo de uma pergunta no chat")
+
+    # ============================================
+    # CACHE DE RESPOSTAS LLM
+    # ============================================
+    LLM_CACHE_ENABLED: bool = Field(True, description="Habilita cache de respostas LLM")
+    LLM_CACHE_MEMORY_TTL_SECONDS: int = Field(3600, description="TTL do cache em memória")
+    LLM_CACHE_MEMORY_MAX_ENTRIES: int = Field(512, description="Máximo de entradas em memória")
+    LLM_CACHE_MEMORY_MAX_BYTES: int = Field(
+        64 * 1024 * 1024, description="Tamanho máximo do cache em memória (bytes)"
+    )
+    LLM_CACHE_REDIS_ENABLED: bool = Field(True, description="Habilita camada Redis do cache LLM")
+    LLM_CACHE_REDIS_TTL_SECONDS: int = Field(86400, description="TTL do cache no Redis")
+    LLM_CACHE_REDIS_MAX_ENTRIES: int = Field(20000, description="Máximo de entradas no Redis")
+    LLM_CACHE_REDIS_MAX_VALUE_BYTES: int = Field(
+        1024 * 1024, description="Maior resposta armazenada no Redis (bytes)"
+    )
+
+    # ============================================
+    # COALESCÊNCIA DE ANÁLISES (SINGLE-FLIGHT)
+    # ============================================
+    SINGLE_FLIGHT_LOCK_TTL_SECONDS: float = Field(
+        300.0, description="Validade do lock da análise em andamento (Redis)"
+    )
+    SINGLE_FLIGHT_RESULT_TTL_SECONDS: int = Field(
+        30, description="Tempo que o resultado difundido fica disponível aos que aguardam"
+    )
+    SINGLE_FLIGHT_WAIT_SECONDS: float = Field(
+        300.0, description="Espera máxima por uma análise idêntica em outro worker"
+    )
+
+    # ============================================
+    # JOBS EM SEGUNDO PLANO
+    # ============================================
+    JOB_WORKER_CONCURRENCY: int = Field(4, description="Jobs simultâneos por processo worker")
+    JOB_POLL_INTERVAL_SECONDS: float = Field(1.0, description="Intervalo de polling da fila")
+    JOB_MAX_ATTEMPTS: int = Field(3, description="Tentativas por job antes de falhar")
+    JOB_RETRY_BASE_SECONDS: float = Field(5.0, description="Backoff inicial entre tentativas")
+    JOB_RETRY_MAX_SECONDS: float = Field(300.0, description="Backoff máximo entre tentativas")
+    JOB_LOCK_TIMEOUT_SECONDS: int = Field(
+        900, description="Job sem heartbeat há mais tempo que isso volta para a fila"
+    )
+    JOB_HEARTBEAT_SECONDS: float = Field(
+        60.0, description="Intervalo de renovação do lock (locked_at) dos jobs em execução"
+    )
+
     # ============================================
     # GOOGLE OAUTH
     # ============================================
@@ -83,11 +271,38 @@ class Settings(BaseSettings):
         """Converte string de origens em lista"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
     
+    # ============================================
+    # PROCESSAMENTO DE PDF
+    # ============================================
+    PDF_POOL_WORKERS: int = Field(
+        2,
+        description="Processos dedicados à extração de PDFs (fora do event loop)"
+    )
+    PDF_POOL_TIMEOUT_SECONDS: float = Field(
+        120.0,
+        description="Tempo máximo por extração; ao estourar, o processo é encerrado"
+    )
+    PDF_SHARD_MIN_PAGES: int = Field(
+        8,
+        description="Páginas mínimas por faixa na extração paralela (PDFs menores usam um só processo)"
+    )
+    PDF_STREAM_BATCH_PAGES: int = Field(
+        4,
+        description="Páginas por job na leitura em streaming (stream_pages)"
+    )
+    PDF_POOL_MAX_TASKS_PER_CHILD: int = Field(
+        50,
+        description="Jobs por processo antes de reciclá-lo (contém vazamentos de memória; 0 = sem limite)"
+    )
+
     # ============================================
     # UPLOADS
     # ============================================
     UPLOAD_MAX_SIZE: int = Field(52428800, description="Tamanho máximo de upload (50MB)")
     UPLOAD_PATH: str = Field("/app/uploads", description="Caminho para uploads")
+    UPLOAD_CHUNK_SIZE: int = Field(
+        1048576, description="Bloco de leitura/gravação dos uploads em disco (1MB)"
+    )
     ALLOWED_EXTENSIONS: List[str] = Field(
         ["pdf", "docx", "xlsx", "jpg", "png"],
         description="Extensões de arquivo permitidas"
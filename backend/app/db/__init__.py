@@ -2,6 +2,7 @@
 Package de banco de dados
 """
 
-from app.db.database import engine, get_db, init_db, Base, AsyncSessionLocal
+from app.db.database import engine, get_db, init_db, release_connection, Base, AsyncSessionLocal
+from app.db.redis_client import get_redis, close_redis
 
-__all__ = ["engine", "get_db", "init_db", "Base", "AsyncSessionLocal"]
+__all__ = ["engine", "get_db", "init_db", "release_connection", "Base", "AsyncSessionLocal", "get_redis", "close_redis"]
@@ -6,4 +6,9 @@ from app.db.database import Base
 from app.models.user import User
 from app.models.project import Project
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
 from app.models.ai_analysis import AIAnalysis
+from app.models.job import Job
+from app.models.ai_usage import AIUsageEvent
+from app.models.conversation import Conversation, ConversationMessage
+from app.models.project_chunk import ProjectChunk
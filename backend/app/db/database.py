@@ -5,6 +5,7 @@ Configuração de conexão com banco de dados
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.config import settings
+from app.db.pool_metrics import pool_metrics
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,7 @@ engine = create_async_engine(
     pool_size=10,
     max_overflow=20,
 )
+pool_metrics.install(engine)
 
 # Criar session factory
 AsyncSessionLocal = sessionmaker(
@@ -48,6 +50,17 @@ async def get_db():
             await session.close()
 
 
+async def release_connection(session: AsyncSession) -> None:
+    """
+    Encerra a transação corrente e devolve a conexão ao pool.
+
+    Usar antes de esperas longas (chamadas a provedores de IA): os objetos já
+    carregados continuam utilizáveis (expire_on_commit=False) e a sessão
+    obtém uma nova conexão na próxima operação.
+    """
+    await session.commit()
+
+
 async def init_db():
     """Inicializar banco de dados"""
     from app.db.base import Base
@@ -97,6 +110,9 @@ async def init_db():
             drop_sql = f'DROP TYPE IF EXISTS "{enum_name}" CASCADE;'
             await conn.exec_driver_sql(drop_sql)
 
+        # Tipo vector e índice HNSW dos trechos do RAG
+        await conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS vector;")
+
         await conn.run_sync(lambda sync_conn: Base.metadata.create_all(bind=sync_conn, checkfirst=True))
 
 
@@ -0,0 +1,64 @@
+"""
+Métricas do pool de conexões do banco
+Mede por quanto tempo cada conexão fica emprestada (checkout → checkin)
+"""
+
+from collections import deque
+from typing import Deque, Dict, Any
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class PoolMetrics:
+    """Janela deslizante dos tempos de checkout do pool."""
+
+    def __init__(self, window: int = 1000):
+        self._durations_ms: Deque[float] = deque(maxlen=window)
+        self._total_checkouts = 0
+        self._engine: AsyncEngine = None
+
+    def install(self, engine: AsyncEngine) -> None:
+        """Registra os listeners de checkout/checkin no pool do engine."""
+        self._engine = engine
+        event.listen(engine.sync_engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine.pool, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checkout_started"] = time.perf_counter()
+        self._total_checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop("checkout_started", None)
+        if started is not None:
+            self._durations_ms.append((time.perf_counter() - started) * 1000)
+
+    @staticmethod
+    def _percentile(ordered, pct: float) -> float:
+        if not ordered:
+            return 0.0
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return round(ordered[index], 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual do pool e percentis do tempo de checkout (ms)."""
+        ordered = sorted(self._durations_ms)
+        data: Dict[str, Any] = {
+            "checkouts_total": self._total_checkouts,
+            "checkout_ms_p50": self._percentile(ordered, 50),
+            "checkout_ms_p95": self._percentile(ordered, 95),
+            "checkout_ms_max": round(ordered[-1], 1) if ordered else 0.0,
+            "window": len(ordered),
+        }
+        pool = self._engine.sync_engine.pool if self._engine is not None else None
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
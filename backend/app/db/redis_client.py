@@ -0,0 +1,38 @@
+"""
+Cliente Redis compartilhado (asyncio)
+"""
+
+from typing import Optional
+import logging
+
+from redis import asyncio as aioredis
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> aioredis.Redis:
+    """Retorna o cliente Redis do processo, criando-o sob demanda."""
+    global _redis
+    if _redis is None:
+        _redis = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD or None,
+            db=settings.REDIS_DB,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return _redis
+
+
+async def close_redis() -> None:
+    """Fecha o pool de conexões Redis (shutdown)."""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        _redis = None
+        logger.info("🔌 Conexão Redis encerrada")
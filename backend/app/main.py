@@ -14,8 +14,17 @@ from datetime import datetime
 # Imports locais
 from app.config import settings
 from app.db.database import engine, init_db
-from app.routes import auth, projects, documents, ai_analysis, websocket_route, notifications
+from app.db.redis_client import close_redis
+from app.db.pool_metrics import pool_metrics
+from app.routes import auth, projects, documents, ai_analysis, websocket_route, notifications, jobs
 from app.middleware.cors import setup_cors
+from app.services.gemini_service import gemini_executor
+from app.services.pdf_pool import pdf_pool
+from app.services.openai_client import init_openai_client, close_openai_client
+from app.services.rate_limiter import rate_limiters
+from app.services.circuit_breaker import circuit_breakers
+from app.services.tokenizer import init_tokenizer
+from app.services.llm_backends import get_llm_backend
 
 # Configurar logging
 logging.basicConfig(
@@ -37,11 +46,24 @@ async def lifespan(app: FastAPI):
     # Inicializar banco de dados
     await init_db()
     logger.info("✅ Banco de dados inicializado")
+
+    # Cliente OpenAI compartilhado (um pool HTTP por worker)
+    init_openai_client()
+
+    # Vocabulário do tokenizer para os orçamentos de prompt
+    await init_tokenizer()
+
+    # Processos de extração de PDF (fora do event loop)
+    pdf_pool.start()
     
     yield
     
     # Shutdown
     logger.info("👋 Encerrando aplicação...")
+    await close_openai_client()
+    await close_redis()
+    gemini_executor.shutdown()
+    pdf_pool.shutdown()
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -68,7 +90,13 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "server": settings.SERVER_HOST,
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "gemini": gemini_executor.stats(),
+        "pdf_pool": pdf_pool.stats(),
+        "db_pool": pool_metrics.snapshot(),
+        "rate_limits": {name: limiter.stats() for name, limiter in rate_limiters.items()},
+        "circuit_breakers": {name: breaker.snapshot() for name, breaker in circuit_breakers.items()},
+        "llm_backend": get_llm_backend().stats(),
     }
 
 # Root
@@ -89,6 +117,7 @@ app.include_router(documents.router, prefix="/api/documents", tags=["Documentos"
 app.include_router(ai_analysis.router, prefix="/api/ai", tags=["Análise IA"])
 app.include_router(websocket_route.router, prefix="/ws", tags=["WebSocket"])
 app.include_router(notifications.router, prefix="/api/notifications", tags=["Notificações"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 
 # ============================================
 # TRATAMENTO DE ERROS GLOBAL
@@ -9,7 +9,12 @@ from app.db.database import Base
 from app.models.user import User
 from app.models.project import Project, ProjectStatus, ProjectType
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
 from app.models.ai_analysis import AIAnalysis, AIProvider, AnalysisType
+from app.models.job import Job, JobStatus, JobType
+from app.models.ai_usage import AIUsageEvent
+from app.models.project_chunk import ProjectChunk
+from app.models.conversation import Conversation, ConversationMessage
 from app.models.notification import (
     Notification,
     NotificationType,
@@ -26,6 +31,7 @@ __all__ = [
     "ProjectStatus",
     "ProjectType",
     "Document",
+    "DocumentBlob",
     "AIAnalysis",
     "AIProvider",
     "AnalysisType",
@@ -34,4 +40,11 @@ __all__ = [
     "NotificationChannel",
     "NotificationSeverity",
     "NotificationPreference",
+    "Job",
+    "JobStatus",
+    "JobType",
+    "AIUsageEvent",
+    "ProjectChunk",
+    "Conversation",
+    "ConversationMessage",
 ]
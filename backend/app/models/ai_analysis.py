@@ -17,6 +17,7 @@ class AIProvider(str, enum.Enum):
     OPENAI = "openai"
     GEMINI = "gemini"
     COMBINED = "combined"
+    LOCAL = "local"  # Pré-validação por regras, sem chamada a LLM
 
 class AnalysisType(str, enum.Enum):
     """Tipo de análise"""
@@ -50,6 +51,10 @@ class AIAnalysis(Base):
     section_analyzed = Column(String(200), nullable=True)  # Seção específica analisada
     tokens_used = Column(Integer, default=0)
     processing_time = Column(Integer, default=0)  # milissegundos
+
+    # Análise incremental: hash e resultado de cada seção (content, annex_1..7)
+    section_hashes = Column(JSONB, nullable=True)
+    section_results = Column(JSONB, nullable=True)
     
     # Sugestões e problemas
     suggestions = Column(JSONB)  # Lista de sugestões
@@ -79,5 +84,6 @@ class AIAnalysis(Base):
             "warnings": self.warnings,
             "tokens_used": self.tokens_used,
             "processing_time": self.processing_time,
+            "section_hashes": self.section_hashes,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
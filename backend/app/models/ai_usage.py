@@ -0,0 +1,57 @@
+"""
+Model de Uso de IA
+Uma linha por chamada a provedor (tokens e latência) para relatórios de capacidade
+"""
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.db.database import Base
+
+
+class AIUsageEvent(Base):
+    __tablename__ = "ai_usage_events"
+    __table_args__ = (
+        Index("ix_ai_usage_events_created_at", "created_at"),
+    )
+
+    # Identificação
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="SET NULL"), nullable=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Chamada
+    provider = Column(String(20), nullable=False)  # openai, gemini
+    analysis_type = Column(String(50), nullable=False)  # full_project, section, chat, ...
+    operation = Column(String(100), nullable=False)  # método do serviço que chamou o provedor
+    model = Column(String(200), nullable=True)
+
+    # Consumo
+    prompt_tokens = Column(Integer, default=0, nullable=False)
+    completion_tokens = Column(Integer, default=0, nullable=False)
+    duration_ms = Column(Integer, default=0, nullable=False)
+    estimated = Column(Boolean, default=False, nullable=False)  # tokens estimados (sem usage do provedor)
+
+    # Metadados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AIUsageEvent {self.provider} - {self.operation}>"
+
+    def to_dict(self):
+        """Converte para dicionário"""
+        return {
+            "id": str(self.id),
+            "project_id": str(self.project_id) if self.project_id else None,
+            "provider": self.provider,
+            "analysis_type": self.analysis_type,
+            "operation": self.operation,
+            "model": self.model,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "duration_ms": self.duration_ms,
+            "estimated": self.estimated,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
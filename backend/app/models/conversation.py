@@ -0,0 +1,75 @@
+"""
+Model de Conversas do Chat
+Histórico do chat por (usuário, projeto) mantido no servidor, com resumo
+acumulado das mensagens antigas
+"""
+
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, Boolean, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from app.db.database import Base
+
+
+class Conversation(Base):
+    __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_project", "user_id", "project_id", "updated_at"),
+    )
+
+    # Identificação
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    title = Column(String(200), nullable=True)
+
+    # Resumo das mensagens já compactadas (summarized=True); a versão evita
+    # que duas compactações simultâneas sobrescrevam uma à outra
+    summary = Column(Text, nullable=True)
+    summary_version = Column(Integer, default=0, nullable=False)
+
+    # Metadados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Conversation {self.id}>"
+
+    def to_dict(self):
+        """Converte para dicionário"""
+        return {
+            "id": str(self.id),
+            "project_id": str(self.project_id),
+            "title": self.title,
+            "summary": self.summary,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+    __table_args__ = (
+        Index("ix_conversation_messages_conversation", "conversation_id", "created_at"),
+    )
+
+    # Identificação
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    conversation_id = Column(
+        UUID(as_uuid=True), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False
+    )
+
+    # Conteúdo
+    role = Column(String(20), nullable=False)  # user, assistant
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, default=0, nullable=False)
+
+    # Já incorporada ao resumo da conversa (não vai mais ao prompt)
+    summarized = Column(Boolean, default=False, nullable=False)
+
+    # Metadados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ConversationMessage {self.role} ({self.token_count} tokens)>"
@@ -25,6 +25,8 @@ class Document(Base):
     file_type = Column(String(100), nullable=False)  # pdf, docx, xlsx, etc
     file_size = Column(BigInteger, nullable=False)  # bytes
     mime_type = Column(String(200))
+    # Conteúdo compartilhado (NULL em documentos anteriores ao armazenamento por hash)
+    content_hash = Column(String(64), ForeignKey("document_blobs.sha256"), nullable=True, index=True)
     
     # Processamento
     is_processed = Column(Integer, default=0)  # 0=não, 1=sim
@@ -37,6 +39,7 @@ class Document(Base):
     # Relacionamentos
     user = relationship("User", back_populates="documents")
     project = relationship("Project", back_populates="documents")
+    blob = relationship("DocumentBlob", back_populates="documents")
     
     def __repr__(self):
         return f"<Document {self.original_filename}>"
@@ -51,6 +54,7 @@ class Document(Base):
             "original_filename": self.original_filename,
             "file_type": self.file_type,
             "file_size": self.file_size,
+            "content_hash": self.content_hash,
             "is_processed": bool(self.is_processed),
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
@@ -0,0 +1,42 @@
+"""
+Model de Conteúdo Armazenado (endereçado por SHA-256)
+Um arquivo em disco por conteúdo distinto, compartilhado pelos documentos
+que o referenciam, com o texto extraído e a última análise em cache
+"""
+
+from sqlalchemy import Column, String, DateTime, Integer, BigInteger, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from app.db.database import Base
+
+
+class DocumentBlob(Base):
+    __tablename__ = "document_blobs"
+
+    # Identificação (SHA-256 do conteúdo)
+    sha256 = Column(String(64), primary_key=True)
+
+    # Arquivo
+    file_path = Column(String(1000), nullable=False)
+    file_size = Column(BigInteger, nullable=False)
+    mime_type = Column(String(200))
+
+    # Documentos que apontam para este conteúdo; o arquivo é removido no zero
+    ref_count = Column(Integer, nullable=False, default=0)
+
+    # Cache de processamento
+    extracted_text = Column(Text, nullable=True)
+    # {"fingerprint": modelos + versões de prompt, "combined": resultado de run_combined}
+    analysis = Column(JSONB, nullable=True)
+
+    # Metadados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+
+    # Relacionamentos
+    documents = relationship("Document", back_populates="blob")
+
+    def __repr__(self):
+        return f"<DocumentBlob {self.sha256[:12]} refs={self.ref_count}>"
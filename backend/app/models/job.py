@@ -0,0 +1,82 @@
+"""
+Model de Job em segundo plano
+Fila durável no PostgreSQL consumida pelos workers (SELECT ... FOR UPDATE SKIP LOCKED)
+"""
+
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, Index, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from datetime import datetime
+import uuid
+import enum
+
+from app.db.database import Base
+
+
+class JobStatus(str, enum.Enum):
+    """Estados de um job"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobType(str, enum.Enum):
+    """Tipos de job suportados pelo worker"""
+    PROJECT_ANALYSIS = "project_analysis"
+    PROJECT_INDEX = "project_index"
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_claim", "status", "run_after"),
+    )
+
+    # Identificação
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_type = Column(
+        SQLEnum(JobType, native_enum=False, validate_strings=True),
+        nullable=False
+    )
+    status = Column(
+        SQLEnum(JobStatus, native_enum=False, validate_strings=True),
+        default=JobStatus.QUEUED,
+        nullable=False
+    )
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=True)
+
+    # Entrada e saída
+    payload = Column(JSONB)
+    result = Column(JSONB)
+    last_error = Column(Text)
+
+    # Controle de execução
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=3, nullable=False)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_by = Column(String(200), nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+
+    # Metadados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<Job {self.job_type.value} ({self.status.value})>"
+
+    def to_dict(self):
+        """Converte para dicionário"""
+        return {
+            "id": str(self.id),
+            "job_type": self.job_type.value,
+            "status": self.status.value,
+            "project_id": str(self.project_id) if self.project_id else None,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "result": self.result,
+            "last_error": self.last_error,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -0,0 +1,56 @@
+"""
+Model de Trecho Indexado do Projeto (RAG)
+Trechos do conteúdo, anexos e documentos com embedding pgvector (índice HNSW)
+"""
+
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from pgvector.sqlalchemy import Vector
+from datetime import datetime
+import uuid
+
+from app.config import settings
+from app.db.database import Base
+
+
+class ProjectChunk(Base):
+    __tablename__ = "project_chunks"
+    __table_args__ = (
+        Index("ix_project_chunks_project_source", "project_id", "source"),
+        # Chats e jobs concorrentes podem indexar o mesmo trecho: o insert ignora repetidos
+        Index(
+            "uq_project_chunks_chunk",
+            "project_id", "source", "chunk_index", "content_hash",
+            unique=True,
+        ),
+        Index(
+            "ix_project_chunks_embedding_hnsw",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+    )
+
+    # Identificação
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=True)
+
+    # Origem: "content", "annex_1".."annex_7" ou "document:<id>"
+    source = Column(String(100), nullable=False)
+    title = Column(String(200), nullable=True)
+    chunk_index = Column(Integer, nullable=False, default=0)
+
+    # Conteúdo
+    text = Column(Text, nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    token_count = Column(Integer, nullable=False, default=0)
+    embedding_backend = Column(String(50), nullable=False)
+    embedding = Column(Vector(settings.EMBEDDING_DIMENSIONS), nullable=False)
+
+    # Metadados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ProjectChunk {self.source}#{self.chunk_index}>"
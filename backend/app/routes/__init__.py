@@ -9,6 +9,7 @@ from app.routes import (
     ai_analysis,
     websocket_route,
     notifications,
+    jobs,
 )
 
 __all__ = [
@@ -18,4 +19,5 @@ __all__ = [
     "ai_analysis",
     "websocket_route",
     "notifications",
+    "jobs",
 ]
@@ -2,42 +2,238 @@
 Rotas de Análise de IA
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from uuid import UUID
-from typing import List
+from typing import Any, Dict, List, Optional
+import json
 import logging
 
-from app.db.database import get_db
+from app.db.database import AsyncSessionLocal, get_db, release_connection
 from app.models.project import Project
 from app.models.ai_analysis import AIAnalysis, AIProvider, AnalysisType
+from app.models.conversation import Conversation
 from app.models.notification import NotificationType, NotificationSeverity
 from app.models.user import User
 from app.schemas.analysis import (
     AIAnalysisRequest,
     AIAnalysisResponse,
+    ChatMessage,
     ChatRequest,
     ChatResponse,
+    ConversationCreate,
+    ConversationDetailResponse,
+    ConversationResponse,
     SuggestionRequest,
     SuggestionResponse,
+    UsageReportResponse,
 )
 from app.middleware.auth import get_current_user
-from app.services.openai_service import OpenAIService
+from app.services.openai_service import OpenAIService, get_openai_service
 from app.services.gemini_service import GeminiService
-from app.services.suggestion_service import SuggestionService
+from app.services.analysis_orchestrator import ProvidersUnavailableError
+from app.services.compliance_engine import ComplianceEngine, ComplianceReport
+from app.services.conversation_service import ConversationService
+from app.services.incremental_analysis import IncrementalAnalysisService
+from app.services.suggestion_service import SuggestionService, get_suggestion_service
 from app.services.notification_service import NotificationService
+from app.services.rag_service import RAGService
+from app.services.usage_service import UsageService, track_usage
+from app.services.single_flight import analysis_flight_key, single_flight
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-suggestion_service = SuggestionService()
+
+def _build_project_context(project: Project) -> Dict[str, Any]:
+    """Contexto fixo do projeto enviado ao chat (os trechos vêm do RAG)."""
+    return {
+        "title": project.title,
+        "description": project.description,
+        "institution": project.institution_name,
+    }
+
+
+async def _get_user_project(db: AsyncSession, project_id: UUID, user_id: UUID) -> Project:
+    """Projeto do usuário ou 404."""
+    result = await db.execute(
+        select(Project).where(
+            Project.id == project_id,
+            Project.user_id == user_id
+        )
+    )
+    project = result.scalar_one_or_none()
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Projeto não encontrado"
+        )
+    return project
+
+
+async def _resolve_conversation(
+    db: AsyncSession,
+    chat_request: ChatRequest,
+    user_id: UUID,
+) -> Conversation:
+    """Conversa informada no request (do mesmo projeto) ou uma nova."""
+    if chat_request.conversation_id is None:
+        return await ConversationService.create_conversation(db, user_id, chat_request.project_id)
+
+    conversation = await ConversationService.get_conversation(db, chat_request.conversation_id, user_id)
+    if not conversation or conversation.project_id != chat_request.project_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversa não encontrada"
+        )
+    return conversation
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Formata um evento Server-Sent Events."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _run_full_analysis(
+    db: AsyncSession,
+    project: Project,
+    user_id: UUID,
+    openai_service: OpenAIService,
+) -> Dict[str, Any]:
+    """Executa e persiste a análise completa; retorna a resposta serializada."""
+    # Regras locais antes de qualquer chamada paga: pendências bloqueantes
+    # têm resultado imediato, sem LLM
+    report = ComplianceEngine.precheck(project)
+    if report is not None and report.blocking:
+        return await _store_local_analysis(db, project, user_id, report)
+
+    # Seções do projeto (com as perguntas em aberto) e a análise anterior
+    sections = ComplianceEngine.sections_for_llm(project, report)
+    previous_sections = await IncrementalAnalysisService.load_previous_sections(db, project.id)
+    
+    # Liberar a conexão do pool enquanto aguarda os provedores
+    await release_connection(db)
+    
+    # Apenas seções alteradas vão para OpenAI (fine-tuned) e Gemini, em paralelo
+    with track_usage() as usage:
+        combined = await IncrementalAnalysisService.analyze_project(
+            sections,
+            previous_sections,
+            openai_service,
+            GeminiService(),
+        )
+    openai_result = combined["openai"]
+    gemini_result = combined["gemini"]
+    combined_score = combined["combined_score"]
+    
+    # Salvar no banco (transação curta)
+    ai_analysis = AIAnalysis(
+        project_id=project.id,
+        provider=AIProvider.COMBINED,
+        analysis_type=AnalysisType.FULL_PROJECT,
+        result={
+            "openai": openai_result,
+            "gemini": gemini_result,
+            "partial": combined["partial"],
+            "providers": combined["providers"],
+            "errors": combined["errors"],
+            "sections_analyzed": combined["sections_analyzed"],
+            "sections_reused": combined["sections_reused"],
+            "compliance_precheck": report.to_dict() if report else None,
+        },
+        score=combined_score,
+        section_hashes=combined["section_hashes"],
+        section_results=combined["section_results"],
+        tokens_used=usage.total_tokens(),
+        processing_time=usage.elapsed_ms,
+        suggestions=(openai_result or {}).get("suggestions", []),
+        critical_issues=(
+            (openai_result or {}).get("critical_issues", []) + (report.issues() if report else [])
+        ),
+        warnings=(gemini_result or {}).get("warnings", [])
+    )
+    
+    # Atualizar projeto
+    project.combined_score = combined_score
+    if openai_result is not None:
+        project.openai_analysis = openai_result
+    if gemini_result is not None:
+        project.gemini_analysis = gemini_result
+    
+    db.add(ai_analysis)
+    UsageService.add_events(
+        db, usage, AnalysisType.FULL_PROJECT.value, project.id, user_id
+    )
+    await db.commit()
+    await db.refresh(ai_analysis)
+    
+    logger.info(f"✅ Análise completa realizada: Projeto {project.id}, Score: {combined_score}")
+
+    await NotificationService.create_notification(
+        db,
+        user_id=user_id,
+        title="Análise inteligente concluída",
+        message=f"O projeto \"{project.title}\" recebeu uma nova análise combinada.",
+        notification_type=NotificationType.AI_ANALYSIS_COMPLETED,
+        severity=NotificationSeverity.SUCCESS,
+        data={
+            "project_id": str(project.id),
+            "analysis_id": str(ai_analysis.id),
+            "score": combined_score,
+            "partial": combined["partial"],
+        },
+        action_url=f"/dashboard/projects/{project.id}?tab=analysis",
+    )
+    
+    return AIAnalysisResponse.model_validate(ai_analysis).model_dump(mode="json")
+
+
+async def _store_local_analysis(
+    db: AsyncSession,
+    project: Project,
+    user_id: UUID,
+    report: ComplianceReport,
+) -> Dict[str, Any]:
+    """Persiste o resultado da pré-validação de um projeto bloqueado."""
+    ai_analysis = ComplianceEngine.local_analysis(project, report)
+    project.combined_score = ai_analysis.score
+    db.add(ai_analysis)
+    await db.commit()
+    await db.refresh(ai_analysis)
+
+    logger.info(
+        f"🧾 Análise por IA dispensada: Projeto {project.id} com "
+        f"{len(report.findings)} pendências locais"
+    )
+
+    await NotificationService.create_notification(
+        db,
+        user_id=user_id,
+        title="Pendências obrigatórias no projeto",
+        message=f"O projeto \"{project.title}\" precisa de correções antes da análise por IA.",
+        notification_type=NotificationType.AI_ANALYSIS_COMPLETED,
+        severity=NotificationSeverity.WARNING,
+        data={
+            "project_id": str(project.id),
+            "analysis_id": str(ai_analysis.id),
+            "score": ai_analysis.score,
+            "blocking": True,
+        },
+        action_url=f"/dashboard/projects/{project.id}?tab=analysis",
+    )
+
+    return AIAnalysisResponse.model_validate(ai_analysis).model_dump(mode="json")
+
 
 @router.post("/analyze-full", response_model=AIAnalysisResponse)
 async def analyze_full_project(
     analysis_request: AIAnalysisRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    openai_service: OpenAIService = Depends(get_openai_service)
 ):
     """
     Análise completa do projeto com IA
@@ -58,69 +254,28 @@ async def analyze_full_project(
                 detail="Projeto não encontrado"
             )
         
-        # Preparar texto do projeto
-        project_text = project.content.get("text", "") if project.content else ""
-        if not project_text:
-            project_text = project.description or project.title
-        
-        # Análise com OpenAI (modelo fine-tuned)
-        openai_service = OpenAIService()
-        openai_result = await openai_service.analyze_project(project_text)
-        
-        # Análise com Gemini
-        gemini_service = GeminiService()
-        gemini_result = await gemini_service.analyze_text(project_text)
-        
-        # Combinar análises
-        openai_score = openai_result.get("score", 0)
-        gemini_score = gemini_result.get("score", 0)
-        combined_score = (openai_score + gemini_score) // 2
-        
-        # Salvar no banco
-        ai_analysis = AIAnalysis(
-            project_id=project.id,
-            provider=AIProvider.COMBINED,
-            analysis_type=AnalysisType.FULL_PROJECT,
-            result={
-                "openai": openai_result,
-                "gemini": gemini_result
-            },
-            score=combined_score,
-            suggestions=openai_result.get("suggestions", []),
-            critical_issues=openai_result.get("critical_issues", []),
-            warnings=gemini_result.get("warnings", [])
+        # Requisições idênticas simultâneas (duplo clique, colaboradores)
+        # compartilham uma única execução
+        flight_key = analysis_flight_key(
+            project.id, project.version, analysis_request.analysis_type.value
         )
-        
-        # Atualizar projeto
-        project.combined_score = combined_score
-        project.openai_analysis = openai_result
-        project.gemini_analysis = gemini_result
-        
-        db.add(ai_analysis)
-        await db.commit()
-        await db.refresh(ai_analysis)
-        
-        logger.info(f"✅ Análise completa realizada: Projeto {project.id}, Score: {combined_score}")
-
-        await NotificationService.create_notification(
-            db,
-            user_id=current_user.id,
-            title="Análise inteligente concluída",
-            message=f"O projeto \"{project.title}\" recebeu uma nova análise combinada.",
-            notification_type=NotificationType.AI_ANALYSIS_COMPLETED,
-            severity=NotificationSeverity.SUCCESS,
-            data={
-                "project_id": str(project.id),
-                "analysis_id": str(ai_analysis.id),
-                "score": combined_score,
-            },
-            action_url=f"/dashboard/projects/{project.id}?tab=analysis",
+        analysis, shared = await single_flight.do(
+            flight_key,
+            lambda: _run_full_analysis(db, project, current_user.id, openai_service),
         )
+        if shared:
+            logger.info(f"🔗 Análise compartilhada com requisição idêntica: Projeto {project.id}")
         
-        return AIAnalysisResponse.model_validate(ai_analysis)
+        return AIAnalysisResponse(**analysis)
         
     except HTTPException:
         raise
+    except ProvidersUnavailableError as e:
+        logger.error(f"❌ Nenhum provedor concluiu a análise: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"❌ Erro ao analisar projeto: {e}")
         raise HTTPException(
@@ -134,7 +289,8 @@ async def analyze_section(
     section: str,
     content: str,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    openai_service: OpenAIService = Depends(get_openai_service)
 ):
     """
     Análise de uma seção específica do projeto
@@ -155,13 +311,16 @@ async def analyze_section(
                 detail="Projeto não encontrado"
             )
         
+        # Liberar a conexão do pool enquanto aguarda o provedor
+        await release_connection(db)
+        
         # Analisar com OpenAI
-        openai_service = OpenAIService()
-        analysis = await openai_service.analyze_section(
-            section_name=section,
-            section_content=content,
-            project_context=project.description or ""
-        )
+        with track_usage() as usage:
+            analysis = await openai_service.analyze_section(
+                section_name=section,
+                section_content=content,
+                project_context=project.description or ""
+            )
         
         # Salvar análise
         ai_analysis = AIAnalysis(
@@ -172,10 +331,15 @@ async def analyze_section(
             result=analysis,
             score=analysis.get("score", 0),
             suggestions=analysis.get("suggestions", []),
-            critical_issues=analysis.get("critical_issues", [])
+            critical_issues=analysis.get("critical_issues", []),
+            tokens_used=usage.total_tokens(),
+            processing_time=usage.elapsed_ms,
         )
         
         db.add(ai_analysis)
+        UsageService.add_events(
+            db, usage, AnalysisType.SECTION.value, project.id, current_user.id
+        )
         await db.commit()
         await db.refresh(ai_analysis)
         
@@ -195,48 +359,51 @@ async def analyze_section(
 @router.post("/chat", response_model=ChatResponse)
 async def chat_with_ai(
     chat_request: ChatRequest,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    openai_service: OpenAIService = Depends(get_openai_service)
 ):
     """
     Chat com IA sobre o projeto
+
+    O histórico fica no servidor: envie o `conversation_id` retornado no
+    primeiro turno para continuar a conversa.
     """
     try:
-        # Buscar projeto
-        result = await db.execute(
-            select(Project).where(
-                Project.id == chat_request.project_id,
-                Project.user_id == current_user.id
-            )
+        project = await _get_user_project(db, chat_request.project_id, current_user.id)
+        conversation = await _resolve_conversation(db, chat_request, current_user.id)
+        history = await ConversationService.build_history(db, conversation)
+        
+        # Preparar contexto com os trechos do projeto relevantes à pergunta
+        project_context = _build_project_context(project)
+        project_context["retrieved"] = await RAGService.retrieve_for_chat(
+            db, project, chat_request.message
         )
-        project = result.scalar_one_or_none()
         
-        if not project:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Projeto não encontrado"
+        # Usar OpenAI para chat
+        with track_usage() as usage:
+            response = await openai_service.chat_about_project(
+                message=chat_request.message,
+                project_context=project_context,
+                conversation_history=history
             )
         
-        # Preparar contexto
-        project_context = {
-            "title": project.title,
-            "description": project.description,
-            "institution": project.institution_name,
-            "content": project.content.get("text", "") if project.content else ""
-        }
+        ConversationService.add_turn(db, conversation, chat_request.message, response.get("message", ""))
+        UsageService.add_events(db, usage, "chat", project.id, current_user.id)
+        await db.commit()
         
-        # Usar OpenAI para chat
-        openai_service = OpenAIService()
-        response = await openai_service.chat_about_project(
-            message=chat_request.message,
-            project_context=project_context,
-            conversation_history=chat_request.conversation_history
+        # Compactar o histórico depois de responder
+        background_tasks.add_task(
+            ConversationService.compact_in_background,
+            conversation.id, openai_service, project.id, current_user.id,
         )
         
         logger.info(f"✅ Chat respondido para projeto: {project.id}")
         
         return ChatResponse(
             message=response.get("message", ""),
+            conversation_id=conversation.id,
             suggestions=response.get("suggestions"),
             references=response.get("references")
         )
@@ -250,6 +417,150 @@ async def chat_with_ai(
             detail=f"Erro ao processar chat: {str(e)}"
         )
 
+@router.post("/chat/stream")
+async def chat_with_ai_stream(
+    chat_request: ChatRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    openai_service: OpenAIService = Depends(get_openai_service)
+):
+    """
+    Chat com IA em streaming (Server-Sent Events)
+
+    Eventos: `token` (trecho gerado), `done` (mensagem completa,
+    conversation_id, sugestões, referências, ttft_ms, total_ms) e `error`.
+    """
+    project = await _get_user_project(db, chat_request.project_id, current_user.id)
+    conversation = await _resolve_conversation(db, chat_request, current_user.id)
+    history = await ConversationService.build_history(db, conversation)
+    
+    project_context = _build_project_context(project)
+    project_context["retrieved"] = await RAGService.retrieve_for_chat(
+        db, project, chat_request.message
+    )
+    project_id = project.id
+    conversation_id = conversation.id
+
+    user_id = current_user.id
+
+    async def event_stream():
+        try:
+            assistant_message = ""
+            with track_usage() as usage:
+                async for event in openai_service.stream_chat_about_project(
+                    message=chat_request.message,
+                    project_context=project_context,
+                    conversation_history=history
+                ):
+                    event_type = event.pop("type")
+                    if event_type == "done":
+                        assistant_message = event.get("message", "")
+                        event["conversation_id"] = str(conversation_id)
+                    yield _sse_event(event_type, event)
+            logger.info(f"✅ Chat (streaming) respondido para projeto: {project_id}")
+
+            # A sessão da requisição já foi encerrada quando o stream termina
+            async with AsyncSessionLocal() as session:
+                stream_conversation = await ConversationService.get_conversation(
+                    session, conversation_id, user_id
+                )
+                if stream_conversation is not None:
+                    ConversationService.add_turn(
+                        session, stream_conversation, chat_request.message, assistant_message
+                    )
+                UsageService.add_events(session, usage, "chat", project_id, user_id)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"❌ Erro no chat streaming: {e}")
+            yield _sse_event("error", {"detail": f"Erro ao processar chat: {str(e)}"})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Executada após o fim do stream
+        background=BackgroundTask(
+            ConversationService.compact_in_background,
+            conversation_id, openai_service, project_id, user_id,
+        ),
+    )
+
+
+@router.post("/conversations", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
+async def create_conversation(
+    conversation_data: ConversationCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Criar uma conversa do chat para o projeto
+    """
+    await _get_user_project(db, conversation_data.project_id, current_user.id)
+    conversation = await ConversationService.create_conversation(
+        db, current_user.id, conversation_data.project_id, conversation_data.title
+    )
+    await db.commit()
+    return ConversationResponse.model_validate(conversation)
+
+
+@router.get("/conversations", response_model=List[ConversationResponse])
+async def list_conversations(
+    project_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Listar as conversas do usuário em um projeto (mais recentes primeiro)
+    """
+    conversations = await ConversationService.list_conversations(db, current_user.id, project_id)
+    return [ConversationResponse.model_validate(conversation) for conversation in conversations]
+
+
+@router.get("/conversations/{conversation_id}", response_model=ConversationDetailResponse)
+async def get_conversation(
+    conversation_id: UUID,
+    limit: int = Query(100, ge=1, le=500, description="Últimas mensagens retornadas"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Obter uma conversa com as mensagens mais recentes
+    """
+    conversation = await ConversationService.get_conversation(db, conversation_id, current_user.id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversa não encontrada"
+        )
+
+    messages = await ConversationService.get_messages(db, conversation.id, limit)
+    response = ConversationDetailResponse.model_validate(conversation)
+    response.messages = [ChatMessage.model_validate(message) for message in messages]
+    return response
+
+
+@router.delete("/conversations/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_conversation(
+    conversation_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Excluir uma conversa e suas mensagens
+    """
+    conversation = await ConversationService.get_conversation(db, conversation_id, current_user.id)
+    if not conversation:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Conversa não encontrada"
+        )
+
+    await db.delete(conversation)
+    await db.commit()
+
+    logger.info(f"✅ Conversa excluída: {conversation_id}")
+    return None
+
 @router.get("/project/{project_id}/analyses", response_model=List[AIAnalysisResponse])
 async def get_project_analyses(
     project_id: UUID,
@@ -300,6 +611,7 @@ async def generate_ai_suggestion(
     suggestion_request: SuggestionRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    suggestion_service: SuggestionService = Depends(get_suggestion_service),
 ):
     """Gera sugestão textual com IA para um trecho selecionado."""
 
@@ -318,12 +630,20 @@ async def generate_ai_suggestion(
                 detail="Projeto não encontrado",
             )
 
-        suggestion = await suggestion_service.generate_contextual_suggestion(
-            project_title=project.title,
-            section=suggestion_request.section,
-            selected_text=suggestion_request.selected_text,
-            improvement_type=suggestion_request.improvement_type,
+        await release_connection(db)
+
+        with track_usage() as usage:
+            suggestion = await suggestion_service.generate_contextual_suggestion(
+                project_title=project.title,
+                section=suggestion_request.section,
+                selected_text=suggestion_request.selected_text,
+                improvement_type=suggestion_request.improvement_type,
+            )
+
+        UsageService.add_events(
+            db, usage, AnalysisType.SUGGESTION.value, project.id, current_user.id
         )
+        await db.commit()
 
         return SuggestionResponse(**suggestion)
 
@@ -335,3 +655,28 @@ async def generate_ai_suggestion(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao gerar sugestão: {str(e)}",
         )
+
+
+@router.get("/usage/report", response_model=UsageReportResponse)
+async def get_usage_report(
+    days: int = Query(30, ge=1, le=365),
+    provider: Optional[str] = Query(None, description="openai ou gemini"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Tokens e latência (p50/p95) por provedor, tipo de análise e dia
+    das análises do usuário autenticado
+    """
+    try:
+        rows = await UsageService.get_report(
+            db, days=days, provider=provider, user_id=current_user.id
+        )
+        return UsageReportResponse(days=days, rows=rows)
+
+    except Exception as e:
+        logger.error(f"❌ Erro ao gerar relatório de uso: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao gerar relatório de uso: {str(e)}"
+        )
@@ -13,16 +13,22 @@ import os
 import shutil
 from datetime import datetime
 
-from app.db.database import get_db
+from app.db.database import get_db, release_connection
 from app.models.document import Document
+from app.models.document_blob import DocumentBlob
 from app.models.project import Project
 from app.models.user import User
 from app.schemas.document import DocumentUploadResponse, DocumentResponse, PDFAnalysisRequest
 from app.middleware.auth import get_current_user
-from app.services.pdf_processor import PDFProcessor
-from app.services.openai_service import OpenAIService
+from app.services.pdf_pool import pdf_pool, PageFeed, PDFProcessingError, PDFTimeoutError
+from app.services.upload_storage import UploadTooLargeError
+from app.services.blob_store import BlobStore
+from app.services.openai_service import OpenAIService, get_openai_service
 from app.services.gemini_service import GeminiService
+from app.services.analysis_orchestrator import AnalysisOrchestrator, ProvidersUnavailableError
 from app.services.notification_service import NotificationService
+from app.services.usage_service import UsageService, track_usage
+from app.services.rag_service import RAGService
 from app.models.notification import NotificationType, NotificationSeverity
 from app.config import settings
 
@@ -54,46 +60,47 @@ async def upload_document(
                 detail=f"Tipo de arquivo não permitido. Permitidos: {', '.join(settings.ALLOWED_EXTENSIONS)}"
             )
         
-        # Validar tamanho
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        if file_size > settings.UPLOAD_MAX_SIZE:
-            max_mb = settings.UPLOAD_MAX_SIZE / (1024 * 1024)
+        # Salvar em blocos (validando o tamanho durante a cópia) no armazenamento
+        # por conteúdo: um arquivo repetido reaproveita o já existente
+        try:
+            blob = await BlobStore.store(db, file, file_extension, file.content_type)
+        except UploadTooLargeError as e:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"Arquivo muito grande. Máximo: {max_mb:.0f}MB"
+                detail=str(e)
             )
         
-        # Criar nome único para o arquivo
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        unique_filename = f"{current_user.id}_{timestamp}_{file.filename}"
-        
-        # Salvar arquivo
-        upload_path = Path(settings.UPLOAD_PATH) / file_extension
-        upload_path.mkdir(parents=True, exist_ok=True)
-        
-        file_path = upload_path / unique_filename
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        # Texto já extraído de um upload anterior do mesmo conteúdo pelo
+        # mesmo usuário (conteúdo de outros usuários não é sinalizado)
+        reused = blob.deduplicated and await BlobStore.owned_by(db, blob.sha256, current_user.id)
+        cached_text = None
+        if reused:
+            cached_text = (await db.execute(
+                select(DocumentBlob.extracted_text).where(DocumentBlob.sha256 == blob.sha256)
+            )).scalar_one_or_none()
         
         # Criar registro no banco
         document = Document(
             user_id=current_user.id,
             project_id=project_id,
-            filename=unique_filename,
+            filename=Path(blob.file_path).name,
             original_filename=file.filename,
-            file_path=str(file_path),
+            file_path=blob.file_path,
             file_type=file_extension,
-            file_size=file_size,
-            mime_type=file.content_type
+            file_size=blob.file_size,
+            mime_type=file.content_type,
+            content_hash=blob.sha256,
+            extracted_text=cached_text
         )
         
         db.add(document)
         await db.commit()
         await db.refresh(document)
         
-        logger.info(f"✅ Arquivo enviado: {file.filename} (ID: {document.id})")
+        logger.info(
+            f"✅ Arquivo enviado: {file.filename} (ID: {document.id}"
+            f"{', conteúdo reaproveitado' if blob.deduplicated else ''})"
+        )
         
         return DocumentUploadResponse(
             id=document.id,
@@ -101,8 +108,12 @@ async def upload_document(
             original_filename=document.original_filename,
             file_type=document.file_type,
             file_size=document.file_size,
+            content_hash=document.content_hash,
             created_at=document.created_at,
-            message="Arquivo enviado com sucesso"
+            message=(
+                "Arquivo já enviado anteriormente; conteúdo reaproveitado"
+                if reused else "Arquivo enviado com sucesso"
+            )
         )
         
     except HTTPException:
@@ -154,7 +165,8 @@ async def analyze_document(
     document_id: UUID,
     create_project: bool = True,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    openai_service: OpenAIService = Depends(get_openai_service)
 ):
     """
     Analisar PDF com OpenAI e Gemini
@@ -175,9 +187,66 @@ async def analyze_document(
                 detail="Documento não encontrado"
             )
         
-        # Processar PDF
-        pdf_processor = PDFProcessor()
-        extracted_text = pdf_processor.extract_text_from_pdf(document.file_path)
+        # Texto e análise em cache no conteúdo armazenado (uploads repetidos)
+        blob = await db.get(DocumentBlob, document.content_hash) if document.content_hash else None
+        # O texto do conteúdo compartilhado só vale para quem já tem outro
+        # documento com ele (mesma regra da análise em cache)
+        extracted_text = document.extracted_text
+        if not extracted_text and blob and await BlobStore.owned_by(
+            db, blob.sha256, current_user.id, exclude_document_id=document.id
+        ):
+            extracted_text = blob.extracted_text
+        cached = BlobStore.cached_analysis(blob, current_user.id)
+        
+        # Liberar a conexão do pool durante extração e chamadas aos provedores
+        await release_connection(db)
+        
+        # Ler o PDF página a página no pool (não bloqueia o event loop); a
+        # análise do OpenAI começa nos primeiros trechos enquanto o restante
+        # ainda é lido, então a leitura entra no prazo dele
+        feed = PageFeed(pdf_pool.stream_pages(document.file_path)) if not extracted_text else None
+        gemini_service = GeminiService()
+        try:
+            with track_usage() as usage:
+                if cached:
+                    logger.info(f"♻️ Análise reaproveitada do conteúdo {document.content_hash[:12]}")
+                    combined = cached
+                else:
+                    if feed is not None:
+                        analyze_openai = lambda: openai_service.analyze_project_stream(feed.parts())
+                    else:
+                        analyze_openai = lambda: openai_service.analyze_project(extracted_text)
+                    try:
+                        # Analisar com OpenAI (modelo fine-tuned) e Gemini em paralelo
+                        combined = await AnalysisOrchestrator.run_combined(
+                            {
+                                "openai": analyze_openai,
+                                "gemini": lambda: gemini_service.analyze_pdf(document.file_path),
+                            },
+                            timeouts={
+                                "openai": settings.AI_PROVIDER_TIMEOUT_SECONDS + settings.PDF_POOL_TIMEOUT_SECONDS
+                            } if feed is not None else None,
+                        )
+                    except ProvidersUnavailableError:
+                        # Falha na leitura do PDF tem precedência sobre a dos provedores
+                        if feed is not None:
+                            await feed.text()
+                        raise
+            if feed is not None:
+                extracted_text = await feed.text()
+        except PDFTimeoutError as e:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail=str(e)
+            )
+        except PDFProcessingError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Não foi possível processar o PDF: {e}"
+            )
+        finally:
+            if feed is not None:
+                feed.cancel()
         
         if not extracted_text:
             raise HTTPException(
@@ -185,13 +254,8 @@ async def analyze_document(
                 detail="Não foi possível extrair texto do PDF"
             )
         
-        # Analisar com OpenAI (modelo fine-tuned)
-        openai_service = OpenAIService()
-        openai_analysis = await openai_service.analyze_project(extracted_text)
-        
-        # Analisar com Gemini
-        gemini_service = GeminiService()
-        gemini_analysis = await gemini_service.analyze_pdf(document.file_path)
+        openai_analysis = combined["results"].get("openai")
+        gemini_analysis = combined["results"].get("gemini")
         
         # Criar projeto se solicitado
         project = None
@@ -206,29 +270,39 @@ async def analyze_document(
                 title=title,
                 description=f"Importado de {document.original_filename}",
                 status=ProjectStatus.IN_ANALYSIS,
-                content={"text": extracted_text[:5000]},  # Primeiros 5000 caracteres
+                content={"text": extracted_text},
                 openai_analysis=openai_analysis,
                 gemini_analysis=gemini_analysis
             )
             
-            # Calcular score combinado
-            openai_score = openai_analysis.get("score", 0)
-            gemini_score = gemini_analysis.get("score", 0)
-            project.combined_score = (openai_score + gemini_score) // 2
+            # Score combinado apenas com os provedores que concluíram
+            project.combined_score = combined["combined_score"]
             
             db.add(project)
+            await db.flush()
+        
+        UsageService.add_events(
+            db, usage, "document", project.id if project else None, current_user.id
+        )
         
         # Atualizar documento
         document.is_processed = 1
         document.extracted_text = extracted_text
         document.processed_at = datetime.utcnow()
         
+        if blob:
+            blob.extracted_text = extracted_text
+            blob.processed_at = document.processed_at
+            BlobStore.remember_analysis(blob, combined, current_user.id)
+        
         if project:
             document.project_id = project.id
         
         await db.commit()
         if project:
             await db.refresh(project)
+            # Texto novo no projeto: o worker reindexa o RAG do chat
+            await RAGService.schedule_index(db, project, marker=f"document:{document.id}")
         
         logger.info(f"✅ Documento analisado: {document_id}")
 
@@ -258,11 +332,20 @@ async def analyze_document(
             "project_id": str(project.id) if project else None,
             "openai_analysis": openai_analysis,
             "gemini_analysis": gemini_analysis,
+            "combined_score": combined["combined_score"],
+            "partial": combined["partial"],
+            "provider_errors": combined["errors"],
             "extracted_text_length": len(extracted_text)
         }
         
     except HTTPException:
         raise
+    except ProvidersUnavailableError as e:
+        logger.error(f"❌ Nenhum provedor concluiu a análise: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"❌ Erro ao analisar documento: {e}")
         raise HTTPException(
@@ -294,12 +377,17 @@ async def delete_document(
                 detail="Documento não encontrado"
             )
         
-        # Deletar arquivo
-        if os.path.exists(document.file_path):
+        # Deletar registro (o trigger decrementa a referência); o arquivo
+        # compartilhado só sai com a última referência
+        content_hash = document.content_hash
+        await db.delete(document)
+        await db.flush()
+        
+        if content_hash:
+            await BlobStore.collect(db, [content_hash])
+        elif os.path.exists(document.file_path):
             os.remove(document.file_path)
         
-        # Deletar registro
-        await db.delete(document)
         await db.commit()
         
         logger.info(f"✅ Documento deletado: {document_id}")
@@ -0,0 +1,37 @@
+"""
+Rotas de Jobs em segundo plano (status/polling)
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+import logging
+
+from app.db.database import get_db
+from app.middleware.auth import get_current_user
+from app.models.user import User
+from app.schemas.job import JobResponse
+from app.services.job_service import JobService
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job_status(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Consultar status de um job
+    """
+    job = await JobService.get_job(db, job_id, current_user.id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job não encontrado"
+        )
+
+    return JobResponse.model_validate(job)
@@ -11,6 +11,7 @@ import logging
 
 from app.db.database import get_db
 from app.models.project import Project, ProjectStatus
+from app.models.document import Document
 from app.models.notification import NotificationType, NotificationSeverity
 from app.models.user import User
 from app.schemas.project import (
@@ -19,7 +20,13 @@ from app.schemas.project import (
 )
 from app.middleware.auth import get_current_user
 from app.services.project_service import ProjectService  # ✅ ADICIONADO
+from app.services.compliance_engine import ComplianceEngine
+from app.services.blob_store import BlobStore
 from app.services.notification_service import NotificationService
+from app.services.job_service import JobService
+from app.services.rag_service import RAGService, SECTION_TITLES
+from app.services.single_flight import analysis_flight_key
+from app.models.job import JobType
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -188,6 +195,10 @@ async def update_project(
         
         logger.info(f"✅ Projeto atualizado: {project.id}")
 
+        # Conteúdo alterado: o worker reindexa o RAG do chat (não a cada pergunta)
+        if SECTION_TITLES.keys() & update_data.keys():
+            await RAGService.schedule_index(db, project)
+
         if "status" in update_data and project.status != previous_status:
             await NotificationService.create_notification(
                 db,
@@ -241,7 +252,18 @@ async def delete_project(
                 detail="Projeto não encontrado"
             )
         
+        # Conteúdos dos documentos removidos em cascata (o trigger decrementa
+        # as referências; os que zerarem saem do disco)
+        content_hashes = (await db.execute(
+            select(Document.content_hash).where(
+                Document.project_id == project_id,
+                Document.content_hash.isnot(None)
+            )
+        )).scalars().all()
+        
         await db.delete(project)
+        await db.flush()
+        await BlobStore.collect(db, content_hashes)
         await db.commit()
         
         logger.info(f"✅ Projeto deletado: {project_id}")
@@ -262,7 +284,9 @@ async def analyze_project(
     current_user: User = Depends(get_current_user)
 ):
     """
-    Iniciar análise automática do projeto
+    Iniciar análise automática do projeto (assíncrona)
+
+    Retorna 202 com o ID do job; acompanhe em GET /api/jobs/{job_id}.
     """
     try:
         # Verificar propriedade
@@ -280,13 +304,25 @@ async def analyze_project(
                 detail="Projeto não encontrado"
             )
         
-        # Usar ProjectService para análise
-        analysis = await ProjectService.auto_analyze_project(db, project_id)
+        # Enfileirar análise para o worker (python -m app.worker); pedidos
+        # repetidos para a mesma versão reaproveitam o job em andamento
+        job = await JobService.enqueue(
+            db,
+            job_type=JobType.PROJECT_ANALYSIS,
+            user_id=current_user.id,
+            project_id=project.id,
+            payload={"project_version": project.version},
+            dedupe_key=analysis_flight_key(
+                project.id, project.version, JobType.PROJECT_ANALYSIS.value
+            ),
+        )
         
         return {
             "message": "Análise iniciada",
             "project_id": str(project_id),
-            "analysis": analysis
+            "job_id": str(job.id),
+            "status": job.status.value,
+            "status_url": f"/api/jobs/{job.id}"
         }
         
     except HTTPException:
@@ -298,6 +334,49 @@ async def analyze_project(
             detail=f"Erro ao iniciar análise: {str(e)}"
         )
 
+@router.get("/{project_id}/compliance")
+async def get_project_compliance(
+    project_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Pré-validação local do projeto (campos obrigatórios, CNPJ e orçamento)
+
+    Resposta imediata, sem chamada a IA; `blocking` indica se a análise
+    completa será dispensada até a correção das pendências.
+    """
+    try:
+        result = await db.execute(
+            select(Project).where(
+                Project.id == project_id,
+                Project.user_id == current_user.id
+            )
+        )
+        project = result.scalar_one_or_none()
+        
+        if not project:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Projeto não encontrado"
+            )
+        
+        report = ComplianceEngine.check(project)
+        return {
+            "project_id": str(project_id),
+            **report.to_dict(),
+            "issues": report.issues(),
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erro na pré-validação: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro na pré-validação: {str(e)}"
+        )
+
 @router.get("/{project_id}/summary")
 async def get_project_summary(
     project_id: UUID,
@@ -5,7 +5,12 @@ Exports dos schemas
 from app.schemas.user import UserResponse, GoogleLoginResponse
 from app.schemas.project import ProjectResponse, ProjectListResponse
 from app.schemas.document import DocumentResponse, DocumentUploadResponse
-from app.schemas.analysis import AIAnalysisResponse, ChatResponse
+from app.schemas.analysis import (
+    AIAnalysisResponse,
+    ChatResponse,
+    ConversationResponse,
+    ConversationDetailResponse,
+)
 from app.schemas.notification import (
     NotificationResponse,
     NotificationListResponse,
@@ -22,6 +27,8 @@ __all__ = [
     "DocumentUploadResponse",
     "AIAnalysisResponse",
     "ChatResponse",
+    "ConversationResponse",
+    "ConversationDetailResponse",
     "NotificationResponse",
     "NotificationListResponse",
     "NotificationPreferenceResponse",
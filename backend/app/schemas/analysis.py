@@ -4,10 +4,12 @@ Schemas Pydantic para Análise de IA
 
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
-from datetime import datetime
+from datetime import date, datetime
 from uuid import UUID
 from enum import Enum
 
+from app.config import settings
+
 class AIProviderEnum(str, Enum):
     OPENAI = "openai"
     GEMINI = "gemini"
@@ -71,24 +73,53 @@ class AIAnalysisResponse(BaseModel):
 
 class ChatMessage(BaseModel):
     """Mensagem do chat"""
+    id: Optional[UUID] = None
     role: str  # user, assistant
     content: str
-    timestamp: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
 
 class ChatRequest(BaseModel):
-    """Request para chat com IA"""
+    """Request para chat com IA (sem `conversation_id` uma nova conversa é criada)"""
     project_id: UUID
-    message: str
-    conversation_history: Optional[List[ChatMessage]] = Field(default_factory=list)
+    message: str = Field(..., min_length=1, max_length=settings.CHAT_MESSAGE_MAX_CHARS)
+    conversation_id: Optional[UUID] = None
     provider: AIProviderEnum = AIProviderEnum.OPENAI
 
 class ChatResponse(BaseModel):
     """Resposta do chat"""
     message: str
+    conversation_id: Optional[UUID] = None
     suggestions: Optional[List[str]] = None
     references: Optional[List[str]] = None
 
 
+class ConversationCreate(BaseModel):
+    """Request para criar uma conversa"""
+    project_id: UUID
+    title: Optional[str] = Field(None, max_length=200)
+
+
+class ConversationResponse(BaseModel):
+    """Conversa do chat (histórico mantido no servidor)"""
+    id: UUID
+    project_id: UUID
+    title: Optional[str]
+    summary: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationDetailResponse(ConversationResponse):
+    """Conversa com as mensagens mais recentes"""
+    messages: List[ChatMessage] = Field(default_factory=list)
+
+
 class SuggestionRequest(BaseModel):
     """Request para sugestões assistidas."""
     project_id: UUID
@@ -103,3 +134,23 @@ class SuggestionResponse(BaseModel):
     original_text: str
     suggested_text: str
     improvement_type: Optional[str] = None
+
+
+class UsageReportRow(BaseModel):
+    """Consumo agregado de um provedor por tipo de análise e dia"""
+    day: date
+    provider: str
+    analysis_type: str
+    calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    p50_ms: int
+    p95_ms: int
+    max_ms: int
+
+
+class UsageReportResponse(BaseModel):
+    """Relatório de tokens e latência dos provedores de IA"""
+    days: int
+    rows: List[UsageReportRow]
@@ -14,6 +14,7 @@ class DocumentUploadResponse(BaseModel):
     original_filename: str
     file_type: str
     file_size: int
+    content_hash: Optional[str] = None
     created_at: datetime
     message: str
 
@@ -26,6 +27,7 @@ class DocumentResponse(BaseModel):
     original_filename: str
     file_type: str
     file_size: int
+    content_hash: Optional[str] = None
     is_processed: bool
     created_at: datetime
     
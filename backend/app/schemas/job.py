@@ -0,0 +1,34 @@
+"""
+Schemas Pydantic para Jobs em segundo plano
+"""
+
+from pydantic import BaseModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+from uuid import UUID
+from enum import Enum
+
+
+class JobStatusEnum(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobResponse(BaseModel):
+    """Status de um job"""
+    id: UUID
+    job_type: str
+    status: JobStatusEnum
+    project_id: Optional[UUID]
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]]
+    last_error: Optional[str]
+    run_after: datetime
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
@@ -4,12 +4,30 @@ Exports dos serviços
 
 from app.services.openai_service import OpenAIService
 from app.services.gemini_service import GeminiService
-from app.services.pdf_processor import PDFProcessor
+from app.services.pdf_processor import PDFProcessor, PDFDocument
 from app.services.notification_service import NotificationService
+from app.services.analysis_orchestrator import AnalysisOrchestrator
+from app.services.incremental_analysis import IncrementalAnalysisService
+from app.services.usage_service import UsageService
+from app.services.rag_service import RAGService
+from app.services.conversation_service import ConversationService
+from app.services.compliance_engine import ComplianceEngine
+from app.services.budget_engine import BudgetEngine, BudgetTable
+from app.services.blob_store import BlobStore
 
 __all__ = [
     "OpenAIService",
     "GeminiService",
     "PDFProcessor",
+    "PDFDocument",
     "NotificationService",
+    "AnalysisOrchestrator",
+    "IncrementalAnalysisService",
+    "UsageService",
+    "RAGService",
+    "ConversationService",
+    "ComplianceEngine",
+    "BudgetEngine",
+    "BudgetTable",
+    "BlobStore",
 ]
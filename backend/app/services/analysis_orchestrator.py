@@ -0,0 +1,105 @@
+"""
+Orquestração de Análises Combinadas
+Executa os provedores de IA em paralelo (fan-out) com timeout individual;
+provedores com circuito aberto falham na hora e a análise segue com os demais
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+
+from app.config import settings
+from app.services.circuit_breaker import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+ProviderCall = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class ProvidersUnavailableError(RuntimeError):
+    """Nenhum provedor conseguiu concluir a análise."""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        details = "; ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"Nenhum provedor de IA concluiu a análise ({details})")
+
+
+class AnalysisOrchestrator:
+    """Executa análises de vários provedores ao mesmo tempo."""
+
+    @staticmethod
+    def combine_scores(results: Dict[str, Dict[str, Any]]) -> int:
+        """Média inteira dos scores apenas dos provedores que concluíram."""
+        scores: List[int] = []
+        for result in results.values():
+            try:
+                scores.append(int(result.get("score", 0) or 0))
+            except (TypeError, ValueError):
+                scores.append(0)
+        return sum(scores) // len(scores) if scores else 0
+
+    @staticmethod
+    async def run_combined(
+        calls: Dict[str, ProviderCall],
+        timeout: Optional[float] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Dispara todos os provedores em paralelo e aguarda cada um até o timeout
+        (ou o de `timeouts`, para provedores cuja chamada inclui outra etapa).
+
+        Retorna os resultados concluídos, os erros por provedor e a flag
+        `partial` quando algum provedor falhou, estourou o tempo ou devolveu
+        um resultado parcial (ex.: trechos que falharam na análise em partes).
+        Levanta ProvidersUnavailableError se nenhum provedor concluir.
+        """
+        timeout = settings.AI_PROVIDER_TIMEOUT_SECONDS if timeout is None else timeout
+        limits = {name: (timeouts or {}).get(name, timeout) for name in calls}
+        names = list(calls)
+
+        outcomes = await asyncio.gather(
+            *(asyncio.wait_for(calls[name](), timeout=limits[name]) for name in names),
+            return_exceptions=True,
+        )
+
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                errors[name] = f"timeout após {limits[name]:g}s"
+                # O prazo inclui a fila do limitador e do pool: não conta como
+                # falha do provedor (os timeouts dos clientes OpenAI/Gemini contam)
+                logger.warning("⏱️ Provedor %s excedeu o timeout de %gs", name, limits[name])
+            elif isinstance(outcome, CircuitOpenError):
+                errors[name] = str(outcome)
+                logger.info("🔌 Provedor %s ignorado: circuito aberto", name)
+            elif isinstance(outcome, Exception):
+                errors[name] = str(outcome) or outcome.__class__.__name__
+                logger.warning("⚠️ Provedor %s falhou: %s", name, outcome)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                results[name] = outcome
+
+        if not results:
+            raise ProvidersUnavailableError(errors)
+
+        combined_score = AnalysisOrchestrator.combine_scores(results)
+        incomplete = [name for name, result in results.items() if result.get("partial")]
+        if errors or incomplete:
+            logger.info(
+                "🧩 Análise parcial: concluídos=%s, falhas=%s, incompletos=%s, score=%s",
+                list(results),
+                list(errors),
+                incomplete,
+                combined_score,
+            )
+
+        return {
+            "results": results,
+            "errors": errors,
+            "partial": bool(errors or incomplete),
+            "providers": list(results),
+            "combined_score": combined_score,
+        }
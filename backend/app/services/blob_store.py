@@ -0,0 +1,173 @@
+"""
+Armazenamento por Conteúdo (deduplicação de uploads)
+Cada conteúdo distinto vira um arquivo em UPLOAD_PATH/blobs/<ab>/<cd>/<sha256>.<ext>
+e uma linha em document_blobs com contagem de referências dos documentos
+(decrementada por trigger a cada documento removido, inclusive em cascata).
+Uploads repetidos (revisões, retentativas, outros projetos) apontam para o
+mesmo arquivo. O texto extraído e a análise só são reaproveitados entre
+documentos do mesmo usuário: para os demais, a deduplicação fica restrita ao
+disco e não revela que o conteúdo já tinha sido enviado por outra pessoa
+(além da diferença de tempo do upload)
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+from uuid import UUID
+import asyncio
+import logging
+import os
+
+from fastapi import UploadFile
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.document import Document
+from app.models.document_blob import DocumentBlob
+from app.services.gemini_service import GeminiService
+from app.services.openai_service import OpenAIService
+from app.services.upload_storage import UploadStorage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BlobReference:
+    """Conteúdo referenciado por um novo documento."""
+    sha256: str
+    file_path: str
+    file_size: int
+    deduplicated: bool  # o conteúdo já existia
+
+
+def analysis_fingerprint() -> str:
+    """
+    Modelos e versões dos prompts executados na análise de documentos
+    (OpenAI sobre o texto, Gemini sobre o PDF); invalida o cache ao mudar.
+    """
+    return "|".join([
+        f"openai:{settings.OPENAI_MODEL}:{OpenAIService.PROMPT_VERSIONS['analyze_project']}",
+        f"gemini:{settings.GEMINI_MODEL}:{GeminiService.PROMPT_VERSIONS['analyze_pdf']}",
+    ])
+
+
+class BlobStore:
+    """Arquivos endereçados por SHA-256 com contagem de referências"""
+
+    @staticmethod
+    def blob_path(sha256: str, extension: str) -> Path:
+        return Path(settings.UPLOAD_PATH) / "blobs" / sha256[:2] / sha256[2:4] / f"{sha256}.{extension}"
+
+    @staticmethod
+    async def store(
+        db: AsyncSession,
+        file: UploadFile,
+        extension: str,
+        mime_type: Optional[str] = None,
+    ) -> BlobReference:
+        """
+        Grava o upload (em blocos, calculando o hash) e adiciona uma
+        referência ao conteúdo. A linha do blob fica travada até o commit do
+        chamador, o que serializa com a remoção do último documento.
+        """
+        spooled = await UploadStorage.spool(file)
+        path = BlobStore.blob_path(spooled.sha256, extension)
+
+        try:
+            statement = (
+                insert(DocumentBlob)
+                .values(
+                    sha256=spooled.sha256,
+                    file_path=str(path),
+                    file_size=spooled.size,
+                    mime_type=mime_type,
+                    ref_count=1,
+                )
+                .on_conflict_do_update(
+                    index_elements=[DocumentBlob.sha256],
+                    set_={"ref_count": DocumentBlob.ref_count + 1},
+                )
+                .returning(DocumentBlob.ref_count, DocumentBlob.file_path)
+            )
+            ref_count, file_path = (await db.execute(statement)).one()
+        except BaseException:
+            spooled.temp_path.unlink(missing_ok=True)
+            raise
+
+        deduplicated = ref_count > 1
+        if deduplicated and await asyncio.to_thread(os.path.exists, file_path):
+            spooled.temp_path.unlink(missing_ok=True)
+            logger.info(f"♻️ Conteúdo já armazenado: {spooled.sha256[:12]} ({ref_count} referências)")
+        else:
+            await UploadStorage.move(spooled, Path(file_path))
+
+        return BlobReference(
+            sha256=spooled.sha256,
+            file_path=file_path,
+            file_size=spooled.size,
+            deduplicated=deduplicated,
+        )
+
+    @staticmethod
+    async def collect(db: AsyncSession, sha256s: Optional[Iterable[str]] = None) -> int:
+        """
+        Apaga linha e arquivo dos conteúdos sem referências. Chamar depois de
+        remover (e dar flush) nos documentos, antes do commit; sem `sha256s`,
+        varre todos os órfãos (ex.: usuários removidos direto no banco).
+        """
+        statement = delete(DocumentBlob).where(DocumentBlob.ref_count <= 0)
+        if sha256s is not None:
+            hashes = [sha256 for sha256 in set(sha256s) if sha256]
+            if not hashes:
+                return 0
+            statement = statement.where(DocumentBlob.sha256.in_(hashes))
+
+        rows = (await db.execute(
+            statement.returning(DocumentBlob.sha256, DocumentBlob.file_path)
+        )).all()
+        # Ainda com as linhas travadas: um upload concorrente do mesmo conteúdo
+        # espera o commit e recria o arquivo
+        for row in rows:
+            await asyncio.to_thread(Path(row.file_path).unlink, missing_ok=True)
+            logger.info(f"🗑️ Conteúdo sem referências removido: {row.sha256[:12]}")
+        return len(rows)
+
+    @staticmethod
+    async def owned_by(
+        db: AsyncSession,
+        sha256: str,
+        user_id: UUID,
+        exclude_document_id: Optional[UUID] = None,
+    ) -> bool:
+        """Se o usuário já tem (outro) documento com este conteúdo."""
+        condition = exists().where(Document.content_hash == sha256, Document.user_id == user_id)
+        if exclude_document_id is not None:
+            condition = condition.where(Document.id != exclude_document_id)
+        return bool((await db.execute(select(condition))).scalar())
+
+    @staticmethod
+    def cached_analysis(blob: Optional[DocumentBlob], user_id: UUID) -> Optional[Dict[str, Any]]:
+        """
+        Resultado de run_combined em cache, se feito pelo mesmo usuário com os
+        modelos e prompts atuais.
+        """
+        if blob is None or not blob.analysis:
+            return None
+        if blob.analysis.get("owner") != str(user_id):
+            return None
+        if blob.analysis.get("fingerprint") != analysis_fingerprint():
+            return None
+        return blob.analysis.get("combined")
+
+    @staticmethod
+    def remember_analysis(blob: DocumentBlob, combined: Dict[str, Any], user_id: UUID) -> None:
+        """Guarda a análise completa (resultados parciais não entram no cache)."""
+        if combined.get("partial"):
+            return
+        blob.analysis = {
+            "fingerprint": analysis_fingerprint(),
+            "owner": str(user_id),
+            "combined": combined,
+        }
@@ -0,0 +1,545 @@
+"""
+Motor de Orçamento (Anexo VI)
+Carrega os itens do orçamento em colunas NumPy e valida/agrega a tabela
+inteira com operações vetorizadas: totais por item e geral, valores
+negativos ou inválidos, limites por categoria, valores atípicos e itens
+repetidos. Aceita o JSONB do Anexo VI e as tabelas do PDFProcessor
+"""
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from itertools import count, repeat
+import logging
+import re
+import time
+import unicodedata
+
+import numpy as np
+
+from app.config import settings
+from app.utils.validators import MAX_BUDGET_ITEM_VALUE
+
+logger = logging.getLogger(__name__)
+
+# Itens citados por pendência (o restante aparece como "+N")
+MAX_LISTED_ROWS = 5
+
+# Mínimo de itens com valor para a detecção de atípicos fazer sentido
+OUTLIER_MIN_ROWS = 10
+
+# Sem vírgula, pontos em grupos de 3 dígitos são separadores de milhar ("1.500")
+THOUSANDS_ONLY = re.compile(r"-?\d{1,3}(?:\.\d{3})+")
+
+# Chaves aceitas nos itens do Anexo VI (a tabela do frontend usa as primeiras)
+ITEM_KEYS = {
+    "name": ("item", "name", "descricao"),
+    "category": ("category", "categoria", "natureza"),
+    "quantity": ("quantity", "quantidade"),
+    "unit_value": ("unitValue", "unit_value", "valor_unitario"),
+    "total": ("total", "valor_total"),
+}
+
+# Palavras-chave do cabeçalho das tabelas extraídas de PDF, por coluna
+HEADER_KEYWORDS = {
+    "quantity": ("qtd", "quant"),
+    "unit_value": ("unit",),
+    "total": ("total",),
+    "category": ("categoria", "natureza", "elemento"),
+    "description": ("descri", "especifica"),
+    "name": ("item",),
+}
+
+
+def normalize_label(text: Any) -> str:
+    """Minúsculas, sem acentos e sem espaços extras (para comparar rótulos)."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
+
+def format_brl(value: float) -> str:
+    return "R$ " + f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _parse_numbers(values: Sequence[Any]) -> np.ndarray:
+    """float64 de valores não textuais (None vira NaN; objetos inválidos também)."""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        result = np.full(len(values), np.nan)
+        for index, value in enumerate(values):
+            try:
+                result[index] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return result
+
+
+def _parse_texts(values: np.ndarray) -> np.ndarray:
+    """float64 de textos no formato brasileiro ("R$ 1.234,56", "1.500", "2.5")."""
+    text = np.char.strip(np.char.replace(values.astype(str), "R$", ""))
+    decimal_comma = np.char.find(text, ",") >= 0
+    thousands_only = ~decimal_comma & np.frompyfunc(
+        lambda value: THOUSANDS_ONLY.fullmatch(value) is not None, 1, 1
+    )(text).astype(bool)
+    without_dots = np.char.replace(text, ".", "")
+    text = np.where(
+        decimal_comma,
+        np.char.replace(without_dots, ",", "."),
+        np.where(thousands_only, without_dots, text),
+    )
+    text = np.where(np.isin(text, ("", "None")), "nan", text)
+    try:
+        return text.astype(np.float64)
+    except ValueError:
+        # Há textos não numéricos: converte item a item só neste caso
+        result = np.full(len(text), np.nan)
+        for index, value in enumerate(text):
+            try:
+                result[index] = float(value)
+            except ValueError:
+                pass
+        return result
+
+
+def to_float_array(values: Sequence[Any]) -> np.ndarray:
+    """
+    Converte uma coluna em float64; aceita números e textos como
+    "R$ 1.234,56", "R$ 1.500" e "1.234.567" (pontos em grupos de milhar sem
+    vírgula são separadores). Só os textos passam pelo parser; números
+    mantêm o valor. Valores ausentes ou inválidos viram NaN.
+
+    >>> to_float_array(["R$ 1.234,56", "R$ 1.500", "1.234.567", "2.5", "abc"]).tolist()
+    [1234.56, 1500.0, 1234567.0, 2.5, nan]
+    >>> to_float_array(["1.500", "2.000"]).tolist()
+    [1500.0, 2000.0]
+    >>> to_float_array([1.234, "1.234", None]).tolist()
+    [1.234, 1234.0, nan]
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+        return values.astype(np.float64)
+
+    if not any(issubclass(kind, str) for kind in set(map(type, values))):
+        # Caminho rápido: coluna sem textos (None vira NaN)
+        return _parse_numbers(values)
+
+    objects = np.empty(len(values), dtype=object)
+    objects[:] = list(values)
+    is_text = np.frompyfunc(lambda value: isinstance(value, str), 1, 1)(objects).astype(bool)
+    result = np.empty(len(objects))
+    result[is_text] = _parse_texts(objects[is_text])
+    result[~is_text] = _parse_numbers(objects[~is_text])
+    return result
+
+
+def _column(items: Sequence[Dict[str, Any]], keys: Sequence[str]) -> List[Any]:
+    """Valores de uma coluna pela primeira chave; as alternativas só completam ausentes."""
+    values = list(map(dict.get, items, repeat(keys[0])))
+    if len(keys) > 1 and (None in values or "" in values):
+        for index in [index for index, value in enumerate(values) if value is None or value == ""]:
+            item = items[index]
+            values[index] = next((item[key] for key in keys[1:] if item.get(key) not in (None, "")), None)
+    return values
+
+
+def factorize(
+    values: Sequence[Any],
+    normalize: Optional[Callable[[Any], str]] = None,
+) -> Tuple[np.ndarray, List[Any]]:
+    """
+    Código inteiro por valor distinto (como pandas.factorize). Com
+    `normalize`, valores de mesma forma normalizada compartilham o código
+    (aplicado só aos distintos). Retorna (códigos, chaves).
+    """
+    try:
+        distinct: Dict[Any, int] = dict(zip(dict.fromkeys(values), count()))
+    except TypeError:
+        # Valores não hashable (listas/objetos no JSONB): compara pelo texto
+        return factorize([str(value) for value in values], normalize)
+
+    keys: List[Any] = list(distinct)
+    if normalize is not None:
+        normalized: Dict[str, int] = {}
+        for value in keys:
+            distinct[value] = normalized.setdefault(normalize(value), len(normalized))
+        keys = list(normalized)
+    codes = np.fromiter(map(distinct.__getitem__, values), dtype=np.int64, count=len(values))
+    return codes, keys
+
+
+@dataclass
+class BudgetTable:
+    """
+    Itens do orçamento em colunas (uma posição por item). Nomes e categorias
+    viram códigos inteiros, para as regras operarem só sobre arrays numéricos.
+    """
+    names: List[Any]
+    name_codes: np.ndarray
+    name_keys: List[Any]
+    category_codes: np.ndarray
+    category_keys: List[str]
+    quantity: np.ndarray
+    unit_value: np.ndarray
+    declared_total: np.ndarray
+    declared_grand_total: Optional[float] = None
+    # Itens descartados na carga (não são objetos)
+    malformed_rows: int = 0
+    # Número de cada linha na origem, quando difere da posição
+    row_numbers: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.quantity)
+
+    @classmethod
+    def from_columns(
+        cls,
+        names: List[Any],
+        categories: Sequence[Any],
+        quantity: Sequence[Any],
+        unit_value: Sequence[Any],
+        total: Sequence[Any],
+        declared_grand_total: Any = None,
+        malformed_rows: int = 0,
+        row_numbers: Optional[np.ndarray] = None,
+    ) -> "BudgetTable":
+        # Nomes comparados como digitados; categorias sem acento/caixa
+        name_codes, name_keys = factorize(names)
+        category_codes, category_keys = factorize(categories, normalize_label)
+        grand_total = to_float_array([declared_grand_total])[0]
+        return cls(
+            names=names,
+            name_codes=name_codes,
+            name_keys=name_keys,
+            category_codes=category_codes,
+            category_keys=category_keys,
+            quantity=to_float_array(quantity),
+            unit_value=to_float_array(unit_value),
+            declared_total=to_float_array(total),
+            declared_grand_total=None if np.isnan(grand_total) else float(grand_total),
+            malformed_rows=malformed_rows,
+            row_numbers=row_numbers,
+        )
+
+    @cached_property
+    def unnamed(self) -> np.ndarray:
+        """Máscara dos itens sem nome."""
+        empty = [self.name_keys.index(key) for key in (None, "") if key in self.name_keys]
+        return np.isin(self.name_codes, empty)
+
+    @classmethod
+    def from_annex(cls, annex: Dict[str, Any]) -> "BudgetTable":
+        """Tabela a partir do JSONB do Anexo VI ({"items": [...], "total": ...})."""
+        raw_items = annex.get("items") or []
+        items = raw_items
+        row_numbers = None
+        if set(map(type, raw_items)) - {dict}:
+            kept = [index for index, item in enumerate(raw_items) if isinstance(item, dict)]
+            items = [raw_items[index] for index in kept]
+            row_numbers = np.asarray(kept, dtype=np.int64) + 1
+        return cls.from_columns(
+            names=_column(items, ITEM_KEYS["name"]),
+            categories=_column(items, ITEM_KEYS["category"]),
+            quantity=_column(items, ITEM_KEYS["quantity"]),
+            unit_value=_column(items, ITEM_KEYS["unit_value"]),
+            total=_column(items, ITEM_KEYS["total"]),
+            declared_grand_total=next(
+                (annex[key] for key in ITEM_KEYS["total"] if annex.get(key) not in (None, "")), None
+            ),
+            malformed_rows=len(raw_items) - len(items),
+            row_numbers=row_numbers,
+        )
+
+    @classmethod
+    def from_pdf_tables(cls, tables: Sequence[Dict[str, Any]]) -> Optional["BudgetTable"]:
+        """
+        Tabela a partir de PDFProcessor.extract_tables_from_pdf: usa as tabelas
+        cujo cabeçalho tem quantidade e valor unitário; linhas "Total" viram o
+        total declarado. None se nenhuma tabela parecer um orçamento.
+        """
+        columns: Dict[str, List[Any]] = {name: [] for name in ITEM_KEYS}
+        grand_totals: List[Any] = []
+        for table in tables:
+            rows = [row for row in table.get("data") or [] if row and any(row)]
+            if len(rows) < 2:
+                continue
+            mapping = _map_header(rows[0])
+            if "quantity" not in mapping or "unit_value" not in mapping:
+                continue
+
+            # A descrição identifica melhor o item que a coluna "Item" (numeração)
+            mapping["name"] = mapping.get("description", mapping.get("name"))
+            body = []
+            for row in rows[1:]:
+                first = normalize_label(next((cell for cell in row if cell), ""))
+                if first.startswith("total"):
+                    index = mapping.get("total")
+                    if index is not None and index < len(row):
+                        grand_totals.append(row[index])
+                else:
+                    body.append(row)
+
+            for name in ITEM_KEYS:
+                index = mapping.get(name)
+                columns[name].extend(
+                    row[index] if index is not None and index < len(row) else None for row in body
+                )
+
+        if not columns["quantity"]:
+            return None
+        return cls.from_columns(
+            names=columns["name"],
+            categories=columns["category"],
+            quantity=columns["quantity"],
+            unit_value=columns["unit_value"],
+            total=columns["total"],
+            declared_grand_total=(
+                float(to_float_array(grand_totals).sum()) if grand_totals else None
+            ),
+        )
+
+    def labels(self, rows: np.ndarray) -> List[str]:
+        """Rótulos legíveis ("Item 3 (Cadeira)") das posições informadas."""
+        labels = []
+        for row in rows.tolist():
+            number = row + 1 if self.row_numbers is None else int(self.row_numbers[row])
+            name = "" if self.names[row] is None else str(self.names[row]).strip()
+            labels.append(f"Item {number} ({name})" if name else f"Item {number}")
+        return labels
+
+
+def _map_header(header: Sequence[Any]) -> Dict[str, int]:
+    """Índice de cada coluna conhecida no cabeçalho de uma tabela de PDF."""
+    mapping: Dict[str, int] = {}
+    for index, cell in enumerate(header):
+        label = normalize_label(cell)
+        if not label:
+            continue
+        for name, keywords in HEADER_KEYWORDS.items():
+            if name not in mapping and any(keyword in label for keyword in keywords):
+                mapping[name] = index
+                break
+    return mapping
+
+
+@dataclass
+class BudgetValidation:
+    """Resultado da validação vetorizada de um orçamento."""
+    rows: int = 0
+    checks: int = 0
+    total: float = 0.0
+    by_category: Dict[str, float] = field(default_factory=dict)
+    # Pendências no formato de ComplianceFinding (section, issue, severity, solution, question)
+    issues: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed_us: int = 0
+
+    def add(
+        self,
+        passed: bool,
+        issue: str,
+        severity: str,
+        solution: str,
+        question: Optional[str] = None,
+    ) -> bool:
+        self.checks += 1
+        if not passed:
+            self.issues.append({
+                "section": "annex_6",
+                "issue": issue,
+                "severity": severity,
+                "solution": solution,
+                "question": question,
+            })
+        return passed
+
+    def add_rows(
+        self,
+        table: BudgetTable,
+        failed: np.ndarray,
+        issue: str,
+        severity: str,
+        solution: str,
+        question: Optional[str] = None,
+    ) -> None:
+        """Uma pendência por regra, citando os primeiros itens que falharam."""
+        count = int(np.count_nonzero(failed))
+        listed = ""
+        if count:
+            labels = table.labels(np.flatnonzero(failed)[:MAX_LISTED_ROWS])
+            listed = ", ".join(labels) + (f" (+{count - len(labels)})" if count > len(labels) else "")
+        self.add(
+            count == 0,
+            f"{count} item(ns) {issue}: {listed}",
+            severity,
+            solution,
+            question.format(items=listed) if question else None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "total": self.total,
+            "by_category": self.by_category,
+            "checks": self.checks,
+            "issues": self.issues,
+            "elapsed_us": self.elapsed_us,
+        }
+
+
+class BudgetEngine:
+    """Validação e agregação vetorizadas do orçamento."""
+
+    @staticmethod
+    def validate(table: BudgetTable) -> BudgetValidation:
+        """Avalia todas as regras do orçamento sobre a tabela inteira."""
+        started = time.perf_counter()
+        result = BudgetValidation(rows=len(table))
+        tolerance = settings.COMPLIANCE_BUDGET_TOLERANCE
+
+        result.add(
+            table.malformed_rows == 0,
+            f"{table.malformed_rows} item(ns) do orçamento em formato inválido",
+            "critical",
+            "Remova e cadastre esses itens novamente.",
+        )
+
+        quantity, unit_value = table.quantity, table.unit_value
+        # Comparações com NaN são falsas: valores ausentes também falham
+        bad_quantity = ~(quantity > 0)
+        bad_value = ~(unit_value >= 0)
+        result.add_rows(
+            table, bad_quantity, "com quantidade inválida", "critical",
+            "Informe quantidades numéricas maiores que zero.",
+        )
+        result.add_rows(
+            table, bad_value, "com valor unitário negativo ou inválido", "critical",
+            "Informe valores unitários numéricos e não negativos.",
+        )
+        result.add_rows(
+            table, table.unnamed, "sem nome", "medium",
+            "Identifique cada item de despesa.",
+        )
+
+        valid = ~(bad_quantity | bad_value)
+        totals = np.where(valid, np.round(quantity * unit_value, 2), 0.0)
+
+        declared = table.declared_total
+        mismatch = valid & ~np.isnan(declared) & (np.abs(declared - totals) > tolerance)
+        result.add_rows(
+            table, mismatch, "com total diferente de quantidade × valor unitário", "critical",
+            "Recalcule o total desses itens.",
+        )
+
+        result.add_rows(
+            table, totals > MAX_BUDGET_ITEM_VALUE,
+            f"acima de {format_brl(MAX_BUDGET_ITEM_VALUE)}", "high",
+            "Justifique os valores ou divida os itens em despesas menores.",
+            "Avalie se o projeto justifica os itens de valor muito alto: {items}.",
+        )
+
+        result.total = round(float(totals.sum()), 2)
+        if table.declared_grand_total is not None:
+            result.add(
+                abs(table.declared_grand_total - result.total) <= tolerance,
+                (
+                    f"Total do orçamento {format_brl(table.declared_grand_total)} difere "
+                    f"da soma dos itens ({format_brl(result.total)})"
+                ),
+                "critical",
+                "Atualize o total do Anexo VI com a soma dos itens.",
+            )
+
+        BudgetEngine._check_categories(table, totals, valid, result)
+        BudgetEngine._check_outliers(table, totals, valid, result)
+        BudgetEngine._check_duplicates(table, valid, result)
+
+        result.elapsed_us = int((time.perf_counter() - started) * 1_000_000)
+        logger.debug(
+            "💰 Orçamento validado: %s itens, %s regras, %s pendências em %sµs",
+            result.rows, result.checks, len(result.issues), result.elapsed_us,
+        )
+        return result
+
+    @staticmethod
+    def _check_categories(
+        table: BudgetTable,
+        totals: np.ndarray,
+        valid: np.ndarray,
+        result: BudgetValidation,
+    ) -> None:
+        """Soma por categoria e participação máxima de cada uma no total."""
+        if not valid.any():
+            return
+        codes = table.category_codes[valid]
+        counts = np.bincount(codes, minlength=len(table.category_keys))
+        sums = np.bincount(codes, weights=totals[valid], minlength=len(table.category_keys))
+        result.by_category = {
+            (category or "sem categoria"): round(amount, 2)
+            for category, count, amount in zip(table.category_keys, counts.tolist(), sums.tolist())
+            if count
+        }
+
+        if result.total <= 0:
+            return
+        for category, cap in settings.BUDGET_CATEGORY_CAPS.items():
+            amount = result.by_category.get(normalize_label(category), 0.0)
+            share = amount / result.total
+            result.add(
+                share <= cap,
+                (
+                    f"Categoria \"{category}\" soma {format_brl(amount)} "
+                    f"({share:.1%} do total; limite {cap:.0%})"
+                ),
+                "high",
+                f"Reduza as despesas de \"{category}\" para até {cap:.0%} do orçamento.",
+            )
+
+    @staticmethod
+    def _check_outliers(
+        table: BudgetTable,
+        totals: np.ndarray,
+        valid: np.ndarray,
+        result: BudgetValidation,
+    ) -> None:
+        """
+        Valores atípicos pelo z-score robusto (mediana e MAD) do log dos
+        totais; só o lado alto, que é o que pede justificativa.
+        """
+        positive = valid & (totals > 0)
+        if np.count_nonzero(positive) < OUTLIER_MIN_ROWS:
+            return
+        logs = np.log10(totals[positive])
+        median = np.median(logs)
+        mad = np.median(np.abs(logs - median))
+        if mad == 0:
+            return
+        outliers = np.zeros(len(table), dtype=bool)
+        outliers[positive] = 0.6745 * (logs - median) / mad > settings.BUDGET_OUTLIER_ZSCORE
+        result.add_rows(
+            table, outliers, "com valor muito acima dos demais", "medium",
+            "Confira esses valores ou detalhe sua composição.",
+            "Avalie se os valores atípicos do orçamento estão justificados: {items}.",
+        )
+
+    @staticmethod
+    def _check_duplicates(table: BudgetTable, valid: np.ndarray, result: BudgetValidation) -> None:
+        """Itens com mesmo nome e mesmo valor unitário (possível despesa em dobro)."""
+        rows = np.flatnonzero(valid & ~table.unnamed)
+        # Só nomes que aparecem mais de uma vez precisam ser ordenados
+        if len(rows):
+            repeated_names = np.bincount(table.name_codes[rows])[table.name_codes[rows]] > 1
+            rows = rows[repeated_names]
+        duplicated = np.zeros(len(table), dtype=bool)
+        if len(rows) > 1:
+            names = table.name_codes[rows]
+            values = table.unit_value[rows]
+            order = np.lexsort((values, names))
+            names, values = names[order], values[order]
+            same = (names[1:] == names[:-1]) & (values[1:] == values[:-1])
+            repeated = np.zeros(len(rows), dtype=bool)
+            repeated[1:] |= same
+            repeated[:-1] |= same
+            duplicated[rows[order[repeated]]] = True
+        result.add_rows(
+            table, duplicated, "repetidos com o mesmo valor unitário", "medium",
+            "Confirme se não há despesa duplicada ou agrupe os itens.",
+        )
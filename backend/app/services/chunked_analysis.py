@@ -0,0 +1,326 @@
+"""
+Análise Map-Reduce de Projetos Longos
+Divide o texto em trechos nas fronteiras de seção/anexo, analisa os trechos em
+paralelo (com limite de concorrência) e funde os resultados no formato original.
+O texto pode vir inteiro ou em partes (páginas de um PDF em streaming)
+"""
+
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import json
+import logging
+import re
+
+from app.config import settings
+from app.services.tokenizer import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Linhas que iniciam uma nova seção: anexos, marcadores de página do
+# PDFProcessor, títulos numerados ("3.2 Justificativa") e títulos markdown
+SECTION_BOUNDARY = re.compile(
+    r"^\s*(?:"
+    r"ANEXO\s+[IVXLC\d]+\b"
+    r"|--- PÁGINA \d+ ---"
+    r"|\d{1,2}(?:\.\d{1,2})*\.?\s+[A-ZÁÉÍÓÚÂÊÔÃÕÇ][^\n]{2,80}$"
+    r"|#{1,4}\s+\S"
+    r")",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Tokens reservados para o cabeçalho "[Trecho i de N — título]" de cada trecho
+CHUNK_LABEL_TOKENS = 48
+
+
+@dataclass
+class TextChunk:
+    """Trecho contíguo do texto do projeto."""
+    index: int
+    title: str
+    text: str
+
+    def labeled(self, total: Optional[int] = None) -> str:
+        """Texto com cabeçalho de contexto para o modelo (total omitido se desconhecido)."""
+        position = f"{self.index + 1} de {total}" if total else f"{self.index + 1}"
+        return f"[Trecho {position} — {self.title}]\n{self.text}"
+
+
+def _split_blocks(text: str) -> List[str]:
+    """Quebra o texto nas fronteiras de seção, preservando o conteúdo."""
+    starts = [match.start() for match in SECTION_BOUNDARY.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    bounds = starts + [len(text)]
+    return [text[a:b] for a, b in zip(bounds, bounds[1:]) if text[a:b].strip()]
+
+
+@dataclass(frozen=True)
+class ChunkLimit:
+    """Tamanho máximo de um trecho, em caracteres ou em tokens."""
+    size: int
+    tokens: bool = False
+
+    def measure(self, text: str) -> int:
+        return count_tokens(text) if self.tokens else len(text)
+
+    def head(self, text: str) -> str:
+        """Maior prefixo de `text` dentro do limite (ao menos um caractere)."""
+        head = truncate_tokens(text, self.size) if self.tokens else text[:self.size]
+        return text[:len(head)] or text[:1]
+
+
+def _split_oversized(block: str, limit: ChunkLimit) -> List[Tuple[str, int]]:
+    """
+    Divide um bloco maior que o limite por parágrafos e, se preciso, por
+    tamanho. Cada parágrafo é medido uma vez; devolve (texto, tamanho).
+    """
+    pieces: List[Tuple[str, int]] = []
+    current, current_size = "", 0
+    for paragraph in re.split(r"(\n\s*\n)", block):
+        size = limit.measure(paragraph)
+        if current_size + size <= limit.size:
+            current += paragraph
+            current_size += size
+            continue
+        if current.strip():
+            pieces.append((current, current_size))
+        if size > limit.size:
+            # Desconta cada corte do total em vez de medir o restante de novo
+            while size > limit.size:
+                head = limit.head(paragraph)
+                head_size = limit.measure(head)
+                pieces.append((head, head_size))
+                paragraph = paragraph[len(head):]
+                size -= head_size
+            size = limit.measure(paragraph)
+        current, current_size = paragraph, size
+    if current.strip():
+        pieces.append((current, current_size))
+    return pieces
+
+
+def _block_title(block: str) -> str:
+    first_line = block.strip().splitlines()[0].strip() if block.strip() else ""
+    return first_line[:80] or "Projeto"
+
+
+class _ChunkPacker:
+    """
+    Agrupa blocos de seção em trechos até o limite, com o total corrente de
+    cada trecho (soma dos pedaços: em tokens, fica um pouco acima do real,
+    o lado seguro para o orçamento).
+    """
+
+    def __init__(self, limit: ChunkLimit):
+        self.limit = limit
+        self.index = 0
+        self.title = ""
+        self.text = ""
+        self.size = 0
+
+    def add(self, block: str) -> List[TextChunk]:
+        """Acrescenta um bloco e devolve os trechos que ficaram completos."""
+        sealed: List[TextChunk] = []
+        for piece, size in _split_oversized(block, self.limit):
+            if self.text and self.size + size > self.limit.size:
+                sealed.extend(self.finish())
+            if not self.text:
+                self.title = _block_title(piece)
+            self.text += piece
+            self.size += size
+        return sealed
+
+    def finish(self) -> List[TextChunk]:
+        """Fecha o trecho em andamento."""
+        sealed = []
+        if self.text.strip():
+            sealed.append(TextChunk(index=self.index, title=self.title, text=self.text.strip()))
+            self.index += 1
+        self.title, self.text, self.size = "", "", 0
+        return sealed
+
+
+def split_into_chunks(text: str, limit: Union[int, ChunkLimit]) -> List[TextChunk]:
+    """
+    Agrupa blocos de seção em trechos de até `limit` (caracteres, se for um
+    inteiro). Seções pequenas vizinhas são agrupadas; seções grandes são
+    subdivididas.
+    """
+    packer = _ChunkPacker(limit if isinstance(limit, ChunkLimit) else ChunkLimit(limit))
+    chunks: List[TextChunk] = []
+    for block in _split_blocks(text):
+        chunks.extend(packer.add(block))
+    chunks.extend(packer.finish())
+    return chunks
+
+
+def _dedupe(items: List[Any]) -> List[Any]:
+    seen = set()
+    unique = []
+    for item in items:
+        marker = json.dumps(item, sort_keys=True, ensure_ascii=False, default=str)
+        if marker not in seen:
+            seen.add(marker)
+            unique.append(item)
+    return unique
+
+
+def merge_analyses(weighted_results: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Funde análises de trechos em uma única análise no mesmo formato:
+    score médio ponderado pelo tamanho do trecho, listas concatenadas sem
+    duplicatas, textos unidos e objetos (ex.: compliance) mesclados.
+    """
+    if len(weighted_results) == 1:
+        return dict(weighted_results[0][1])
+
+    merged: Dict[str, Any] = {}
+    total_weight = sum(weight for weight, _ in weighted_results) or 1
+    weighted_score = 0.0
+    cache_hits = 0
+
+    for weight, result in weighted_results:
+        try:
+            weighted_score += float(result.get("score", 0) or 0) * weight
+        except (TypeError, ValueError):
+            pass
+        if (result.get("cache") or {}).get("status") == "hit":
+            cache_hits += 1
+
+        for key, value in result.items():
+            if key in ("score", "cache", "partial"):
+                continue
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif isinstance(value, dict):
+                target = merged.setdefault(key, {})
+                if isinstance(target, dict):
+                    for sub_key, sub_value in value.items():
+                        target.setdefault(sub_key, sub_value)
+            elif isinstance(value, str):
+                if value.strip():
+                    previous = merged.get(key)
+                    merged[key] = f"{previous}\n\n{value}" if previous else value
+            elif key not in merged:
+                merged[key] = value
+
+    for key, value in merged.items():
+        if isinstance(value, list):
+            merged[key] = _dedupe(value)
+
+    merged["score"] = int(round(weighted_score / total_weight))
+    merged["chunks"] = len(weighted_results)
+    if any(result.get("partial") for _, result in weighted_results):
+        merged["partial"] = True
+    merged["cache"] = {
+        "status": "hit" if cache_hits == len(weighted_results) else ("partial" if cache_hits else "miss"),
+        "hits": cache_hits,
+        "chunks": len(weighted_results),
+    }
+    return merged
+
+
+def _merge_outcomes(chunks: List[TextChunk], outcomes: List[Any]) -> Dict[str, Any]:
+    """Funde os resultados dos trechos, marcando como parcial se algum falhou."""
+    weighted: List[Tuple[int, Dict[str, Any]]] = []
+    failures: List[BaseException] = []
+    failed_chunks: List[Dict[str, Any]] = []
+    for chunk, outcome in zip(chunks, outcomes):
+        if isinstance(outcome, BaseException):
+            failures.append(outcome)
+            failed_chunks.append({
+                "index": chunk.index + 1,
+                "title": chunk.title,
+                "error": str(outcome) or outcome.__class__.__name__,
+            })
+            logger.warning("⚠️ Trecho %s (%s) falhou: %s", chunk.index + 1, chunk.title, outcome)
+        else:
+            weighted.append((len(chunk.text), outcome))
+
+    if not weighted:
+        raise failures[0]
+
+    merged = merge_analyses(weighted)
+    merged["chunks"] = len(chunks)
+    if failed_chunks:
+        # Trechos sem análise não entram na fusão: o resultado cobre só parte do texto
+        merged["partial"] = True
+        merged["failed_chunks"] = failed_chunks
+    return merged
+
+
+async def analyze_in_chunks(
+    text: str,
+    analyze: Callable[[str], Awaitable[Dict[str, Any]]],
+    max_tokens: int,
+    concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Map-reduce: analisa cada trecho com `analyze` (no máximo `concurrency`
+    simultâneos) e funde os resultados. `max_tokens` é o orçamento do
+    conteúdo no prompt: textos dentro dele vão direto para `analyze`, sem
+    alteração; os demais viram trechos que cabem nele já com o cabeçalho.
+    """
+    if count_tokens(text) <= max_tokens:
+        return await analyze(text)
+
+    chunks = split_into_chunks(text, ChunkLimit(max(1, max_tokens - CHUNK_LABEL_TOKENS), tokens=True))
+    semaphore = asyncio.Semaphore(concurrency or settings.ANALYSIS_CHUNK_CONCURRENCY)
+    logger.info("🧩 Análise em %s trechos (%s caracteres)", len(chunks), len(text))
+
+    async def run(chunk: TextChunk) -> Dict[str, Any]:
+        async with semaphore:
+            return await analyze(chunk.labeled(len(chunks)))
+
+    outcomes = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+    return _merge_outcomes(chunks, outcomes)
+
+
+async def analyze_stream(
+    parts: AsyncIterator[str],
+    analyze: Callable[[str], Awaitable[Dict[str, Any]]],
+    max_tokens: int,
+    concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Como analyze_in_chunks, para texto que chega em partes (ex.: páginas de um
+    PDF): cada trecho vai para `analyze` assim que fecha, enquanto as partes
+    seguintes ainda são lidas. Se tudo couber em um trecho, ele vai sem
+    cabeçalho, como em analyze_in_chunks.
+    """
+    packer = _ChunkPacker(ChunkLimit(max(1, max_tokens - CHUNK_LABEL_TOKENS), tokens=True))
+    semaphore = asyncio.Semaphore(concurrency or settings.ANALYSIS_CHUNK_CONCURRENCY)
+    chunks: List[TextChunk] = []
+    tasks: List[asyncio.Future] = []
+
+    async def run(chunk: TextChunk) -> Dict[str, Any]:
+        async with semaphore:
+            return await analyze(chunk.labeled())
+
+    def dispatch(sealed: List[TextChunk]) -> None:
+        for chunk in sealed:
+            chunks.append(chunk)
+            tasks.append(asyncio.ensure_future(run(chunk)))
+
+    try:
+        async for part in parts:
+            for block in _split_blocks(part):
+                dispatch(packer.add(block))
+
+        last = packer.finish()
+        if not chunks:
+            if not last:
+                raise ValueError("Nenhum texto para analisar")
+            return await analyze(last[0].text)
+
+        dispatch(last)
+        logger.info("🧩 Análise em %s trechos (streaming)", len(chunks))
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    except BaseException:
+        # Leitura falhou ou chamador cancelou: descarta as análises em andamento
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return _merge_outcomes(chunks, outcomes)
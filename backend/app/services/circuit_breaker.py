@@ -0,0 +1,190 @@
+"""
+Circuit Breaker dos Provedores de IA
+Abre o circuito quando a taxa de erro na janela recente passa do limite, falha
+imediatamente enquanto aberto e testa o provedor (meio-aberto) após o intervalo
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, Type
+import asyncio
+import enum
+import logging
+import time
+
+from app.config import settings
+from app.services.rate_limiter import RateLimitTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(str, enum.Enum):
+    """Estado do circuito"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Provedor com circuito aberto: chamada recusada sem aguardar."""
+
+    def __init__(self, name: str, retry_in: float):
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"Circuito do provedor {name} aberto (nova tentativa em {round(retry_in, 1):g}s)")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por taxa de erro em janela deslizante de tempo.
+
+    CLOSED: chamadas passam; abre se houver ao menos `min_calls` na janela e a
+    fração de falhas for >= `failure_rate`.
+    OPEN: chamadas falham com CircuitOpenError até passar `open_seconds`.
+    HALF_OPEN: até `half_open_calls` chamadas de teste; sucesso fecha, falha reabre.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        min_calls: int,
+        window_seconds: float,
+        open_seconds: float,
+        half_open_calls: int = 1,
+        ignored_errors: Tuple[Type[BaseException], ...] = (),
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(1, half_open_calls)
+        self.ignored_errors = ignored_errors
+
+        self.state = CircuitState.CLOSED
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self._opened_at = 0.0
+        self._half_open_in_flight = 0
+
+    def _trim(self, now: float) -> None:
+        while self._calls and self._calls[0][0] < now - self.window_seconds:
+            self._calls.popleft()
+
+    def _transition(self, state: CircuitState) -> None:
+        if state == self.state:
+            return
+        logger.warning("🔌 Circuito %s: %s → %s", self.name, self.state.value, state.value)
+        self.state = state
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+        if state != CircuitState.HALF_OPEN:
+            self._half_open_in_flight = 0
+        if state == CircuitState.CLOSED:
+            self._calls.clear()
+
+    def allow(self) -> bool:
+        """Reserva uma chamada se o circuito permitir."""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_calls:
+                return False
+            self._half_open_in_flight += 1
+        return True
+
+    def _release(self) -> None:
+        if self.state == CircuitState.HALF_OPEN and self._half_open_in_flight > 0:
+            self._half_open_in_flight -= 1
+
+    def record_success(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+            return
+        now = time.monotonic()
+        self._calls.append((now, True))
+        self._trim(now)
+
+    def record_failure(self) -> None:
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            return
+        if self.state == CircuitState.OPEN:
+            return
+
+        now = time.monotonic()
+        self._calls.append((now, False))
+        self._trim(now)
+        failures = sum(1 for _, ok in self._calls if not ok)
+        if len(self._calls) >= self.min_calls and failures / len(self._calls) >= self.failure_rate:
+            self._transition(CircuitState.OPEN)
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Protege um bloco como `call` protege uma corrotina: útil quando a
+        chamada ao provedor continua depois de criada (respostas em streaming).
+        """
+        if not self.allow():
+            retry_in = max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+            raise CircuitOpenError(self.name, retry_in)
+
+        try:
+            yield
+        except self.ignored_errors:
+            self._release()
+            raise
+        except Exception:
+            self._release()
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelamento (ex.: timeout do fan-out) ou consumidor que abandonou
+            # o stream: contabilizado por quem interrompeu
+            self._release()
+            raise
+
+        self._release()
+        self.record_success()
+
+    async def call(self, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa `func` se o circuito permitir, registrando o resultado."""
+        async with self.guard():
+            return await func()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Estado atual (para /health)."""
+        now = time.monotonic()
+        self._trim(now)
+        failures = sum(1 for _, ok in self._calls if not ok)
+        retry_in: Optional[float] = None
+        if self.state == CircuitState.OPEN:
+            retry_in = round(max(0.0, self.open_seconds - (now - self._opened_at)), 1)
+        return {
+            "state": self.state.value,
+            "calls_in_window": len(self._calls),
+            "failures_in_window": failures,
+            "retry_in_seconds": retry_in,
+        }
+
+
+def _build_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+        min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+        window_seconds=settings.CIRCUIT_BREAKER_WINDOW_SECONDS,
+        open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+        half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+        # Espera na fila local do limitador não indica falha do provedor
+        ignored_errors=(RateLimitTimeoutError,),
+    )
+
+
+circuit_breakers: Dict[str, CircuitBreaker] = {
+    "openai": _build_breaker("openai"),
+    "gemini": _build_breaker("gemini"),
+}
@@ -0,0 +1,325 @@
+"""
+Pré-validação de Conformidade PRONAS/PCD
+Regras determinísticas sobre os campos do projeto e o JSONB dos anexos
+(campos obrigatórios, dígitos do CNPJ, orçamento do Anexo VI), executadas em
+microssegundos antes de qualquer chamada aos LLMs. Pendências bloqueantes
+geram um resultado local imediato; as demais viram perguntas em aberto
+anexadas às seções enviadas aos modelos
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+import logging
+import time
+
+from app.config import settings
+from app.models.ai_analysis import AIAnalysis, AIProvider, AnalysisType
+from app.models.project import Project
+from app.services.budget_engine import BudgetEngine, BudgetTable
+from app.services.incremental_analysis import PROJECT_SECTIONS, extract_sections, render_section_value
+from app.utils.validators import validate_cnpj, validate_project_title
+
+logger = logging.getLogger(__name__)
+
+SECTION_LABELS = dict(PROJECT_SECTIONS)
+
+# Mesmo vocabulário de CriticalIssue; apenas "critical" bloqueia a análise por IA
+SEVERITY_ORDER = {"critical": 0, "high": 1, "medium": 2}
+
+# Declarações padronizadas: basta estarem preenchidas, não vão para os LLMs
+DECLARATION_ANNEXES = ("annex_4", "annex_5")
+
+# Título do bloco de perguntas anexado às seções enviadas aos modelos
+OPEN_QUESTIONS_HEADER = "Pendências da verificação local"
+
+
+@dataclass
+class ComplianceFinding:
+    """Pendência encontrada por uma regra local."""
+    section: str
+    issue: str
+    severity: str  # critical, high, medium
+    solution: str
+    # Pergunta que exige julgamento e segue para o LLM (pendências não bloqueantes)
+    question: Optional[str] = None
+
+    def to_issue(self) -> Dict[str, str]:
+        """Formato de CriticalIssue usado nas análises."""
+        return {
+            "section": self.section,
+            "issue": self.issue,
+            "severity": self.severity,
+            "solution": self.solution,
+        }
+
+
+@dataclass
+class ComplianceReport:
+    """Resultado da pré-validação de um projeto."""
+    findings: List[ComplianceFinding] = field(default_factory=list)
+    checks: int = 0
+    budget_total: Optional[float] = None
+    budget_by_category: Dict[str, float] = field(default_factory=dict)
+    verified_sections: List[str] = field(default_factory=list)
+    elapsed_us: int = 0
+
+    def check(self, passed: bool, finding: ComplianceFinding) -> bool:
+        """Conta uma regra avaliada e registra a pendência se ela falhou."""
+        self.checks += 1
+        if not passed:
+            self.findings.append(finding)
+        return passed
+
+    @property
+    def blocking(self) -> bool:
+        return any(finding.severity == "critical" for finding in self.findings)
+
+    @property
+    def score(self) -> int:
+        """Percentual de regras atendidas (pendências médias contam meia falha)."""
+        if not self.checks:
+            return 100
+        failed = sum(0.5 if finding.severity == "medium" else 1 for finding in self.findings)
+        return max(0, int(round(100 * (self.checks - failed) / self.checks)))
+
+    def issues(self) -> List[Dict[str, str]]:
+        """Pendências da mais grave para a mais leve."""
+        ordered = sorted(self.findings, key=lambda finding: SEVERITY_ORDER.get(finding.severity, 3))
+        return [finding.to_issue() for finding in ordered]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "blocking": self.blocking,
+            "score": self.score,
+            "checks": self.checks,
+            "findings": [asdict(finding) for finding in self.findings],
+            "budget_total": self.budget_total,
+            "budget_by_category": self.budget_by_category,
+            "verified_sections": self.verified_sections,
+            "elapsed_us": self.elapsed_us,
+        }
+
+    def to_analysis(self) -> Dict[str, Any]:
+        """Resultado no formato de AnalysisResult, para projetos bloqueados."""
+        blocking = [finding for finding in self.findings if finding.severity == "critical"]
+        return {
+            "score": self.score,
+            "summary": (
+                f"A pré-validação encontrou {len(blocking)} pendência(s) obrigatória(s). "
+                "Corrija-as para liberar a análise por IA."
+            ),
+            "strengths": [],
+            "weaknesses": [finding.issue for finding in blocking],
+            "suggestions": [],
+            "critical_issues": self.issues(),
+            "compliance": self.to_dict(),
+            "source": "local_rules",
+        }
+
+
+def _annex_text(value: Any) -> str:
+    """Texto de um anexo: o campo `content` do editor ou o JSONB renderizado."""
+    if not value:
+        return ""
+    if isinstance(value, dict) and "content" in value:
+        return str(value.get("content") or "").strip()
+    return render_section_value(value).strip()
+
+
+def _content_text(project: Project) -> str:
+    content = project.content
+    if isinstance(content, dict):
+        return str(content.get("text") or "").strip()
+    return str(content or "").strip()
+
+
+class ComplianceEngine:
+    """Regras locais de conformidade PRONAS/PCD."""
+
+    @staticmethod
+    def check(project: Project) -> ComplianceReport:
+        """Avalia todas as regras do projeto (sem I/O)."""
+        started = time.perf_counter()
+        report = ComplianceReport()
+        ComplianceEngine._check_identification(project, report)
+        ComplianceEngine._check_annexes(project, report)
+        ComplianceEngine._check_budget(project.annex_6, report)
+        report.elapsed_us = int((time.perf_counter() - started) * 1_000_000)
+        logger.debug(
+            "🧾 Pré-validação do projeto %s: %s regras, %s pendências em %sµs",
+            project.id, report.checks, len(report.findings), report.elapsed_us,
+        )
+        return report
+
+    @staticmethod
+    def _check_identification(project: Project, report: ComplianceReport) -> None:
+        """Anexo I: os campos de identificação ficam nas colunas do projeto."""
+        title_ok, title_message = validate_project_title(project.title or "")
+        report.check(title_ok, ComplianceFinding(
+            section="annex_1",
+            issue=title_message,
+            severity="medium",
+            solution="Informe um título entre 5 e 500 caracteres.",
+        ))
+        report.check(bool((project.description or "").strip()), ComplianceFinding(
+            section="annex_1",
+            issue="Descrição do projeto não informada",
+            severity="medium",
+            solution="Descreva o projeto em poucas linhas na identificação.",
+        ))
+        report.check(bool((project.institution_name or "").strip()), ComplianceFinding(
+            section="annex_1",
+            issue="Instituição proponente não informada",
+            severity="critical",
+            solution="Informe a razão social da instituição proponente.",
+        ))
+        if report.check(bool((project.institution_cnpj or "").strip()), ComplianceFinding(
+            section="annex_1",
+            issue="CNPJ da instituição não informado",
+            severity="critical",
+            solution="Informe o CNPJ da instituição proponente.",
+        )):
+            cnpj_ok, cnpj_message = validate_cnpj(project.institution_cnpj)
+            report.check(cnpj_ok, ComplianceFinding(
+                section="annex_1",
+                issue=f"{cnpj_message}: {project.institution_cnpj}",
+                severity="critical",
+                solution="Confira o CNPJ no comprovante de inscrição da Receita Federal.",
+            ))
+
+    @staticmethod
+    def _check_annexes(project: Project, report: ComplianceReport) -> None:
+        """Anexos textuais obrigatórios e conteúdo mínimo para a análise."""
+        content = _content_text(project)
+        main_form = _annex_text(project.annex_3)
+
+        report.check(bool(content or main_form), ComplianceFinding(
+            section="content",
+            issue="Projeto sem conteúdo para análise",
+            severity="critical",
+            solution="Preencha o conteúdo do projeto ou o Anexo III (formulário principal).",
+        ))
+
+        if report.check(bool(main_form), ComplianceFinding(
+            section="annex_3",
+            issue=f"{SECTION_LABELS['annex_3']} não preenchido",
+            severity="high",
+            solution="Preencha o formulário principal do projeto no Anexo III.",
+            question=(
+                "O Anexo III não foi preenchido: verifique se o conteúdo descreve objetivos, "
+                "metodologia, metas e cronograma."
+            ),
+        )):
+            words = len(main_form.split())
+            report.check(words >= settings.COMPLIANCE_MIN_MAIN_FORM_WORDS, ComplianceFinding(
+                section="annex_3",
+                issue=f"Anexo III com apenas {words} palavras",
+                severity="medium",
+                solution="Detalhe objetivos, metodologia, metas e cronograma no Anexo III.",
+                question=(
+                    f"O Anexo III tem apenas {words} palavras: avalie se objetivos, "
+                    "metodologia, metas e cronograma estão suficientemente descritos."
+                ),
+            ))
+
+        report.check(bool(_annex_text(project.annex_2)), ComplianceFinding(
+            section="annex_2",
+            issue=f"{SECTION_LABELS['annex_2']} não preenchido",
+            severity="high",
+            solution="Preencha a justificativa do projeto no Anexo II.",
+            question=(
+                "O Anexo II não foi preenchido: verifique se o conteúdo justifica a "
+                "necessidade do projeto e o público atendido."
+            ),
+        ))
+
+        for annex in DECLARATION_ANNEXES:
+            if report.check(bool(_annex_text(getattr(project, annex))), ComplianceFinding(
+                section=annex,
+                issue=f"{SECTION_LABELS[annex]} não preenchida",
+                severity="high",
+                solution=f"Anexe a {SECTION_LABELS[annex].split(' - ', 1)[1]} assinada.",
+            )):
+                report.verified_sections.append(annex)
+
+    @staticmethod
+    def _check_budget(annex: Any, report: ComplianceReport) -> None:
+        """Anexo VI: regras vetorizadas do BudgetEngine sobre todos os itens."""
+        items = annex.get("items") if isinstance(annex, dict) else None
+
+        if not report.check(bool(items), ComplianceFinding(
+            section="annex_6",
+            issue="Orçamento (Anexo VI) sem itens",
+            severity="high",
+            solution="Cadastre os itens do orçamento com quantidade e valor unitário.",
+        )):
+            return
+        if not report.check(isinstance(items, list), ComplianceFinding(
+            section="annex_6",
+            issue="Orçamento (Anexo VI) em formato inválido",
+            severity="critical",
+            solution="Salve novamente o orçamento pela tabela de itens.",
+        )):
+            return
+
+        validation = BudgetEngine.validate(BudgetTable.from_annex(annex))
+        report.checks += validation.checks
+        report.findings.extend(ComplianceFinding(**issue) for issue in validation.issues)
+        report.budget_total = validation.total
+        report.budget_by_category = validation.by_category
+
+    @staticmethod
+    def annotate_sections(sections: Dict[str, str], report: ComplianceReport) -> Dict[str, str]:
+        """
+        Anexa a cada seção as perguntas em aberto que dependem de julgamento;
+        perguntas de seções ausentes vão para o conteúdo do projeto.
+        """
+        questions: Dict[str, List[str]] = {}
+        for finding in report.findings:
+            if not finding.question or finding.severity == "critical":
+                continue
+            target = finding.section if finding.section in sections else "content"
+            if target not in sections:
+                target = next(iter(sections))
+            questions.setdefault(target, []).append(finding.question)
+
+        annotated = dict(sections)
+        for name, items in questions.items():
+            lines = "\n".join(f"- {question}" for question in items)
+            annotated[name] = f"{sections[name]}\n\n{OPEN_QUESTIONS_HEADER}:\n{lines}"
+        return annotated
+
+    @staticmethod
+    def precheck(project: Project) -> Optional[ComplianceReport]:
+        """Relatório da pré-validação, ou None se desabilitada."""
+        if not settings.COMPLIANCE_PRECHECK_ENABLED:
+            return None
+        return ComplianceEngine.check(project)
+
+    @staticmethod
+    def sections_for_llm(project: Project, report: Optional[ComplianceReport]) -> Dict[str, str]:
+        """
+        Seções enviadas aos modelos: sem as declarações já conferidas e com as
+        perguntas em aberto da pré-validação.
+        """
+        if report is None:
+            return extract_sections(project)
+        sections = extract_sections(project, exclude=report.verified_sections)
+        return ComplianceEngine.annotate_sections(sections, report)
+
+    @staticmethod
+    def local_analysis(project: Project, report: ComplianceReport) -> AIAnalysis:
+        """Registro da análise local de um projeto bloqueado (sem custo de IA)."""
+        result = report.to_analysis()
+        return AIAnalysis(
+            project_id=project.id,
+            provider=AIProvider.LOCAL,
+            analysis_type=AnalysisType.VALIDATION,
+            result=result,
+            score=result["score"],
+            tokens_used=0,
+            processing_time=report.elapsed_us // 1000,
+            suggestions=[],
+            critical_issues=result["critical_issues"],
+            warnings=[],
+        )
@@ -0,0 +1,233 @@
+"""
+Serviço de Conversas do Chat
+Histórico por (usuário, projeto) no servidor: o prompt recebe o resumo
+acumulado + as mensagens recentes que cabem no orçamento de tokens, e as
+mensagens antigas são compactadas no resumo quando o orçamento é excedido
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.db.database import AsyncSessionLocal, release_connection
+from app.models.conversation import Conversation, ConversationMessage
+from app.services.usage_service import UsageService, estimate_tokens, track_usage
+
+logger = logging.getLogger(__name__)
+
+# Mensagens pendentes consultadas por turno (o orçamento corta antes disso)
+MAX_PENDING_MESSAGES = 200
+
+
+class ConversationService:
+    """Persistência, janela de contexto e compactação das conversas."""
+
+    @staticmethod
+    async def get_conversation(
+        db: AsyncSession,
+        conversation_id: UUID,
+        user_id: UUID,
+    ) -> Optional[Conversation]:
+        result = await db.execute(
+            select(Conversation).where(
+                Conversation.id == conversation_id,
+                Conversation.user_id == user_id,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def list_conversations(
+        db: AsyncSession,
+        user_id: UUID,
+        project_id: UUID,
+    ) -> List[Conversation]:
+        result = await db.execute(
+            select(Conversation)
+            .where(
+                Conversation.user_id == user_id,
+                Conversation.project_id == project_id,
+            )
+            .order_by(Conversation.updated_at.desc())
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def create_conversation(
+        db: AsyncSession,
+        user_id: UUID,
+        project_id: UUID,
+        title: Optional[str] = None,
+    ) -> Conversation:
+        """Cria a conversa (commit fica com o chamador)."""
+        conversation = Conversation(user_id=user_id, project_id=project_id, title=title)
+        db.add(conversation)
+        await db.flush()
+        return conversation
+
+    @staticmethod
+    async def get_messages(
+        db: AsyncSession,
+        conversation_id: UUID,
+        limit: int = 100,
+    ) -> List[ConversationMessage]:
+        """Últimas `limit` mensagens da conversa, em ordem cronológica."""
+        result = await db.execute(
+            select(ConversationMessage)
+            .where(ConversationMessage.conversation_id == conversation_id)
+            .order_by(ConversationMessage.created_at.desc())
+            .limit(limit)
+        )
+        return list(reversed(result.scalars().all()))
+
+    @staticmethod
+    async def _pending_messages(db: AsyncSession, conversation_id: UUID) -> List[ConversationMessage]:
+        """Mensagens ainda fora do resumo, da mais recente para a mais antiga."""
+        result = await db.execute(
+            select(ConversationMessage)
+            .where(
+                ConversationMessage.conversation_id == conversation_id,
+                ConversationMessage.summarized.is_(False),
+            )
+            .order_by(ConversationMessage.created_at.desc())
+            .limit(MAX_PENDING_MESSAGES)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def build_history(db: AsyncSession, conversation: Conversation) -> List[Dict[str, str]]:
+        """
+        Histórico enviado ao modelo: resumo acumulado (se houver) e as mensagens
+        mais recentes cujo total cabe em CHAT_HISTORY_TOKEN_BUDGET. O tamanho
+        independe do comprimento da conversa, mesmo que a compactação atrase.
+        """
+        selected: List[ConversationMessage] = []
+        used = 0
+        for message in await ConversationService._pending_messages(db, conversation.id):
+            if used + message.token_count > settings.CHAT_HISTORY_TOKEN_BUDGET:
+                break
+            used += message.token_count
+            selected.append(message)
+
+        history: List[Dict[str, str]] = []
+        if conversation.summary:
+            history.append({
+                "role": "system",
+                "content": f"Resumo da conversa até aqui:\n{conversation.summary}",
+            })
+        history.extend(
+            {"role": message.role, "content": message.content}
+            for message in reversed(selected)
+        )
+        return history
+
+    @staticmethod
+    def add_turn(
+        db: AsyncSession,
+        conversation: Conversation,
+        user_message: str,
+        assistant_message: str,
+    ) -> None:
+        """Registra pergunta e resposta (commit fica com o chamador)."""
+        now = datetime.utcnow()
+        # Timestamps distintos mantêm a ordem pergunta → resposta
+        db.add(ConversationMessage(
+            conversation_id=conversation.id,
+            role="user",
+            content=user_message,
+            token_count=estimate_tokens(user_message),
+            created_at=now,
+        ))
+        db.add(ConversationMessage(
+            conversation_id=conversation.id,
+            role="assistant",
+            content=assistant_message,
+            token_count=estimate_tokens(assistant_message),
+            created_at=now + timedelta(microseconds=1),
+        ))
+        if not conversation.title:
+            conversation.title = user_message.strip()[:80]
+        conversation.updated_at = now
+
+    @staticmethod
+    async def compact(db: AsyncSession, conversation_id: UUID, openai_service: Any) -> bool:
+        """
+        Incorpora ao resumo as mensagens antigas quando as pendentes excedem o
+        orçamento, mantendo as mais recentes até metade dele (margem para não
+        resumir a cada turno). Retorna True se compactou.
+        """
+        result = await db.execute(select(Conversation).where(Conversation.id == conversation_id))
+        conversation = result.scalar_one_or_none()
+        if conversation is None:
+            return False
+
+        pending = await ConversationService._pending_messages(db, conversation_id)
+        if sum(message.token_count for message in pending) <= settings.CHAT_HISTORY_TOKEN_BUDGET:
+            return False
+
+        keep_budget = settings.CHAT_HISTORY_TOKEN_BUDGET // 2
+        kept = 0
+        used = 0
+        for message in pending:
+            if used + message.token_count > keep_budget:
+                break
+            used += message.token_count
+            kept += 1
+        to_fold = list(reversed(pending[kept:]))
+        previous_summary = conversation.summary
+        previous_version = conversation.summary_version
+        await release_connection(db)
+
+        summary = await openai_service.summarize_conversation(
+            previous_summary,
+            [{"role": message.role, "content": message.content} for message in to_fold],
+        )
+
+        # Aplica apenas se nenhuma outra compactação terminou antes
+        result = await db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == conversation_id,
+                Conversation.summary_version == previous_version,
+            )
+            .values(summary=summary, summary_version=previous_version + 1)
+        )
+        if result.rowcount == 0:
+            await db.rollback()
+            return False
+
+        await db.execute(
+            update(ConversationMessage)
+            .where(ConversationMessage.id.in_([message.id for message in to_fold]))
+            .values(summarized=True)
+        )
+        await db.commit()
+        logger.info(
+            "🗜️ Conversa %s compactada: %s mensagens no resumo, %s mantidas",
+            conversation_id, len(to_fold), kept,
+        )
+        return True
+
+    @staticmethod
+    async def compact_in_background(
+        conversation_id: UUID,
+        openai_service: Any,
+        project_id: UUID,
+        user_id: UUID,
+    ) -> None:
+        """Compactação após a resposta ao usuário, com sessão própria."""
+        try:
+            async with AsyncSessionLocal() as session:
+                with track_usage() as usage:
+                    compacted = await ConversationService.compact(session, conversation_id, openai_service)
+                if compacted:
+                    UsageService.add_events(session, usage, "chat_summary", project_id, user_id)
+                    await session.commit()
+        except Exception as exc:  # pylint: disable=broad-except
+            # O prompt continua limitado pela janela; tenta de novo no próximo turno
+            logger.warning("⚠️ Falha ao compactar conversa %s: %s", conversation_id, exc)
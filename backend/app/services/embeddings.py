@@ -0,0 +1,124 @@
+"""
+Backends de Embeddings
+Interface plugável: embedder local determinístico (hashing, sem rede) ou OpenAI
+"""
+
+from typing import List, Optional
+import hashlib
+import logging
+import math
+import re
+import time
+
+from openai import AsyncOpenAI
+
+from app.config import settings
+from app.services.circuit_breaker import circuit_breakers
+from app.services.llm_backends import get_llm_backend
+from app.services.openai_client import get_openai_client
+from app.services.openai_service import is_retryable_error, retry_after_seconds
+from app.services.rate_limiter import rate_limiters
+from app.services.usage_service import estimate_tokens, record_call
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class EmbeddingBackend:
+    """Gera vetores de dimensão fixa (`dimensions`) para uma lista de textos."""
+
+    name = "base"
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class HashingEmbedder(EmbeddingBackend):
+    """
+    Embedder local e determinístico (feature hashing de palavras e bigramas,
+    normalizado L2). Não captura sinônimos, mas recupera trechos por
+    sobreposição de termos — suficiente para testes offline e desenvolvimento.
+    """
+
+    name = "local"
+
+    def _features(self, text: str) -> List[str]:
+        words = [word.lower() for word in _WORD.findall(text)]
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            index = value % self.dimensions
+            sign = 1.0 if (value >> 63) & 1 else -1.0
+            vector[index] += sign
+
+        norm = math.sqrt(sum(component * component for component in vector))
+        if norm == 0:
+            return vector
+        return [component / norm for component in vector]
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_one(text) for text in texts]
+
+
+class OpenAIEmbedder(EmbeddingBackend):
+    """Embeddings OpenAI (modelos v3 aceitam reduzir a dimensão)."""
+
+    name = "openai"
+
+    def __init__(self, dimensions: int, model: str, client: Optional[AsyncOpenAI] = None):
+        super().__init__(dimensions)
+        self.model = model
+        self.client = client or get_openai_client()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        started = time.perf_counter()
+        reserved = sum(estimate_tokens(text) for text in texts)
+        request = {"model": self.model, "input": texts, "dimensions": self.dimensions}
+        response = await circuit_breakers["openai"].call(
+            lambda: rate_limiters["openai"].run(
+                lambda: get_llm_backend().call(
+                    "openai",
+                    "embeddings",
+                    request,
+                    lambda: self.client.embeddings.create(**request),
+                ),
+                reserve_tokens=reserved,
+                is_retryable=is_retryable_error,
+                retry_after=retry_after_seconds,
+            )
+        )
+        usage = getattr(response, "usage", None)
+        record_call(
+            "openai",
+            "embeddings",
+            self.model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=0,
+            duration_ms=int((time.perf_counter() - started) * 1000),
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+_backend: Optional[EmbeddingBackend] = None
+
+
+def get_embedding_backend() -> EmbeddingBackend:
+    """Backend configurado em EMBEDDING_BACKEND (criado sob demanda)."""
+    global _backend
+    if _backend is None:
+        if settings.EMBEDDING_BACKEND == "openai":
+            _backend = OpenAIEmbedder(settings.EMBEDDING_DIMENSIONS, settings.EMBEDDING_MODEL)
+        else:
+            _backend = HashingEmbedder(settings.EMBEDDING_DIMENSIONS)
+        logger.info("🧭 Backend de embeddings: %s (%s dimensões)", _backend.name, _backend.dimensions)
+    return _backend
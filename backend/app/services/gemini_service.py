@@ -3,17 +3,120 @@ Serviço de Integração com Google Gemini 2.5 Flash
 """
 
 import google.generativeai as genai
-from typing import Dict, Any, List
+from google.api_core import exceptions as google_exceptions
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+import asyncio
+import functools
 import logging
+import time
 import json
 import base64
 
 from app.config import settings
+from app.services.llm_cache import llm_cache, make_cache_key
+from app.services.chunked_analysis import analyze_in_chunks
+from app.services.circuit_breaker import circuit_breakers
+from app.services.llm_backends import get_llm_backend
+from app.services.prompt_builder import PromptBudget, section_budget
+from app.services.rate_limiter import rate_limiters
+from app.services.usage_service import estimate_tokens, record_call
 
 logger = logging.getLogger(__name__)
 
+
+class GeminiExecutor:
+    """
+    Pool de threads dedicado às chamadas síncronas do SDK Gemini.
+    Limita a concorrência e expõe a profundidade da fila de espera,
+    mantendo o event loop livre enquanto o Gemini responde.
+    """
+
+    def __init__(self, max_workers: int, timeout: Optional[float] = None):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="gemini",
+        )
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Executa `func` no pool, aguardando vaga se o limite foi atingido."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        loop = asyncio.get_running_loop()
+        self._running += 1
+        try:
+            future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        # A vaga só é liberada quando a thread termina, mesmo se o chamador
+        # for cancelado (ex.: timeout do fan-out) com a chamada em andamento
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        # O timeout conta só a execução (não a espera por vaga), para que o
+        # circuit breaker registre lentidão do Gemini e não fila local
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            raise google_exceptions.DeadlineExceeded(
+                f"Gemini não respondeu em {self.timeout:g}s"
+            ) from None
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        """Estado atual do pool (para /health e monitoramento)."""
+        return {
+            "max_concurrency": self.max_workers,
+            "in_flight": self._running,
+            "queue_depth": self._waiting,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+gemini_executor = GeminiExecutor(settings.GEMINI_MAX_CONCURRENCY, settings.GEMINI_TIMEOUT_SECONDS)
+
+# 429, indisponibilidade e timeouts do Gemini são transitórios
+RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
 class GeminiService:
     """Serviço para interagir com Google Gemini"""
+
+    # Incrementar ao alterar o texto de um prompt (invalida o cache LLM e o
+    # cache de análises dos documentos armazenados)
+    PROMPT_VERSIONS = {
+        "analyze_text": "3",
+        "analyze_pdf": "1",
+    }
+
+    # Tokens de resposta reservados no limitador quando o modelo não define max_output_tokens
+    RESERVED_OUTPUT_TOKENS = 3000
     
     def __init__(self):
         genai.configure(api_key=settings.GEMINI_API_KEY)
@@ -24,9 +127,8 @@ class GeminiService:
         Analisa PDF usando Gemini 2.5 Flash com visão
         """
         try:
-            # Ler o PDF
-            with open(file_path, "rb") as pdf_file:
-                pdf_data = base64.standard_b64encode(pdf_file.read()).decode("utf-8")
+            # Ler o PDF fora do event loop
+            pdf_data = await asyncio.to_thread(self._read_pdf_base64, file_path)
             
             model = genai.GenerativeModel(
                 model_name=self.model_name,
@@ -51,11 +153,13 @@ Analise este documento PDF de projeto e forneça uma avaliação em JSON com:
 
 Retorne APENAS JSON válido."""
 
-            response = model.generate_content(
+            response = await self._generate(
+                model,
                 [
                     {"mime_type": "application/pdf", "data": pdf_data},
                     prompt
-                ]
+                ],
+                "analyze_pdf",
             )
             
             content = self._extract_text(response)
@@ -82,20 +186,23 @@ Retorne APENAS JSON válido."""
     async def analyze_text(self, text: str) -> Dict[str, Any]:
         """
         Análise textual usando Gemini
+        Textos longos são analisados em trechos paralelos (map-reduce)
         """
-        try:
-            model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config={
-                    "temperature": 0.7,
-                    "max_output_tokens": 3000,
-                }
-            )
-            
-            prompt = f"""Analise o seguinte texto de projeto PRONAS/PCD:
+        return await analyze_in_chunks(
+            text,
+            self._analyze_text_chunk,
+            max_tokens=section_budget("content"),
+        )
+
+    async def _analyze_text_chunk(self, text: str) -> Dict[str, Any]:
+        """
+        Análise textual de um trecho que cabe em um único prompt
+        """
+        budget = PromptBudget("gemini", 3000)
+        prompt = f"""Analise o seguinte texto de projeto PRONAS/PCD:
 
 TEXTO:
-{text[:5000]}
+{budget.fit("content", text)}
 
 Forneça análise em JSON com:
 - score (0-100)
@@ -105,9 +212,42 @@ Forneça análise em JSON com:
 - compliance_assessment
 - next_steps (lista)
 
+Campos obrigatórios, CNPJ e totais do orçamento já foram conferidos por regras locais; não os reavalie.
+Se o texto trouxer "Pendências da verificação local", trate cada uma em concerns ou next_steps.
+
 Retorne APENAS JSON válido."""
 
-            response = model.generate_content(prompt)
+        generation_config = {
+            "temperature": 0.7,
+            "max_output_tokens": budget.output_tokens(prompt),
+        }
+        cache_key = make_cache_key(
+            provider="gemini",
+            model=self.model_name,
+            template="analyze_text",
+            template_version=self.PROMPT_VERSIONS["analyze_text"],
+            params=generation_config,
+            content=text,
+        )
+        result, cache_info = await llm_cache.get_or_compute(
+            cache_key,
+            lambda: self._request_text_analysis(prompt, generation_config),
+        )
+        return {**result, "cache": cache_info}
+
+    async def _request_text_analysis(
+        self,
+        prompt: str,
+        generation_config: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Chamada ao Gemini para a análise textual (sem cache)."""
+        try:
+            model = genai.GenerativeModel(
+                model_name=self.model_name,
+                generation_config=generation_config,
+            )
+            
+            response = await self._generate(model, prompt, "analyze_text")
             content = self._extract_text(response)
             result = json.loads(content)
             
@@ -128,14 +268,14 @@ Retorne APENAS JSON válido."""
         Gera sugestão de melhoria com Gemini
         """
         try:
-            model = genai.GenerativeModel(self.model_name)
+            budget = PromptBudget("gemini", 2000)
             
             prompt = f"""Para um projeto PRONAS/PCD, reescreva e melhore esta seção:
 
 SEÇÃO: {section_name}
 
 CONTEÚDO ATUAL:
-{current_content}
+{budget.fit("content", current_content)}
 
 Gere uma versão MELHORADA que:
 1. Seja clara e concisa
@@ -144,7 +284,11 @@ Gere uma versão MELHORADA que:
 
 Retorne apenas o texto melhorado."""
 
-            response = model.generate_content(prompt)
+            model = genai.GenerativeModel(
+                self.model_name,
+                generation_config={"max_output_tokens": budget.output_tokens(prompt)},
+            )
+            response = await self._generate(model, prompt, "generate_text_suggestion")
             improved_text = self._extract_text(response)
             logger.info(f"✅ Sugestão gerada para '{section_name}'")
             
@@ -159,16 +303,17 @@ Retorne apenas o texto melhorado."""
         Extrai texto do PDF usando Gemini
         """
         try:
-            with open(file_path, "rb") as pdf_file:
-                pdf_data = base64.standard_b64encode(pdf_file.read()).decode("utf-8")
+            pdf_data = await asyncio.to_thread(self._read_pdf_base64, file_path)
             
             model = genai.GenerativeModel(self.model_name)
             
-            response = model.generate_content(
+            response = await self._generate(
+                model,
                 [
                     {"mime_type": "application/pdf", "data": pdf_data},
                     "Extraia TODO o texto deste PDF em português. Mantenha a estrutura e formatação."
-                ]
+                ],
+                "extract_pdf_text",
             )
             
             text = self._extract_text(response)
@@ -180,7 +325,72 @@ Retorne apenas o texto melhorado."""
             logger.error(f"❌ Erro ao extrair texto do PDF: {e}")
             raise
 
-    def _extract_text(self, response) -> str:
+    @classmethod
+    async def _generate(cls, model, contents, operation: str) -> Any:
+        """
+        Executa `generate_content` no pool dedicado, sem bloquear o event loop,
+        e registra tokens e latência da chamada.
+        """
+        parts = contents if isinstance(contents, list) else [contents]
+        prompt_estimate = estimate_tokens("".join(p for p in parts if isinstance(p, str)))
+        generation_config = getattr(model, "_generation_config", None) or {}
+        reserved = prompt_estimate + (
+            generation_config.get("max_output_tokens") or cls.RESERVED_OUTPUT_TOKENS
+        )
+
+        request = {
+            "model": getattr(model, "model_name", settings.GEMINI_MODEL),
+            "generation_config": generation_config,
+            "contents": contents,
+        }
+
+        started = time.perf_counter()
+        limiter = rate_limiters["gemini"]
+        response = await circuit_breakers["gemini"].call(
+            lambda: limiter.run(
+                lambda: get_llm_backend().call(
+                    "gemini",
+                    operation,
+                    request,
+                    lambda: gemini_executor.run(model.generate_content, contents),
+                ),
+                reserve_tokens=reserved,
+                is_retryable=_is_retryable,
+            )
+        )
+        duration_ms = int((time.perf_counter() - started) * 1000)
+
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_token_count", 0)
+            completion_tokens = getattr(usage, "candidates_token_count", 0)
+        else:
+            # SDKs antigos não retornam usage_metadata: estimar pelo texto
+            prompt_tokens = prompt_estimate
+            try:
+                completion_tokens = estimate_tokens(cls._extract_text(response))
+            except ValueError:
+                completion_tokens = 0
+        await limiter.refund(reserved - prompt_tokens - completion_tokens)
+
+        record_call(
+            "gemini",
+            operation,
+            getattr(model, "model_name", settings.GEMINI_MODEL),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            duration_ms=duration_ms,
+            estimated=usage is None,
+        )
+        return response
+
+    @staticmethod
+    def _read_pdf_base64(file_path: str) -> str:
+        with open(file_path, "rb") as pdf_file:
+            return base64.standard_b64encode(pdf_file.read()).decode("utf-8")
+
+    @staticmethod
+    def _extract_text(response) -> str:
         """Extrai conteúdo textual de qualquer resposta Gemini, mesmo quando multipart."""
         if hasattr(response, "text"):
             try:
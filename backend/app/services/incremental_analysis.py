@@ -0,0 +1,279 @@
+"""
+Análise Incremental por Seção
+Cada seção do projeto (conteúdo e anexos) tem um hash de conteúdo salvo junto
+da análise; na próxima análise apenas as seções alteradas vão para os LLMs
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+from uuid import UUID
+import asyncio
+import hashlib
+import logging
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+
+from app.config import settings
+from app.models.ai_analysis import AIAnalysis, AnalysisType
+from app.models.project import Project
+from app.services.analysis_orchestrator import AnalysisOrchestrator, ProvidersUnavailableError
+from app.services.chunked_analysis import merge_analyses
+from app.services.gemini_service import GeminiService
+from app.services.openai_service import OpenAIService
+
+logger = logging.getLogger(__name__)
+
+# Seções analisadas individualmente, na ordem do formulário PRONAS/PCD
+PROJECT_SECTIONS: List[Tuple[str, str]] = [
+    ("content", "Conteúdo do projeto"),
+    ("annex_1", "Anexo I - Identificação do projeto"),
+    ("annex_2", "Anexo II - Justificativa"),
+    ("annex_3", "Anexo III - Formulário principal do projeto"),
+    ("annex_4", "Anexo IV - Declaração de Responsabilidade"),
+    ("annex_5", "Anexo V - Declaração de Capacidade Técnico-Operativa"),
+    ("annex_6", "Anexo VI - Orçamento do projeto"),
+    ("annex_7", "Anexo VII - Informações Complementares"),
+]
+
+
+def render_section_value(value: Any, indent: int = 0) -> str:
+    """Converte o JSONB de um anexo em texto legível para o modelo."""
+    prefix = "  " * indent
+    if isinstance(value, dict):
+        lines = []
+        for key, item in value.items():
+            if isinstance(item, (dict, list)):
+                rendered = render_section_value(item, indent + 1)
+                if rendered.strip():
+                    lines.append(f"{prefix}{key}:\n{rendered}")
+            elif item not in (None, ""):
+                lines.append(f"{prefix}{key}: {item}")
+        return "\n".join(lines)
+    if isinstance(value, list):
+        return "\n".join(
+            f"{prefix}- {render_section_value(item, indent + 1).strip()}" for item in value
+        )
+    return f"{prefix}{value}" if value not in (None, "") else ""
+
+
+def extract_sections(project: Project, exclude: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Texto de cada seção preenchida do projeto (ordem preservada), exceto as
+    de `exclude` (ex.: declarações já conferidas pela pré-validação local).
+    """
+    skipped = set(exclude)
+    sections: Dict[str, str] = {}
+    for field, label in PROJECT_SECTIONS:
+        if field in skipped:
+            continue
+        value = getattr(project, field, None)
+        if not value:
+            continue
+        if field == "content":
+            text = value.get("text", "") if isinstance(value, dict) else str(value)
+        else:
+            text = render_section_value(value)
+        if text.strip():
+            sections[field] = f"{label}\n{text}" if field != "content" else text
+
+    if not sections:
+        sections["content"] = project.description or project.title
+    return sections
+
+
+def hash_section(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class IncrementalAnalysisService:
+    """Reaproveita análises de seções que não mudaram desde a última execução."""
+
+    @staticmethod
+    async def load_previous_sections(
+        db: AsyncSession,
+        project_id: UUID,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Resultados por seção da análise completa mais recente que os possui."""
+        result = await db.execute(
+            select(AIAnalysis.section_results)
+            .where(
+                AIAnalysis.project_id == project_id,
+                AIAnalysis.analysis_type == AnalysisType.FULL_PROJECT,
+                AIAnalysis.section_results.isnot(None),
+            )
+            .order_by(AIAnalysis.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none() or {}
+
+    @staticmethod
+    async def _analyze_section(
+        text: str,
+        openai_service: OpenAIService,
+        gemini_service: GeminiService,
+    ) -> Dict[str, Any]:
+        combined = await AnalysisOrchestrator.run_combined({
+            "openai": lambda: openai_service.analyze_project(text),
+            "gemini": lambda: gemini_service.analyze_text(text),
+        })
+        return {
+            "openai": combined["results"].get("openai"),
+            "gemini": combined["results"].get("gemini"),
+            "score": combined["combined_score"],
+            "partial": combined["partial"],
+            "errors": combined["errors"],
+        }
+
+    @staticmethod
+    def _split_reusable(
+        hashes: Dict[str, str],
+        previous_sections: Dict[str, Dict[str, Any]],
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Separa as seções reaproveitáveis da análise anterior das que precisam
+        de nova análise. Seções analisadas em lote guardam cada uma o resultado
+        do lote; os membros inalterados continuam reaproveitáveis enquanto ao
+        menos INCREMENTAL_BATCH_MIN_RATIO do lote não mudou (senão o resultado
+        descreveria sobretudo texto que não existe mais).
+        """
+        def unchanged(name: str) -> bool:
+            previous = previous_sections.get(name) or {}
+            return (
+                previous.get("hash") == hashes[name]
+                and "score" in previous
+                and not previous.get("partial")
+            )
+
+        valid = {name for name in hashes if unchanged(name)}
+        valid_by_batch: Dict[str, int] = {}
+        for name in valid:
+            batch = previous_sections[name].get("batch")
+            if isinstance(batch, str):
+                valid_by_batch[batch] = valid_by_batch.get(batch, 0) + 1
+
+        reused: List[str] = []
+        pending: List[str] = []
+        for name in hashes:
+            previous = previous_sections.get(name) or {}
+            batch = previous.get("batch")
+            if name in valid and isinstance(batch, str):
+                size = previous.get("batch_size") or 1
+                if valid_by_batch[batch] < settings.INCREMENTAL_BATCH_MIN_RATIO * size:
+                    pending.append(name)
+                    continue
+            (reused if name in valid else pending).append(name)
+        return reused, pending
+
+    @staticmethod
+    async def analyze_project(
+        sections: Dict[str, str],
+        previous_sections: Dict[str, Dict[str, Any]],
+        openai_service: OpenAIService,
+        gemini_service: GeminiService,
+    ) -> Dict[str, Any]:
+        """
+        Analisa apenas as seções cujo hash mudou (ou cuja análise anterior foi
+        parcial) e recompõe o resultado do projeto a partir de todas as seções.
+
+        Quando a maior parte das seções precisa de análise (primeira análise,
+        por exemplo), elas vão juntas em uma única análise por provedor, que já
+        divide o texto em trechos nas fronteiras de anexo; cada seção do lote
+        guarda o resultado, de modo que editar uma seção depois reanalisa só ela.
+        """
+        hashes = {name: hash_section(text) for name, text in sections.items()}
+        order = {name: position for position, name in enumerate(hashes)}
+
+        reused, pending = IncrementalAnalysisService._split_reusable(hashes, previous_sections)
+        section_results: Dict[str, Dict[str, Any]] = {
+            name: previous_sections[name] for name in reused
+        }
+
+        if len(pending) > 1 and len(pending) >= settings.INCREMENTAL_BATCH_MIN_RATIO * len(hashes):
+            batches = [pending]
+        else:
+            batches = [[name] for name in pending]
+        logger.info(
+            "♻️ Análise incremental: %s seções em %s análise(s), %s reaproveitadas",
+            len(pending),
+            len(batches),
+            len(reused),
+        )
+
+        semaphore = asyncio.Semaphore(settings.ANALYSIS_CHUNK_CONCURRENCY)
+
+        async def run(batch: List[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await IncrementalAnalysisService._analyze_section(
+                    "\n\n".join(sections[name] for name in batch), openai_service, gemini_service
+                )
+
+        outcomes = await asyncio.gather(*(run(batch) for batch in batches), return_exceptions=True)
+
+        failed: Dict[str, str] = {}
+        analyzed: List[str] = []
+        for batch, outcome in zip(batches, outcomes):
+            if isinstance(outcome, ProvidersUnavailableError):
+                failed[", ".join(batch)] = str(outcome)
+            elif isinstance(outcome, BaseException):
+                raise outcome
+            else:
+                membership = (
+                    {"batch": uuid.uuid4().hex[:12], "batch_size": len(batch)}
+                    if len(batch) > 1 else {}
+                )
+                for name in batch:
+                    section_results[name] = {
+                        **outcome,
+                        "hash": hashes[name],
+                        "length": len(sections[name]),
+                        **membership,
+                    }
+                analyzed.extend(batch)
+
+        if not section_results:
+            raise ProvidersUnavailableError(failed or {"projeto": "nenhuma seção analisada"})
+
+        # Seções do mesmo lote compartilham o resultado: entram uma vez na fusão,
+        # com o peso das seções do lote que ainda o usam
+        ordered = sorted(section_results, key=order.__getitem__)
+        units: Dict[str, List[str]] = {}
+        for name in ordered:
+            batch = section_results[name].get("batch")
+            units.setdefault(batch if isinstance(batch, str) else name, []).append(name)
+        weights = [sum(section_results[name]["length"] for name in unit) for unit in units.values()]
+        leaders = [section_results[unit[0]] for unit in units.values()]
+
+        per_provider: Dict[str, Dict[str, Any]] = {}
+        for provider in ("openai", "gemini"):
+            weighted = [
+                (weight, leader[provider])
+                for weight, leader in zip(weights, leaders)
+                if leader.get(provider)
+            ]
+            if weighted:
+                per_provider[provider] = merge_analyses(weighted)
+
+        combined_score = int(round(
+            sum(leader["score"] * weight for weight, leader in zip(weights, leaders))
+            / (sum(weights) or 1)
+        ))
+        errors = {
+            ", ".join(unit): leader["errors"]
+            for unit, leader in zip(units.values(), leaders)
+            if leader.get("errors")
+        }
+        errors.update({name: {"all": error} for name, error in failed.items()})
+
+        return {
+            "openai": per_provider.get("openai"),
+            "gemini": per_provider.get("gemini"),
+            "combined_score": combined_score,
+            "partial": bool(errors) or any(leader.get("partial") for leader in leaders),
+            "errors": errors,
+            "providers": list(per_provider),
+            "section_hashes": {name: section_results[name]["hash"] for name in ordered},
+            "section_results": {name: section_results[name] for name in ordered},
+            "sections_analyzed": sorted(analyzed, key=order.__getitem__),
+            "sections_reused": reused,
+        }
@@ -0,0 +1,235 @@
+"""
+Serviço da fila de jobs em segundo plano
+Enfileira, reivindica (FOR UPDATE SKIP LOCKED) e finaliza jobs com retry/backoff
+"""
+
+from typing import Any, Dict, Iterable, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+import logging
+import random
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, and_, or_, func
+
+from app.config import settings
+from app.models.job import Job, JobStatus, JobType
+
+logger = logging.getLogger(__name__)
+
+
+class JobService:
+    """Operações sobre a tabela `jobs`"""
+
+    @staticmethod
+    async def enqueue(
+        db: AsyncSession,
+        *,
+        job_type: JobType,
+        user_id: UUID,
+        project_id: Optional[UUID] = None,
+        payload: Optional[Dict[str, Any]] = None,
+        max_attempts: Optional[int] = None,
+        dedupe_key: Optional[str] = None,
+    ) -> Job:
+        """
+        Cria um job na fila e confirma a transação.
+
+        Com `dedupe_key`, um job ainda pendente ou em execução com a mesma chave
+        é reaproveitado em vez de criar outro (advisory lock evita corrida entre
+        workers).
+        """
+        payload = dict(payload or {})
+        if dedupe_key:
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(dedupe_key))))
+            result = await db.execute(
+                select(Job)
+                .where(
+                    Job.job_type == job_type,
+                    Job.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+                    Job.payload["dedupe_key"].astext == dedupe_key,
+                )
+                .order_by(Job.created_at)
+                .limit(1)
+            )
+            existing = result.scalar_one_or_none()
+            if existing is not None:
+                await db.commit()
+                logger.info("🔗 Job %s já em andamento para %s", existing.id, dedupe_key)
+                return existing
+            payload["dedupe_key"] = dedupe_key
+
+        job = Job(
+            job_type=job_type,
+            status=JobStatus.QUEUED,
+            user_id=user_id,
+            project_id=project_id,
+            payload=payload,
+            max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+            run_after=datetime.utcnow(),
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+        logger.info("📥 Job %s enfileirado (%s)", job.id, job_type.value)
+        return job
+
+    @staticmethod
+    async def claim_next(
+        db: AsyncSession,
+        worker_id: str,
+        job_types: Optional[Iterable[JobType]] = None,
+    ) -> Optional[Job]:
+        """
+        Reivindica o próximo job disponível sem bloquear outros workers.
+        Jobs em execução cujo lock expirou (worker morto, sem heartbeat) também
+        são retomados enquanto houver tentativas.
+        """
+        while True:
+            now = datetime.utcnow()
+            stale_before = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+
+            query = (
+                select(Job)
+                .where(
+                    or_(
+                        and_(Job.status == JobStatus.QUEUED, Job.run_after <= now),
+                        and_(Job.status == JobStatus.RUNNING, Job.locked_at < stale_before),
+                    )
+                )
+                .order_by(Job.run_after)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if job_types:
+                query = query.where(Job.job_type.in_(list(job_types)))
+
+            result = await db.execute(query)
+            job = result.scalar_one_or_none()
+
+            if not job:
+                await db.rollback()
+                return None
+
+            # Lock expirado sem heartbeat: o worker morreu durante o job. Se as
+            # tentativas acabaram (ex.: o job derruba o worker), encerra como falho
+            if job.status == JobStatus.RUNNING and job.attempts >= job.max_attempts:
+                job.status = JobStatus.FAILED
+                job.last_error = (
+                    f"Worker {job.locked_by} interrompido durante a execução "
+                    f"(tentativa {job.attempts}/{job.max_attempts})"
+                )
+                job.locked_by = None
+                job.locked_at = None
+                job.finished_at = now
+                await db.commit()
+                logger.error("❌ Job %s falhou definitivamente: %s", job.id, job.last_error)
+                continue
+
+            job.status = JobStatus.RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_at = now
+            await db.commit()
+            logger.info("🔒 Job %s reivindicado por %s (tentativa %s)", job.id, worker_id, job.attempts)
+            return job
+
+    @staticmethod
+    async def heartbeat(db: AsyncSession, job_id: UUID, worker_id: str) -> bool:
+        """
+        Renova o lock de um job em execução. Retorna False se o job não está
+        mais com este worker (lock expirou e outro worker o reivindicou).
+        """
+        result = await db.execute(
+            update(Job)
+            .where(
+                Job.id == job_id,
+                Job.status == JobStatus.RUNNING,
+                Job.locked_by == worker_id,
+            )
+            .values(locked_at=datetime.utcnow())
+        )
+        await db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    def _still_owned(job: Job):
+        """Condição de que o job ainda é desta execução (mesmo worker e tentativa)."""
+        return and_(
+            Job.id == job.id,
+            Job.status == JobStatus.RUNNING,
+            Job.locked_by == job.locked_by,
+            Job.attempts == job.attempts,
+        )
+
+    @staticmethod
+    async def mark_succeeded(db: AsyncSession, job: Job, result: Optional[Dict[str, Any]]) -> bool:
+        """
+        Conclui o job. Retorna False (sem gravar nada) se o lock expirou e
+        outro worker o reivindicou: o resultado dessa outra execução prevalece.
+        """
+        outcome = await db.execute(
+            update(Job)
+            .where(JobService._still_owned(job))
+            .values(
+                status=JobStatus.SUCCEEDED,
+                result=result,
+                last_error=None,
+                locked_by=None,
+                locked_at=None,
+                finished_at=datetime.utcnow(),
+            )
+        )
+        await db.commit()
+        if outcome.rowcount == 0:
+            logger.warning("⚠️ Job %s não está mais com %s; resultado descartado", job.id, job.locked_by)
+            return False
+        logger.info("✅ Job %s concluído", job.id)
+        return True
+
+    @staticmethod
+    async def mark_failed(db: AsyncSession, job: Job, error: str) -> bool:
+        """
+        Reagenda com backoff exponencial (com jitter) ou encerra como falho.
+        Retorna False (sem gravar nada) se o job não está mais com este worker.
+        """
+        values: Dict[str, Any] = {"last_error": error, "locked_by": None, "locked_at": None}
+        retry = job.attempts < job.max_attempts
+        if retry:
+            delay = JobService.retry_delay(job.attempts)
+            values.update(status=JobStatus.QUEUED, run_after=datetime.utcnow() + timedelta(seconds=delay))
+        else:
+            values.update(status=JobStatus.FAILED, finished_at=datetime.utcnow())
+
+        outcome = await db.execute(
+            update(Job).where(JobService._still_owned(job)).values(**values)
+        )
+        await db.commit()
+        if outcome.rowcount == 0:
+            logger.warning("⚠️ Job %s não está mais com %s; falha descartada", job.id, job.locked_by)
+            return False
+
+        if retry:
+            logger.warning(
+                "🔁 Job %s falhou (tentativa %s/%s), nova tentativa em %.1fs: %s",
+                job.id, job.attempts, job.max_attempts, delay, error,
+            )
+        else:
+            logger.error("❌ Job %s falhou definitivamente: %s", job.id, error)
+        return True
+
+    @staticmethod
+    def retry_delay(attempt: int) -> float:
+        """Backoff exponencial com jitter: entre metade e o teto min(max, base * 2^(n-1))."""
+        ceiling = min(
+            settings.JOB_RETRY_MAX_SECONDS,
+            settings.JOB_RETRY_BASE_SECONDS * (2 ** max(0, attempt - 1)),
+        )
+        return random.uniform(ceiling / 2, ceiling)
+
+    @staticmethod
+    async def get_job(db: AsyncSession, job_id: UUID, user_id: UUID) -> Optional[Job]:
+        result = await db.execute(
+            select(Job).where(Job.id == job_id, Job.user_id == user_id)
+        )
+        return result.scalar_one_or_none()
@@ -0,0 +1,493 @@
+"""
+Backends das Chamadas aos Provedores de IA
+`live` chama OpenAI/Gemini; `stub` responde localmente com latência simulada
+e JSON no formato de `schemas/analysis.py`; `record` chama o provedor e grava
+cada resposta em cassetes no disco; `replay` reproduz as cassetes sem rede.
+Permite testes de carga da API inteira sem custo e sem acesso externo.
+"""
+
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import time
+
+import httpx
+from google.api_core import exceptions as google_exceptions
+from openai import APITimeoutError
+
+from app.config import settings
+from app.schemas.analysis import AnalysisResult, CriticalIssue, Suggestion
+from app.services.usage_service import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+LiveCall = Callable[[], Awaitable[Any]]
+
+
+class CassetteMissError(RuntimeError):
+    """Requisição sem cassete gravada no modo replay."""
+
+
+def request_fingerprint(provider: str, operation: str, request: Dict[str, Any]) -> str:
+    """Hash estável da requisição (o modo de streaming não altera a resposta gravada)."""
+    canonical = {key: value for key, value in request.items() if key != "stream"}
+    payload = json.dumps(
+        {"provider": provider, "operation": operation, "request": canonical},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _prompt_text(request: Dict[str, Any]) -> str:
+    """Texto do prompt de qualquer provedor (para estimar tokens)."""
+    if "messages" in request:
+        return "".join(message.get("content", "") for message in request["messages"])
+    if "input" in request:
+        texts = request["input"]
+        return "".join(texts) if isinstance(texts, list) else str(texts)
+    contents = request.get("contents")
+    parts = contents if isinstance(contents, list) else [contents]
+    return "".join(part for part in parts if isinstance(part, str))
+
+
+# ============================================
+# RESPOSTAS NO FORMATO DOS SDKs
+# ============================================
+
+def _openai_response(payload: Dict[str, Any], model: Optional[str]) -> Any:
+    return SimpleNamespace(
+        model=model,
+        choices=[
+            SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=payload["text"]),
+                finish_reason="stop",
+            )
+        ],
+        usage=SimpleNamespace(
+            prompt_tokens=payload["prompt_tokens"],
+            completion_tokens=payload["completion_tokens"],
+            total_tokens=payload["prompt_tokens"] + payload["completion_tokens"],
+        ),
+    )
+
+
+async def _openai_stream(payload: Dict[str, Any], latency: float) -> AsyncIterator[Any]:
+    """Stream simulado: primeiro trecho após 1/4 da latência, o resto distribuído."""
+    words = payload["text"].split(" ")
+    pieces = [" ".join(words[index:index + 4]) + " " for index in range(0, len(words), 4)]
+    await asyncio.sleep(latency * 0.25)
+    delay = latency * 0.75 / max(1, len(pieces))
+    for piece in pieces:
+        yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=piece))])
+        await asyncio.sleep(delay)
+
+
+def _gemini_response(payload: Dict[str, Any]) -> Any:
+    return SimpleNamespace(
+        text=payload["text"],
+        candidates=[
+            SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=payload["text"])]))
+        ],
+        usage_metadata=SimpleNamespace(
+            prompt_token_count=payload["prompt_tokens"],
+            candidates_token_count=payload["completion_tokens"],
+        ),
+    )
+
+
+def _embeddings_response(payload: Dict[str, Any]) -> Any:
+    return SimpleNamespace(
+        data=[
+            SimpleNamespace(index=index, embedding=vector)
+            for index, vector in enumerate(payload["embeddings"])
+        ],
+        usage=SimpleNamespace(prompt_tokens=payload["prompt_tokens"], total_tokens=payload["prompt_tokens"]),
+    )
+
+
+def build_response(provider: str, operation: str, request: Dict[str, Any], payload: Dict[str, Any]) -> Any:
+    """Reconstrói a resposta do SDK a partir do payload gravado ou gerado."""
+    if operation == "embeddings":
+        return _embeddings_response(payload)
+    if provider == "gemini":
+        return _gemini_response(payload)
+    return _openai_response(payload, request.get("model"))
+
+
+def _response_text(provider: str, response: Any) -> str:
+    if provider == "gemini":
+        try:
+            return response.text
+        except Exception:  # pylint: disable=broad-except
+            return ""
+    return response.choices[0].message.content or ""
+
+
+def serialize_response(provider: str, operation: str, response: Any) -> Dict[str, Any]:
+    """Payload de cassete: texto (ou vetores) e tokens informados pelo provedor."""
+    if operation == "embeddings":
+        items = sorted(response.data, key=lambda item: item.index)
+        return {
+            "embeddings": [list(item.embedding) for item in items],
+            "prompt_tokens": getattr(getattr(response, "usage", None), "prompt_tokens", 0),
+            "completion_tokens": 0,
+        }
+
+    if provider == "gemini":
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+        completion_tokens = getattr(usage, "candidates_token_count", 0)
+    else:
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0)
+        completion_tokens = getattr(usage, "completion_tokens", 0)
+    return {
+        "text": _response_text(provider, response),
+        "prompt_tokens": prompt_tokens or 0,
+        "completion_tokens": completion_tokens or 0,
+    }
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class LLMBackend:
+    """Executa a chamada de baixo nível de um provedor (após breaker e limitador)."""
+
+    name = "base"
+
+    async def call(
+        self,
+        provider: str,
+        operation: str,
+        request: Dict[str, Any],
+        live: LiveCall,
+    ) -> Any:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class LiveBackend(LLMBackend):
+    """Chama o provedor real."""
+
+    name = "live"
+
+    async def call(self, provider, operation, request, live):
+        return await live()
+
+
+class StubBackend(LLMBackend):
+    """
+    Provedor local: latência log-normal calibrada por p50/p95, falhas
+    transitórias opcionais e conteúdo determinístico por requisição.
+    """
+
+    name = "stub"
+
+    def __init__(self, p50_ms: float, p95_ms: float, error_rate: float = 0.0):
+        self.p50_ms = max(1.0, p50_ms)
+        self.p95_ms = max(self.p50_ms, p95_ms)
+        self.error_rate = error_rate
+        # p95 de uma log-normal = exp(mu + 1.645 * sigma)
+        self._mu = math.log(self.p50_ms)
+        self._sigma = (math.log(self.p95_ms) - self._mu) / 1.645
+        self.calls = 0
+
+    def sample_latency(self) -> float:
+        """Latência simulada em segundos."""
+        return random.lognormvariate(self._mu, self._sigma) / 1000
+
+    def _transient_error(self, provider: str) -> Exception:
+        if provider == "gemini":
+            return google_exceptions.ServiceUnavailable("Falha simulada pelo stub")
+        return APITimeoutError(request=httpx.Request("POST", "https://stub.local/v1/chat/completions"))
+
+    async def call(self, provider, operation, request, live):
+        self.calls += 1
+        latency = self.sample_latency()
+        payload = stub_payload(provider, operation, request)
+
+        if self.error_rate and random.random() < self.error_rate:
+            await asyncio.sleep(latency)
+            raise self._transient_error(provider)
+
+        if request.get("stream"):
+            return _openai_stream(payload, latency)
+        await asyncio.sleep(latency)
+        return build_response(provider, operation, request, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "p50_ms": self.p50_ms,
+            "p95_ms": self.p95_ms,
+            "error_rate": self.error_rate,
+            "calls": self.calls,
+        }
+
+
+class CassetteBackend(LLMBackend):
+    """
+    Grava (`record`) ou reproduz (`replay`) respostas em arquivos JSON:
+    `<dir>/<provedor>/<operação>/<hash da requisição>.json`.
+    """
+
+    def __init__(self, mode: str, directory: str, fallback: Optional[LLMBackend] = None):
+        self.name = mode
+        self.directory = directory
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _path(self, provider: str, operation: str, request: Dict[str, Any]) -> str:
+        fingerprint = request_fingerprint(provider, operation, request)
+        return os.path.join(self.directory, provider, operation, f"{fingerprint}.json")
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _write(path: str, cassette: Dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(cassette, handle, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+
+    async def _save(self, path: str, provider: str, operation: str, request: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        cassette = {
+            "provider": provider,
+            "operation": operation,
+            "model": request.get("model"),
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "response": payload,
+        }
+        await asyncio.to_thread(self._write, path, cassette)
+        self.recorded += 1
+        logger.info("📼 Cassete gravada: %s/%s", provider, operation)
+
+    async def _record_stream(self, stream: Any, path: str, provider: str, operation: str, request: Dict[str, Any]) -> AsyncIterator[Any]:
+        """Repassa o stream real e grava o texto completo ao final."""
+        parts: List[str] = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+            yield chunk
+        text = "".join(parts)
+        await self._save(path, provider, operation, request, {
+            "text": text,
+            "prompt_tokens": estimate_tokens(_prompt_text(request)),
+            "completion_tokens": estimate_tokens(text),
+        })
+
+    async def call(self, provider, operation, request, live):
+        path = self._path(provider, operation, request)
+
+        if self.name == "record":
+            response = await live()
+            if request.get("stream"):
+                return self._record_stream(response, path, provider, operation, request)
+            await self._save(path, provider, operation, request, serialize_response(provider, operation, response))
+            return response
+
+        cassette = await asyncio.to_thread(self._read, path)
+        if cassette is None:
+            self.misses += 1
+            if self.fallback is not None:
+                return await self.fallback.call(provider, operation, request, live)
+            raise CassetteMissError(f"Sem cassete para {provider}/{operation}: {os.path.basename(path)}")
+
+        self.hits += 1
+        payload = cassette["response"]
+        if request.get("stream"):
+            return _openai_stream(payload, 0.0)
+        return build_response(provider, operation, request, payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "directory": self.directory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+        }
+
+
+# ============================================
+# CONTEÚDO DO STUB
+# ============================================
+
+def stub_payload(provider: str, operation: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """Resposta determinística (mesma requisição → mesma resposta)."""
+    fingerprint = request_fingerprint(provider, operation, request)
+    rng = random.Random(fingerprint)
+    prompt_tokens = estimate_tokens(_prompt_text(request))
+
+    if operation == "embeddings":
+        from app.services.embeddings import HashingEmbedder
+
+        embedder = HashingEmbedder(request.get("dimensions") or settings.EMBEDDING_DIMENSIONS)
+        texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        return {
+            "embeddings": [embedder.embed_one(text) for text in texts],
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 0,
+        }
+
+    builder = _STUB_CONTENT.get(operation, _stub_chat_text)
+    content = builder(rng)
+    text = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+    return {
+        "text": text,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": estimate_tokens(text),
+    }
+
+
+_SECTIONS = ["Justificativa", "Objetivos", "Metodologia", "Orçamento", "Equipe", "Metas e indicadores"]
+
+
+def _stub_suggestion(rng: random.Random) -> Dict[str, Any]:
+    section = rng.choice(_SECTIONS)
+    return Suggestion(
+        section=section,
+        original_text=f"Texto atual da seção {section}.",
+        suggested_text=f"Versão revisada da seção {section}, com metas mensuráveis.",
+        reason="Alinhar a redação aos critérios do PRONAS/PCD.",
+        priority=rng.choice(["high", "medium", "low"]),
+    ).model_dump()
+
+
+def _stub_critical_issue(rng: random.Random) -> Dict[str, Any]:
+    section = rng.choice(_SECTIONS)
+    return CriticalIssue(
+        section=section,
+        issue=f"Informação obrigatória ausente em {section}.",
+        severity=rng.choice(["critical", "high", "medium"]),
+        solution=f"Completar a seção {section} conforme o anexo correspondente.",
+    ).model_dump()
+
+
+def _stub_project_analysis(rng: random.Random) -> Dict[str, Any]:
+    return AnalysisResult(
+        score=rng.randint(55, 92),
+        summary="Análise simulada (stub): projeto coerente, com lacunas de detalhamento.",
+        strengths=["Público-alvo bem definido", "Metodologia descrita"],
+        weaknesses=["Indicadores pouco mensuráveis", "Cronograma genérico"],
+        suggestions=[_stub_suggestion(rng) for _ in range(rng.randint(1, 3))],
+        critical_issues=[_stub_critical_issue(rng) for _ in range(rng.randint(0, 2))],
+        compliance={section: rng.choice(["conforme", "parcial"]) for section in _SECTIONS},
+    ).model_dump()
+
+
+def _stub_section_analysis(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "score": rng.randint(50, 95),
+        "quality_assessment": "Avaliação simulada (stub) da seção.",
+        "suggestions": [_stub_suggestion(rng) for _ in range(rng.randint(1, 2))],
+        "critical_issues": [_stub_critical_issue(rng) for _ in range(rng.randint(0, 1))],
+        "improvements": ["Detalhar metas", "Citar a legislação aplicável"],
+    }
+
+
+def _stub_text_analysis(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "score": rng.randint(50, 95),
+        "summary": "Análise simulada (stub) do texto do projeto.",
+        "key_points": ["Objetivo alinhado ao PRONAS/PCD", "Atendimento multiprofissional"],
+        "concerns": ["Orçamento sem memória de cálculo"],
+        "compliance_assessment": rng.choice(["conforme", "parcial"]),
+        "next_steps": ["Revisar o Anexo 6", "Detalhar indicadores"],
+    }
+
+
+def _stub_pdf_analysis(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "score": rng.randint(50, 95),
+        "document_type": "Projeto PRONAS/PCD",
+        "completeness": "Documento simulado (stub) com seções principais.",
+        "quality_assessment": "Qualidade adequada.",
+        "warnings": ["Anexos não identificados"],
+        "observations": ["Resposta gerada pelo backend stub"],
+        "budget_analysis": "Sem inconsistências aparentes.",
+        "recommendations": ["Conferir totais do orçamento"],
+    }
+
+
+def _stub_chat_text(rng: random.Random) -> str:
+    return (
+        "Resposta simulada (stub) sobre o projeto PRONAS/PCD.\n"
+        "- Revise os indicadores do Anexo 3\n"
+        f"- Detalhe a seção {rng.choice(_SECTIONS)}\n"
+        "- Confira os totais do orçamento"
+    )
+
+
+def _stub_improved_text(rng: random.Random) -> str:
+    return "Texto revisado (stub): objetivo claro, metas mensuráveis e alinhamento às diretrizes do PRONAS/PCD."
+
+
+def _stub_summary(rng: random.Random) -> str:
+    return "- Resumo simulado (stub) da conversa\n- Pendências: revisar orçamento"
+
+
+def _stub_pdf_text(rng: random.Random) -> str:
+    return "--- PÁGINA 1 ---\nTexto simulado (stub) extraído do PDF."
+
+
+_STUB_CONTENT: Dict[str, Callable[[random.Random], Any]] = {
+    "analyze_project": _stub_project_analysis,
+    "analyze_section": _stub_section_analysis,
+    "analyze_text": _stub_text_analysis,
+    "analyze_pdf": _stub_pdf_analysis,
+    "chat_about_project": _stub_chat_text,
+    "stream_chat_about_project": _stub_chat_text,
+    "generate_improvement_suggestion": _stub_improved_text,
+    "generate_text_suggestion": _stub_improved_text,
+    "summarize_conversation": _stub_summary,
+    "extract_pdf_text": _stub_pdf_text,
+}
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_llm_backend() -> LLMBackend:
+    """Backend configurado em LLM_BACKEND (criado sob demanda)."""
+    global _backend
+    if _backend is None:
+        stub = StubBackend(
+            settings.LLM_STUB_LATENCY_P50_MS,
+            settings.LLM_STUB_LATENCY_P95_MS,
+            settings.LLM_STUB_ERROR_RATE,
+        )
+        if settings.LLM_BACKEND == "stub":
+            _backend = stub
+        elif settings.LLM_BACKEND in ("record", "replay"):
+            fallback = stub if settings.LLM_BACKEND == "replay" and settings.LLM_REPLAY_FALLBACK_TO_STUB else None
+            _backend = CassetteBackend(settings.LLM_BACKEND, settings.LLM_CASSETTE_DIR, fallback)
+        else:
+            _backend = LiveBackend()
+        if _backend.name == "record":
+            logger.warning("📼 Gravando respostas dos provedores em %s", settings.LLM_CASSETTE_DIR)
+        elif _backend.name != "live":
+            logger.warning("🧪 Provedores de IA em modo %s (sem chamadas reais)", _backend.name)
+    return _backend
@@ -0,0 +1,207 @@
+"""
+Cache de Respostas LLM (endereçado por conteúdo)
+Camada LRU em memória + camada Redis, cada uma com TTL e limite de tamanho
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    *,
+    provider: str,
+    model: str,
+    template: str,
+    template_version: str,
+    params: Dict[str, Any],
+    content: Any,
+) -> str:
+    """SHA-256 de modelo + versão do template + parâmetros de geração + entrada."""
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "template": template,
+            "template_version": template_version,
+            "params": params,
+            "content": content,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class MemoryLRUTier:
+    """LRU em memória com TTL por entrada e limite por quantidade e bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._bytes += len(value)
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self._bytes}
+
+
+class RedisTier:
+    """
+    Camada Redis compartilhada entre workers.
+    Cada valor tem TTL próprio; um sorted set indexa as chaves por data de escrita
+    para descartar as mais antigas quando o limite de entradas é ultrapassado.
+    """
+
+    PREFIX = "llmcache:"
+    INDEX_KEY = "llmcache:index"
+    FAILURE_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, ttl_seconds: int, max_entries: int, max_value_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_value_bytes = max_value_bytes
+        self._disabled_until = 0.0
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._disabled_until
+
+    def _mark_failure(self, exc: Exception) -> None:
+        self._disabled_until = time.monotonic() + self.FAILURE_BACKOFF_SECONDS
+        logger.warning("⚠️ Cache Redis indisponível, usando apenas memória: %s", exc)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self._available():
+            return None
+        try:
+            return await get_redis().get(self.PREFIX + key)
+        except (RedisError, OSError) as exc:
+            self._mark_failure(exc)
+            return None
+
+    async def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_value_bytes or not self._available():
+            return
+        redis = get_redis()
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.set(self.PREFIX + key, value, ex=self.ttl_seconds)
+                pipe.zadd(self.INDEX_KEY, {key: time.time()})
+                # Entradas expiradas por TTL saem do índice aqui
+                pipe.zremrangebyscore(self.INDEX_KEY, 0, time.time() - self.ttl_seconds)
+                pipe.zcard(self.INDEX_KEY)
+                *_, total = await pipe.execute()
+
+            overflow = total - self.max_entries
+            if overflow > 0:
+                evicted = await redis.zpopmin(self.INDEX_KEY, overflow)
+                if evicted:
+                    await redis.delete(*(self.PREFIX + member.decode() for member, _ in evicted))
+        except (RedisError, OSError) as exc:
+            self._mark_failure(exc)
+
+
+class LLMCache:
+    """Cache em duas camadas para respostas determinísticas por entrada."""
+
+    def __init__(
+        self,
+        memory: MemoryLRUTier,
+        redis: Optional[RedisTier] = None,
+        enabled: bool = True,
+    ):
+        self.memory = memory
+        self.redis = redis
+        self.enabled = enabled
+
+    @classmethod
+    def from_settings(cls) -> "LLMCache":
+        memory = MemoryLRUTier(
+            max_entries=settings.LLM_CACHE_MEMORY_MAX_ENTRIES,
+            max_bytes=settings.LLM_CACHE_MEMORY_MAX_BYTES,
+            ttl_seconds=settings.LLM_CACHE_MEMORY_TTL_SECONDS,
+        )
+        redis = None
+        if settings.LLM_CACHE_REDIS_ENABLED:
+            redis = RedisTier(
+                ttl_seconds=settings.LLM_CACHE_REDIS_TTL_SECONDS,
+                max_entries=settings.LLM_CACHE_REDIS_MAX_ENTRIES,
+                max_value_bytes=settings.LLM_CACHE_REDIS_MAX_VALUE_BYTES,
+            )
+        return cls(memory, redis, enabled=settings.LLM_CACHE_ENABLED)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Retorna (valor, info_cache). `info_cache` indica hit/miss e a camada
+        que respondeu. Valores rejeitados por `cacheable` não são armazenados.
+        """
+        if not self.enabled:
+            return await compute(), {"status": "disabled", "tier": None}
+
+        raw = self.memory.get(key)
+        tier = "memory"
+        if raw is None and self.redis is not None:
+            raw = await self.redis.get(key)
+            tier = "redis"
+            if raw is not None:
+                self.memory.set(key, raw)
+
+        if raw is not None:
+            logger.info("💾 Cache LLM hit (%s): %s", tier, key[:12])
+            return json.loads(raw), {"status": "hit", "tier": tier}
+
+        value = await compute()
+        if cacheable is None or cacheable(value):
+            encoded = json.dumps(value, ensure_ascii=False).encode("utf-8")
+            self.memory.set(key, encoded)
+            if self.redis is not None:
+                await self.redis.set(key, encoded)
+        return value, {"status": "miss", "tier": None}
+
+
+llm_cache = LLMCache.from_settings()
@@ -0,0 +1,63 @@
+"""
+Cliente AsyncOpenAI compartilhado por worker
+Um único pool de conexões HTTP (keep-alive) reaproveitado por todas as requisições
+"""
+
+from typing import Optional
+import logging
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[AsyncOpenAI] = None
+
+
+def create_openai_client() -> AsyncOpenAI:
+    """Cria um AsyncOpenAI com pool HTTP configurado pelas Settings."""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.OPENAI_TIMEOUT_SECONDS,
+            connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS,
+        ),
+    )
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        http_client=http_client,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+    )
+
+
+def init_openai_client() -> AsyncOpenAI:
+    """Inicializa o cliente compartilhado (chamado no lifespan da aplicação)."""
+    global _client
+    if _client is None:
+        _client = create_openai_client()
+        logger.info(
+            "🔌 Cliente OpenAI compartilhado criado (max_connections=%s, keepalive=%s)",
+            settings.OPENAI_MAX_CONNECTIONS,
+            settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        )
+    return _client
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Retorna o cliente compartilhado, criando-o se o lifespan ainda não rodou."""
+    return _client if _client is not None else init_openai_client()
+
+
+async def close_openai_client() -> None:
+    """Fecha o pool de conexões do cliente compartilhado (shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+        logger.info("🔌 Cliente OpenAI compartilhado encerrado")
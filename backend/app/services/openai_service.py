@@ -2,22 +2,58 @@
 Serviço de Integração com OpenAI (Modelo Fine-tuned)
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import json
 import logging
+import time
 
-from openai import AsyncOpenAI
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
 
 from app.config import settings
+from app.services.openai_client import get_openai_client
+from app.services.llm_cache import llm_cache, make_cache_key
+from app.services.chunked_analysis import analyze_in_chunks, analyze_stream
+from app.services.circuit_breaker import circuit_breakers
+from app.services.llm_backends import get_llm_backend
+from app.services.prompt_builder import PromptBudget, trim_to_tokens, section_budget
+from app.services.rate_limiter import parse_retry_after, rate_limiters
+from app.services.usage_service import estimate_tokens, record_call
 
 logger = logging.getLogger(__name__)
 
 
+RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def is_retryable_error(exc: BaseException) -> bool:
+    """429, timeouts, falhas de conexão e erros 5xx são transitórios."""
+    return isinstance(exc, RETRYABLE_ERRORS)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    return parse_retry_after(getattr(getattr(exc, "response", None), "headers", None))
+
+
 class OpenAIService:
     """Serviço para interagir com a API Async do OpenAI Python SDK."""
 
-    def __init__(self) -> None:
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    # Incrementar ao alterar o texto de um prompt (invalida o cache LLM)
+    PROMPT_VERSIONS = {
+        "analyze_project": "3",
+        "analyze_section": "2",
+    }
+
+    # Tokens máximos de uma resposta do chat
+    CHAT_MAX_TOKENS = 2000
+
+    def __init__(self, client: Optional[AsyncOpenAI] = None) -> None:
+        self.client = client or get_openai_client()
         self.model = settings.OPENAI_MODEL
         self.max_tokens = settings.OPENAI_MAX_TOKENS
         self.temperature = settings.OPENAI_TEMPERATURE
@@ -25,8 +61,29 @@ class OpenAIService:
     async def analyze_project(self, project_text: str) -> Dict[str, Any]:
         """
         Executa uma análise completa do projeto PRONAS/PCD.
+        Projetos longos são analisados em trechos paralelos (map-reduce).
         Retorna sempre um dicionário JSON válido.
         """
+        return await analyze_in_chunks(
+            project_text,
+            self._analyze_project_chunk,
+            max_tokens=section_budget("content"),
+        )
+
+    async def analyze_project_stream(self, parts: AsyncIterator[str]) -> Dict[str, Any]:
+        """
+        Análise completa de um texto que chega em partes (páginas de um PDF):
+        os primeiros trechos são analisados enquanto o restante ainda é lido.
+        """
+        return await analyze_stream(
+            parts,
+            self._analyze_project_chunk,
+            max_tokens=section_budget("content"),
+        )
+
+    async def _analyze_project_chunk(self, project_text: str) -> Dict[str, Any]:
+        """Análise completa de um texto que cabe em um único prompt."""
+        budget = PromptBudget("openai", self.max_tokens)
         prompt = f"""Você é um especialista em projetos PRONAS/PCD do Ministério da Saúde do Brasil.
 
 Analise este projeto e forneça uma avaliação estruturada em JSON com os seguintes campos:
@@ -39,26 +96,54 @@ Analise este projeto e forneça uma avaliação estruturada em JSON com os segui
 6. critical_issues (lista de objetos com: section, issue, severity, solution)
 7. compliance: Objeto com conformidade por seção
 
+Campos obrigatórios, CNPJ e totais do orçamento já foram conferidos por regras locais; não os reavalie.
+Se o texto trouxer "Pendências da verificação local", responda a cada uma em critical_issues ou suggestions.
+
 PROJETO:
-{project_text[:8000]}
+{budget.fit("content", project_text)}
 
 Retorne APENAS JSON válido, sem markdown."""
+        messages = [
+            {
+                "role": "system",
+                "content": "Você é especialista em PRONAS/PCD. Retorne apenas JSON válido."
+            },
+            {"role": "user", "content": prompt},
+        ]
 
+        params = {
+            "temperature": self.temperature,
+            "max_tokens": budget.output_tokens(messages),
+            "top_p": 0.95,
+        }
+        cache_key = make_cache_key(
+            provider="openai",
+            model=self.model,
+            template="analyze_project",
+            template_version=self.PROMPT_VERSIONS["analyze_project"],
+            params=params,
+            content=project_text,
+        )
+        result, cache_info = await llm_cache.get_or_compute(
+            cache_key,
+            lambda: self._request_project_analysis(messages, params),
+            cacheable=lambda value: "error" not in value,
+        )
+        return {**result, "cache": cache_info}
+
+    async def _request_project_analysis(
+        self,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Chamada ao modelo para a análise completa (sem cache)."""
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "Você é especialista em PRONAS/PCD. Retorne apenas JSON válido."
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=0.95,
+            response = await self._complete(
+                "analyze_project",
+                messages=messages,
                 frequency_penalty=0.0,
                 presence_penalty=0.0,
+                **params,
             )
 
             content = response.choices[0].message.content or "{}"
@@ -76,6 +161,43 @@ Retorne APENAS JSON válido, sem markdown."""
             logger.error("❌ Erro ao analisar com OpenAI: %s", exc)
             raise
 
+    def _reserve_tokens(self, messages: List[Dict[str, str]], max_tokens: Optional[int]) -> int:
+        """Tokens reservados no limitador: prompt estimado + máximo da resposta."""
+        prompt = "".join(message.get("content", "") for message in messages)
+        return estimate_tokens(prompt) + (max_tokens or self.max_tokens)
+
+    async def _complete(self, operation: str, **kwargs: Any) -> Any:
+        """
+        Chamada ao chat completions pelo circuit breaker e pelo limitador de
+        taxa (fila + retentativas), registrando tokens e latência.
+        """
+        started = time.perf_counter()
+        request = {"model": self.model, **kwargs}
+        response = await circuit_breakers["openai"].call(
+            lambda: rate_limiters["openai"].run(
+                lambda: get_llm_backend().call(
+                    "openai",
+                    operation,
+                    request,
+                    lambda: self.client.chat.completions.create(**request),
+                ),
+                reserve_tokens=self._reserve_tokens(kwargs["messages"], kwargs.get("max_tokens")),
+                is_retryable=is_retryable_error,
+                retry_after=retry_after_seconds,
+                used_tokens=lambda result: getattr(getattr(result, "usage", None), "total_tokens", None),
+            )
+        )
+        usage = getattr(response, "usage", None)
+        record_call(
+            "openai",
+            operation,
+            self.model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0),
+            completion_tokens=getattr(usage, "completion_tokens", 0),
+            duration_ms=int((time.perf_counter() - started) * 1000),
+        )
+        return response
+
     async def analyze_section(
         self,
         section_name: str,
@@ -83,15 +205,16 @@ Retorne APENAS JSON válido, sem markdown."""
         project_context: str = "",
     ) -> Dict[str, Any]:
         """Executa análise detalhada de uma seção específica."""
+        budget = PromptBudget("openai", 2000)
         prompt = f"""Analise a seguinte seção de um projeto PRONAS/PCD:
 
 SEÇÃO: {section_name}
 
 CONTEÚDO:
-{section_content}
+{budget.fit("content", section_content)}
 
 CONTEXTO DO PROJETO:
-{project_context[:2000] if project_context else "N/A"}
+{budget.fit("context", project_context) or "N/A"}
 
 Forneça feedback estruturado em JSON com:
 - score (0-100)
@@ -100,16 +223,42 @@ Forneça feedback estruturado em JSON com:
 - critical_issues (lista)
 - improvements (lista)
 """
+        messages = [
+            {"role": "system", "content": "Especialista em PRONAS/PCD. Retorne JSON."},
+            {"role": "user", "content": prompt},
+        ]
 
+        params = {"temperature": self.temperature, "max_tokens": budget.output_tokens(messages)}
+        cache_key = make_cache_key(
+            provider="openai",
+            model=self.model,
+            template="analyze_section",
+            template_version=self.PROMPT_VERSIONS["analyze_section"],
+            params=params,
+            content={
+                "section": section_name,
+                "content": section_content,
+                "context": project_context,
+            },
+        )
+        result, cache_info = await llm_cache.get_or_compute(
+            cache_key,
+            lambda: self._request_section_analysis(section_name, messages, params),
+        )
+        return {**result, "cache": cache_info}
+
+    async def _request_section_analysis(
+        self,
+        section_name: str,
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Chamada ao modelo para a análise de seção (sem cache)."""
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Especialista em PRONAS/PCD. Retorne JSON."},
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=self.temperature,
-                max_tokens=2000,
+            response = await self._complete(
+                "analyze_section",
+                messages=messages,
+                **params,
             )
 
             content = response.choices[0].message.content or "{}"
@@ -127,13 +276,14 @@ Forneça feedback estruturado em JSON com:
         improvement_type: str = "general",
     ) -> str:
         """Gera sugestão de melhoria textual para uma seção."""
+        budget = PromptBudget("openai", 1000)
         prompt = f"""Melhore o seguinte texto de um projeto PRONAS/PCD:
 
 SEÇÃO: {section}
 TIPO DE MELHORIA: {improvement_type}
 
 TEXTO ATUAL:
-{current_text}
+{budget.fit("content", current_text)}
 
 Forneça uma versão MELHORADA do texto que:
 1. Seja mais clara e objetiva
@@ -142,15 +292,17 @@ Forneça uma versão MELHORADA do texto que:
 
 Retorne apenas o texto melhorado, sem explicações."""
 
+        messages = [
+            {"role": "system", "content": "Especialista em PRONAS/PCD."},
+            {"role": "user", "content": prompt},
+        ]
+
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Especialista em PRONAS/PCD."},
-                    {"role": "user", "content": prompt},
-                ],
+            response = await self._complete(
+                "generate_improvement_suggestion",
+                messages=messages,
                 temperature=0.7,
-                max_tokens=1000,
+                max_tokens=budget.output_tokens(messages),
             )
 
             improved_text = response.choices[0].message.content or ""
@@ -160,29 +312,46 @@ Retorne apenas o texto melhorado, sem explicações."""
             logger.error("❌ Erro ao gerar sugestão: %s", exc)
             raise
 
-    async def chat_about_project(
-        self,
+    @staticmethod
+    def _build_chat_messages(
         message: str,
-        project_context: Dict[str, str],
+        project_context: Dict[str, Any],
         conversation_history: Optional[List[Dict[str, str]]] = None,
-    ) -> Dict[str, Any]:
-        """Executa chat contextualizado sobre o projeto."""
-        messages: List[Dict[str, str]] = [
-            {
-                "role": "system",
-                "content": (
-                    "Você é um assistente especialista em PRONAS/PCD.\n"
-                    f"Você está ajudando com o projeto: {project_context.get('title', '')}\n\n"
-                    "Informações do projeto:\n"
-                    f"- Descrição: {project_context.get('description', 'N/A')}\n"
-                    f"- Instituição: {project_context.get('institution', 'N/A')}\n\n"
-                    "Seja helpful, específico e sempre refira-se ao contexto do projeto."
-                ),
-            }
-        ]
+    ) -> List[Dict[str, str]]:
+        """
+        Monta a lista de mensagens do chat (system + resumo/histórico + pergunta).
+        `project_context["retrieved"]` traz os trechos do projeto recuperados
+        por similaridade (RAG) para fundamentar a resposta.
+        """
+        project_info = trim_to_tokens(
+            f"Você está ajudando com o projeto: {project_context.get('title', '')}\n\n"
+            "Informações do projeto:\n"
+            f"- Instituição: {project_context.get('institution', 'N/A')}\n"
+            f"- Descrição: {project_context.get('description', 'N/A')}",
+            section_budget("system"),
+        )
+        system_content = (
+            "Você é um assistente especialista em PRONAS/PCD.\n"
+            f"{project_info}\n\n"
+            "Seja helpful, específico e sempre refira-se ao contexto do projeto."
+        )
+
+        retrieved = project_context.get("retrieved") or []
+        if retrieved:
+            excerpts = "\n\n".join(
+                f"[{chunk.get('title') or chunk.get('source')}]\n{chunk.get('text', '')}"
+                for chunk in retrieved
+            )
+            system_content += (
+                "\n\nTrechos relevantes do projeto (baseie a resposta neles e cite a seção):\n"
+                f"{trim_to_tokens(excerpts, section_budget('retrieved'))}"
+            )
 
+        messages: List[Dict[str, str]] = [{"role": "system", "content": system_content}]
+
+        # Histórico já limitado ao orçamento de tokens pelo ConversationService
         if conversation_history:
-            for entry in conversation_history[-5:]:
+            for entry in conversation_history:
                 messages.append(
                     {
                         "role": entry.get("role", "user"),
@@ -190,14 +359,24 @@ Retorne apenas o texto melhorado, sem explicações."""
                     }
                 )
 
-        messages.append({"role": "user", "content": message})
+        messages.append({"role": "user", "content": trim_to_tokens(message, section_budget("content"))})
+        return messages
+
+    async def chat_about_project(
+        self,
+        message: str,
+        project_context: Dict[str, Any],
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+    ) -> Dict[str, Any]:
+        """Executa chat contextualizado sobre o projeto."""
+        messages = self._build_chat_messages(message, project_context, conversation_history)
 
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
+            response = await self._complete(
+                "chat_about_project",
                 messages=messages,
                 temperature=0.7,
-                max_tokens=2000,
+                max_tokens=PromptBudget("openai", self.CHAT_MAX_TOKENS).output_tokens(messages),
             )
 
             assistant_message = response.choices[0].message.content or ""
@@ -211,6 +390,139 @@ Retorne apenas o texto melhorado, sem explicações."""
             logger.error("❌ Erro no chat: %s", exc)
             raise
 
+    async def stream_chat_about_project(
+        self,
+        message: str,
+        project_context: Dict[str, Any],
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Versão em streaming do chat: emite eventos `token` conforme o modelo
+        gera e um evento final `done` com sugestões, referências e métricas
+        (time-to-first-token e tempo total em ms).
+        """
+        messages = self._build_chat_messages(message, project_context, conversation_history)
+        started = time.perf_counter()
+        ttft_ms: Optional[int] = None
+        parts: List[str] = []
+
+        limiter = rate_limiters["openai"]
+        max_tokens = PromptBudget("openai", self.CHAT_MAX_TOKENS).output_tokens(messages)
+        reserved = self._reserve_tokens(messages, max_tokens)
+
+        request = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": 0.7,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+
+        # O circuito cobre a iteração inteira: erros no meio do stream também
+        # contam como falha do provedor
+        stream = None
+        completed = False
+        try:
+            async with circuit_breakers["openai"].guard():
+                stream = await limiter.run(
+                    lambda: get_llm_backend().call(
+                        "openai",
+                        "stream_chat_about_project",
+                        request,
+                        lambda: self.client.chat.completions.create(**request),
+                    ),
+                    reserve_tokens=reserved,
+                    is_retryable=is_retryable_error,
+                    retry_after=retry_after_seconds,
+                )
+
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if ttft_ms is None:
+                        ttft_ms = int((time.perf_counter() - started) * 1000)
+                        logger.info("⚡ Chat streaming: primeiro token em %sms", ttft_ms)
+                    parts.append(delta)
+                    yield {"type": "token", "content": delta}
+            completed = True
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("❌ Erro no chat streaming: %s", exc)
+            raise
+        finally:
+            # Concilia a reserva com o consumo estimado também quando o stream
+            # é interrompido (erro, cancelamento ou cliente desconectado); sem
+            # stream criado, a reserva não foi feita ou a requisição falhou
+            assistant_message = "".join(parts)
+            total_ms = int((time.perf_counter() - started) * 1000)
+            if stream is not None:
+                # Respostas em streaming não trazem `usage` nesta versão do SDK
+                prompt_tokens = estimate_tokens("".join(m["content"] for m in messages))
+                completion_tokens = estimate_tokens(assistant_message)
+                await limiter.refund(reserved - prompt_tokens - completion_tokens)
+                record_call(
+                    "openai",
+                    "stream_chat_about_project",
+                    self.model,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    duration_ms=total_ms,
+                    estimated=True,
+                )
+            if stream is not None and not completed:
+                logger.warning(
+                    "⚠️ Chat streaming interrompido após %s caracteres", len(assistant_message)
+                )
+
+        logger.info("✅ Chat streaming respondido (ttft=%sms, total=%sms)", ttft_ms, total_ms)
+        yield {
+            "type": "done",
+            "message": assistant_message,
+            "suggestions": self._extract_suggestions(assistant_message),
+            "references": self._extract_references(assistant_message),
+            "ttft_ms": ttft_ms,
+            "total_ms": total_ms,
+        }
+
+    async def summarize_conversation(
+        self,
+        previous_summary: Optional[str],
+        messages: List[Dict[str, str]],
+    ) -> str:
+        """Incorpora mensagens antigas do chat ao resumo acumulado da conversa."""
+        transcript = "\n".join(
+            f"{'Usuário' if message['role'] == 'user' else 'Assistente'}: {message['content']}"
+            for message in messages
+        )
+        prompt = f"""Atualize o resumo de uma conversa sobre um projeto PRONAS/PCD.
+
+RESUMO ATUAL:
+{previous_summary or "(vazio)"}
+
+NOVAS MENSAGENS:
+{trim_to_tokens(transcript, section_budget("history"))}
+
+Escreva um único resumo atualizado, em tópicos curtos, preservando decisões,
+dados do projeto citados, pendências e preferências do usuário. Descarte
+cumprimentos e repetições. Retorne apenas o resumo."""
+
+        try:
+            response = await self._complete(
+                "summarize_conversation",
+                messages=[
+                    {"role": "system", "content": "Especialista em PRONAS/PCD."},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS,
+            )
+            return (response.choices[0].message.content or "").strip()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("❌ Erro ao resumir conversa: %s", exc)
+            raise
+
     @staticmethod
     def _extract_suggestions(text: str) -> List[str]:
         """Extrai sugestões simples da resposta do modelo."""
@@ -232,3 +544,8 @@ Retorne apenas o texto melhorado, sem explicações."""
         if "anexo" in normalized:
             references.append("Anexos do projeto")
         return references
+
+
+def get_openai_service() -> OpenAIService:
+    """Dependência FastAPI: OpenAIService sobre o cliente compartilhado do worker."""
+    return OpenAIService(get_openai_client())
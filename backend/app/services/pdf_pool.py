@@ -0,0 +1,287 @@
+"""
+Pool de Processos para PDFs
+Extração de texto/tabelas com pdfplumber roda em processos separados: o
+event loop não trava durante segundos de CPU, cada job tem timeout e um
+processo que trava ou morre não derruba o worker da API
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import math
+import multiprocessing
+
+from app.config import settings
+from app.services.pdf_processor import PDFPage, PDFProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class PDFProcessingError(Exception):
+    """O processo de extração morreu ou o pool foi reiniciado durante o job."""
+
+
+class PDFTimeoutError(PDFProcessingError):
+    """A extração excedeu PDF_POOL_TIMEOUT_SECONDS."""
+
+
+def page_ranges(page_count: int, shards: int, min_pages: int) -> List[Tuple[int, int]]:
+    """
+    Divide as páginas 1..page_count em até `shards` faixas contíguas
+    (inclusive) de pelo menos `min_pages` páginas cada.
+    """
+    size = max(1, min_pages, math.ceil(page_count / max(1, shards)))
+    return [
+        (first, min(first + size - 1, page_count))
+        for first in range(1, page_count + 1, size)
+    ]
+
+
+def _warm_up() -> None:
+    """Importa o processador no filho (pacote app.services leva ~2s a carregar)."""
+    import app.services.pdf_processor  # noqa: F401
+
+
+class PDFWorkerPool:
+    """
+    ProcessPoolExecutor limitado, iniciado e encerrado pelo lifespan da
+    aplicação. Jobs que estouram o timeout têm o processo encerrado (o pool
+    é recriado); jobs atingidos por um crash de outro são repetidos uma vez.
+    """
+
+    def __init__(self, max_workers: int, timeout: float, max_tasks_per_child: int):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child or None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+        self._restarts = 0
+        self._timeouts = 0
+
+    def start(self) -> None:
+        """Cria o pool (idempotente) e aquece os processos em segundo plano."""
+        if self._executor is not None:
+            return
+        # spawn: o filho não herda event loop, threads nem conexões do pai
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+        # Sobe os processos já, fora do timeout do primeiro job
+        for _ in range(self.max_workers):
+            self._executor.submit(_warm_up)
+        logger.info("📄 Pool de PDFs iniciado com %s processos", self.max_workers)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Executa `func(*args)` em um processo do pool e aguarda o resultado.
+        `func` precisa ser importável (função de módulo ou staticmethod).
+        """
+        try:
+            return await self._run_once(func, *args)
+        except BrokenProcessPool:
+            # Outro job derrubou o pool (crash ou timeout): tenta no pool novo
+            logger.warning("⚠️ Pool de PDFs reiniciado durante o job; repetindo %s", func.__name__)
+            try:
+                return await self._run_once(func, *args)
+            except BrokenProcessPool as exc:
+                raise PDFProcessingError(
+                    "O processo de extração do PDF foi encerrado inesperadamente"
+                ) from exc
+
+    async def extract_text(self, file_path: str) -> Optional[str]:
+        """
+        Extrai o texto de um PDF dividindo as páginas em faixas processadas em
+        paralelo pelos processos do pool; as faixas são concatenadas em ordem,
+        com os marcadores de página. PDFs pequenos vão inteiros para um só job.
+        """
+        page_count = await self.run(PDFProcessor.count_pages, file_path)
+        ranges = page_ranges(page_count, self.max_workers, settings.PDF_SHARD_MIN_PAGES)
+        if len(ranges) <= 1:
+            return await self.run(PDFProcessor.extract_text_from_pdf, file_path)
+
+        logger.info(
+            "📄 Processando PDF: %s (%s páginas em %s faixas)",
+            file_path, page_count, len(ranges),
+        )
+        parts = await asyncio.gather(*(
+            self.run(PDFProcessor.extract_text_range, file_path, first, last)
+            for first, last in ranges
+        ))
+        text = "".join(parts)
+
+        if not text.strip():
+            logger.warning(f"⚠️ Nenhum texto extraído do PDF: {file_path}")
+            return None
+
+        logger.info(f"✅ Texto extraído: {len(text)} caracteres")
+        return text
+
+    async def stream_pages(
+        self,
+        file_path: str,
+        text: bool = True,
+        tables: bool = False,
+    ) -> AsyncIterator[PDFPage]:
+        """
+        Entrega as páginas em ordem, lidas em lotes de PDF_STREAM_BATCH_PAGES
+        pelos processos do pool: a primeira página sai assim que o primeiro
+        lote termina, e no máximo `max_workers` lotes ficam à frente do
+        consumidor (a memória depende do lote, não do documento).
+        """
+        page_count = await self.run(PDFProcessor.count_pages, file_path)
+        batch = max(1, settings.PDF_STREAM_BATCH_PAGES)
+        pending: Deque[asyncio.Future] = deque()
+
+        try:
+            for first, last in page_ranges(page_count, page_count, batch):
+                pending.append(asyncio.ensure_future(
+                    self.run(PDFProcessor.read_pages, file_path, first, last, text, tables)
+                ))
+                if len(pending) >= self.max_workers:
+                    for page in await pending.popleft():
+                        yield page
+            while pending:
+                for page in await pending.popleft():
+                    yield page
+        finally:
+            # Consumidor parou antes do fim: descarta os lotes adiantados
+            for future in pending:
+                future.cancel()
+
+    async def _run_once(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        loop = asyncio.get_running_loop()
+        self._running += 1
+        try:
+            executor = self._healthy_executor()
+            future = executor.submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # A vaga só é liberada quando o processo termina o job, mesmo se o
+        # chamador desistir antes
+        future.add_done_callback(lambda _: self._release_from_thread(loop))
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            logger.error("⏱️ %s excedeu %ss; reiniciando o pool de PDFs", func.__name__, self.timeout)
+            self._restart(executor)
+            raise PDFTimeoutError(
+                f"Tempo limite de {self.timeout:.0f}s excedido ao processar o PDF"
+            )
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Jobs abandonados podem terminar depois do encerramento do loop
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(self._release)
+
+    def _release(self) -> None:
+        self._running -= 1
+        self._semaphore.release()
+
+    def _healthy_executor(self) -> ProcessPoolExecutor:
+        """Pool atual, recriado se um crash anterior o deixou quebrado."""
+        if self._executor is not None and getattr(self._executor, "_broken", False):
+            logger.warning("⚠️ Pool de PDFs quebrado por um processo que morreu; recriando")
+            self._restart(self._executor)
+        self.start()
+        return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Descarta `executor` (se ainda for o atual) e cria um pool novo."""
+        if self._executor is not executor:
+            return
+        self._restarts += 1
+        # Um processo travado em C não atende cancelamento: encerra-o antes
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.start()
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado atual do pool (para /health e monitoramento)."""
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self._running,
+            "queue_depth": self._waiting,
+            "timeout_seconds": self.timeout,
+            "timeouts": self._timeouts,
+            "restarts": self._restarts,
+        }
+
+
+class PageFeed:
+    """
+    Lê as páginas de um PDF uma única vez, em tarefa própria, e entrega o
+    texto de cada uma a um consumidor (ex.: a análise em trechos) assim que
+    chega, guardando-o para persistir o texto completo no fim. A leitura
+    segue até o fim mesmo que o consumidor desista.
+    """
+
+    def __init__(self, pages: AsyncIterator[PDFPage]):
+        self._parts: List[str] = []
+        self._queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._pump(pages))
+
+    async def _pump(self, pages: AsyncIterator[PDFPage]) -> None:
+        try:
+            async for page in pages:
+                part = page.render()
+                if part:
+                    self._parts.append(part)
+                    self._queue.put_nowait(part)
+        except PDFProcessingError:
+            raise
+        except Exception as exc:
+            # Arquivo inválido ou corrompido (erros do pdfminer vindos do processo)
+            raise PDFProcessingError(str(exc) or exc.__class__.__name__) from exc
+        finally:
+            self._queue.put_nowait(None)
+
+    async def parts(self) -> AsyncIterator[str]:
+        """Texto de cada página em ordem (um único consumidor); relança o erro da leitura."""
+        while (part := await self._queue.get()) is not None:
+            yield part
+        await self._task
+
+    async def text(self) -> Optional[str]:
+        """Texto completo, como PDFWorkerPool.extract_text (None se o PDF não tem texto)."""
+        await self._task
+        text = "".join(self._parts)
+        if not text.strip():
+            return None
+        logger.info(f"✅ Texto extraído: {len(text)} caracteres")
+        return text
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+pdf_pool = PDFWorkerPool(
+    settings.PDF_POOL_WORKERS,
+    settings.PDF_POOL_TIMEOUT_SECONDS,
+    settings.PDF_POOL_MAX_TASKS_PER_CHILD,
+)
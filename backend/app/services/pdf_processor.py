@@ -1,110 +1,227 @@
 """
 Serviço de Processamento de PDFs
+Uma única leitura com pdfplumber (PDFProcessor.ingest) produz texto,
+tabelas, metadados e validade; os demais métodos são visões sobre ela.
+PDFProcessor.iter_pages entrega as páginas uma a uma, à medida que são lidas
 """
 
-import PyPDF2
 import pdfplumber
-from pathlib import Path
+from pdfminer.pdftypes import resolve1
+from dataclasses import dataclass, field
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Sequence
 
 logger = logging.getLogger(__name__)
 
+# Separador entre páginas no texto extraído (numeração a partir de 1)
+PAGE_MARKER = "\n--- PÁGINA {number} ---\n"
+
+# Campos do dicionário de informações do PDF expostos em `metadata`
+METADATA_FIELDS = ("Title", "Author", "Subject", "Creator", "Producer")
+
+Table = List[List[Optional[str]]]
+
+
+@dataclass
+class PDFPage:
+    """Uma página lida do PDF"""
+    number: int  # a partir de 1
+    text: str = ""
+    tables: List[Table] = field(default_factory=list)
+
+    def render(self) -> str:
+        """Texto da página precedido do marcador ("" se a página não tem texto)"""
+        if not self.text:
+            return ""
+        return PAGE_MARKER.format(number=self.number) + self.text
+
+
+@dataclass
+class PDFDocument:
+    """Resultado de PDFProcessor.ingest"""
+    file_path: str
+    valid: bool
+    page_count: int = 0  # total do documento, mesmo em leituras parciais
+    pages: List[PDFPage] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    exception: Optional[BaseException] = field(default=None, repr=False)
+
+    @property
+    def text(self) -> str:
+        """Texto com os marcadores de página (páginas sem texto são omitidas)"""
+        return "".join(page.render() for page in self.pages)
+
+    @property
+    def tables(self) -> List[Dict[str, Any]]:
+        """Tabelas de todas as páginas como {"page", "data"}"""
+        return [
+            {"page": page.number, "data": table}
+            for page in self.pages
+            for table in page.tables
+        ]
+
+    def raise_for_error(self) -> None:
+        """Relança o erro da leitura, se houve"""
+        if self.exception is not None:
+            raise self.exception
+
+
+def _read_pages(pdf: pdfplumber.PDF, text: bool, tables: bool) -> Iterator[PDFPage]:
+    """
+    Páginas de um PDF aberto, uma por vez. Texto e tabelas da mesma página
+    reaproveitam os objetos já interpretados; o cache da página é liberado
+    antes da próxima, então a memória depende do tamanho da página
+    """
+    for page in pdf.pages:
+        result = PDFPage(
+            number=page.page_number,
+            text=(page.extract_text() or "") if text else "",
+            tables=page.extract_tables() if tables else [],
+        )
+        page.flush_cache()
+        yield result
+
+
 class PDFProcessor:
     """Processador de arquivos PDF"""
-    
+
     @staticmethod
-    def extract_text_from_pdf(file_path: str) -> Optional[str]:
+    def iter_pages(
+        file_path: str,
+        pages: Optional[Sequence[int]] = None,
+        text: bool = True,
+        tables: bool = True,
+    ) -> Iterator[PDFPage]:
         """
-        Extrai texto de um PDF usando pdfplumber
+        Gera as páginas do PDF à medida que são lidas (mesmos filtros de
+        ingest); erros de leitura são lançados pelo próprio gerador
+        """
+        with pdfplumber.open(file_path, pages=pages) as pdf:
+            yield from _read_pages(pdf, text, tables)
+
+    @staticmethod
+    def read_pages(
+        file_path: str,
+        first_page: int,
+        last_page: int,
+        text: bool = True,
+        tables: bool = True,
+    ) -> List[PDFPage]:
+        """
+        Páginas first_page..last_page (inclusive, a partir de 1); unidade de
+        trabalho dos jobs de streaming do pool de PDFs
+        """
+        return list(PDFProcessor.iter_pages(
+            file_path, pages=range(first_page, last_page + 1), text=text, tables=tables
+        ))
+
+    @staticmethod
+    def ingest(
+        file_path: str,
+        pages: Optional[Sequence[int]] = None,
+        text: bool = True,
+        tables: bool = True,
+    ) -> PDFDocument:
+        """
+        Lê o PDF uma única vez: páginas (texto e tabelas), metadados e
+        validade. `pages` restringe a leitura a essas páginas (a partir de 1;
+        lista vazia lê só a estrutura) e `text`/`tables` desligam extrações
+        que o chamador não usa. Erros de leitura não são lançados: voltam
+        com valid=False.
         """
         try:
-            text = ""
-            
-            with pdfplumber.open(file_path) as pdf:
-                logger.info(f"📄 Processando PDF: {file_path} ({len(pdf.pages)} páginas)")
-                
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += f"\n--- PÁGINA {page_num} ---\n{page_text}"
-            
-            if not text.strip():
-                logger.warning(f"⚠️ Nenhum texto extraído do PDF: {file_path}")
-                return None
-            
-            logger.info(f"✅ Texto extraído: {len(text)} caracteres")
-            
-            return text
-            
+            with pdfplumber.open(file_path, pages=pages) as pdf:
+                info = pdf.metadata or {}
+                page_count = int(resolve1(pdf.doc.catalog["Pages"]).get("Count", 0))
+                document = PDFDocument(
+                    file_path=file_path,
+                    valid=page_count > 0,
+                    page_count=page_count,
+                    metadata={name.lower(): info.get(name) for name in METADATA_FIELDS},
+                    error=None if page_count > 0 else "PDF sem páginas",
+                )
+                document.metadata["pages"] = page_count
+                document.pages.extend(_read_pages(pdf, text, tables))
+
+            return document
+
         except Exception as e:
-            logger.error(f"❌ Erro ao extrair texto do PDF: {e}")
-            raise
-    
+            logger.error(f"❌ Erro ao ler PDF {file_path}: {e}")
+            return PDFDocument(file_path=file_path, valid=False, error=str(e), exception=e)
+
     @staticmethod
-    def extract_tables_from_pdf(file_path: str) -> List[List[Dict[str, Any]]]:
+    def extract_text_from_pdf(file_path: str) -> Optional[str]:
+        """
+        Extrai texto de um PDF usando pdfplumber
+        """
+        document = PDFProcessor.ingest(file_path, tables=False)
+        document.raise_for_error()
+        logger.info(f"📄 Processando PDF: {file_path} ({document.page_count} páginas)")
+
+        text = document.text
+        if not text.strip():
+            logger.warning(f"⚠️ Nenhum texto extraído do PDF: {file_path}")
+            return None
+
+        logger.info(f"✅ Texto extraído: {len(text)} caracteres")
+
+        return text
+
+    @staticmethod
+    def count_pages(file_path: str) -> int:
+        """
+        Número de páginas (lê só a árvore de páginas, sem extrair conteúdo)
+        """
+        document = PDFProcessor.ingest(file_path, pages=[], text=False, tables=False)
+        document.raise_for_error()
+        return document.page_count
+
+    @staticmethod
+    def extract_text_range(file_path: str, first_page: int, last_page: int) -> str:
+        """
+        Extrai o texto das páginas first_page..last_page (inclusive, a partir
+        de 1) com os mesmos marcadores de extract_text_from_pdf; concatenar as
+        faixas em ordem reproduz a extração completa
+        """
+        return "".join(
+            page.render()
+            for page in PDFProcessor.iter_pages(
+                file_path, pages=range(first_page, last_page + 1), tables=False
+            )
+        )
+
+    @staticmethod
+    def extract_tables_from_pdf(file_path: str) -> List[Dict[str, Any]]:
         """
         Extrai tabelas de um PDF
         """
-        try:
-            tables = []
-            
-            with pdfplumber.open(file_path) as pdf:
-                for page_num, page in enumerate(pdf.pages, 1):
-                    page_tables = page.extract_tables()
-                    if page_tables:
-                        for table in page_tables:
-                            tables.append({
-                                "page": page_num,
-                                "data": table
-                            })
-            
-            logger.info(f"✅ {len(tables)} tabelas extraídas")
-            
-            return tables
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao extrair tabelas do PDF: {e}")
-            raise
-    
+        document = PDFProcessor.ingest(file_path, text=False)
+        document.raise_for_error()
+
+        tables = document.tables
+        logger.info(f"✅ {len(tables)} tabelas extraídas")
+
+        return tables
+
     @staticmethod
     def extract_metadata_from_pdf(file_path: str) -> Dict[str, Any]:
         """
         Extrai metadados do PDF
         """
-        try:
-            metadata = {}
-            
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                
-                if reader.metadata:
-                    metadata = {
-                        "title": reader.metadata.get("/Title"),
-                        "author": reader.metadata.get("/Author"),
-                        "subject": reader.metadata.get("/Subject"),
-                        "creator": reader.metadata.get("/Creator"),
-                        "producer": reader.metadata.get("/Producer"),
-                        "pages": len(reader.pages)
-                    }
-            
-            logger.info(f"✅ Metadados extraídos do PDF")
-            
-            return metadata
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao extrair metadados: {e}")
-            raise
-    
+        document = PDFProcessor.ingest(file_path, pages=[], text=False, tables=False)
+        document.raise_for_error()
+
+        logger.info(f"✅ Metadados extraídos do PDF")
+
+        return document.metadata
+
     @staticmethod
     def validate_pdf(file_path: str) -> bool:
         """
         Valida se o PDF é válido
         """
-        try:
-            with open(file_path, 'rb') as f:
-                reader = PyPDF2.PdfReader(f)
-                return len(reader.pages) > 0
-        except Exception as e:
-            logger.error(f"❌ PDF inválido: {e}")
-            return False
+        document = PDFProcessor.ingest(file_path, pages=[], text=False, tables=False)
+        if not document.valid:
+            logger.error(f"❌ PDF inválido: {document.error}")
+        return document.valid
@@ -10,12 +10,16 @@ from sqlalchemy import select
 from datetime import datetime
 import logging
 
+from app.db.database import release_connection
 from app.models.project import Project, ProjectStatus
 from app.models.ai_analysis import AIAnalysis, AIProvider, AnalysisType
 from app.models.document import Document
 from app.services.openai_service import OpenAIService
 from app.services.gemini_service import GeminiService
+from app.services.compliance_engine import ComplianceEngine, ComplianceReport
+from app.services.incremental_analysis import IncrementalAnalysisService
 from app.services.notification_service import NotificationService
+from app.services.usage_service import UsageService, track_usage
 from app.models.notification import NotificationType, NotificationSeverity
 
 logger = logging.getLogger(__name__)
@@ -88,42 +92,66 @@ class ProjectService:
             if not project:
                 raise ValueError("Projeto não encontrado")
 
-            # Preparar texto
-            project_text = project.content.get("text", "") if project.content else ""
-            if not project_text:
-                project_text = project.description or project.title
-
-            # Análise com OpenAI
-            openai_service = OpenAIService()
-            openai_result = await openai_service.analyze_project(project_text)
-
-            # Análise com Gemini
-            gemini_service = GeminiService()
-            gemini_result = await gemini_service.analyze_text(project_text)
-
-            # Salvar análises
-            openai_analysis = AIAnalysis(
-                project_id=project_id,
-                provider=AIProvider.OPENAI,
-                analysis_type=AnalysisType.FULL_PROJECT,
-                result=openai_result,
-                score=openai_result.get("score", 0),
+            # Regras locais antes de qualquer chamada paga
+            report = ComplianceEngine.precheck(project)
+            if report is not None and report.blocking:
+                return await ProjectService._store_local_analysis(db, project, report)
+
+            # Seções do projeto (com as perguntas em aberto) e a análise anterior
+            sections = ComplianceEngine.sections_for_llm(project, report)
+            previous_sections = await IncrementalAnalysisService.load_previous_sections(db, project_id)
+
+            # Liberar a conexão do pool enquanto aguarda os provedores
+            await release_connection(db)
+
+            # Apenas seções alteradas vão para OpenAI e Gemini (em paralelo)
+            with track_usage() as usage:
+                combined = await IncrementalAnalysisService.analyze_project(
+                    sections,
+                    previous_sections,
+                    OpenAIService(),
+                    GeminiService(),
+                )
+            openai_result = combined["openai"]
+            gemini_result = combined["gemini"]
+
+            # Salvar análises dos provedores que concluíram (transação curta)
+            if openai_result is not None:
+                db.add(AIAnalysis(
+                    project_id=project_id,
+                    provider=AIProvider.OPENAI,
+                    analysis_type=AnalysisType.FULL_PROJECT,
+                    result=openai_result,
+                    score=openai_result.get("score", 0),
+                    critical_issues=(
+                        openai_result.get("critical_issues", []) + (report.issues() if report else [])
+                    ),
+                    section_hashes=combined["section_hashes"],
+                    section_results=combined["section_results"],
+                    tokens_used=usage.total_tokens("openai"),
+                    processing_time=usage.elapsed_ms,
+                ))
+
+            if gemini_result is not None:
+                db.add(AIAnalysis(
+                    project_id=project_id,
+                    provider=AIProvider.GEMINI,
+                    analysis_type=AnalysisType.FULL_PROJECT,
+                    result=gemini_result,
+                    score=gemini_result.get("score", 0),
+                    section_hashes=combined["section_hashes"],
+                    section_results=combined["section_results"],
+                    tokens_used=usage.total_tokens("gemini"),
+                    processing_time=usage.elapsed_ms,
+                ))
+
+            UsageService.add_events(
+                db, usage, AnalysisType.FULL_PROJECT.value, project_id, project.user_id
             )
 
-            gemini_analysis = AIAnalysis(
-                project_id=project_id,
-                provider=AIProvider.GEMINI,
-                analysis_type=AnalysisType.FULL_PROJECT,
-                result=gemini_result,
-                score=gemini_result.get("score", 0),
-            )
-
-            db.add(openai_analysis)
-            db.add(gemini_analysis)
+            # Score do projeto considera apenas os provedores que concluíram
+            project.combined_score = combined["combined_score"]
             await db.commit()
-
-            # Atualizar score do projeto
-            await ProjectService.update_project_score(db, project_id)
             await db.refresh(project)
 
             logger.info(f"✅ Análise automática concluída: {project_id}")
@@ -139,6 +167,7 @@ class ProjectService:
                     "project_id": str(project.id),
                     "combined_score": project.combined_score,
                     "analysis_type": "auto",
+                    "partial": combined["partial"],
                 },
                 action_url=f"/dashboard/projects/{project.id}?tab=analysis",
             )
@@ -146,13 +175,65 @@ class ProjectService:
             return {
                 "openai": openai_result,
                 "gemini": gemini_result,
-                "combined_score": project.combined_score
+                "combined_score": project.combined_score,
+                "partial": combined["partial"],
+                "errors": combined["errors"],
+                "sections_analyzed": combined["sections_analyzed"],
+                "sections_reused": combined["sections_reused"],
+                "compliance_precheck": report.to_dict() if report else None,
             }
 
         except Exception as e:
             logger.error(f"❌ Erro na análise automática: {e}")
             raise
 
+    @staticmethod
+    async def _store_local_analysis(
+        db: AsyncSession,
+        project: Project,
+        report: ComplianceReport,
+    ) -> Dict[str, Any]:
+        """
+        Persiste o resultado da pré-validação de um projeto com pendências
+        bloqueantes (nenhuma chamada aos LLMs)
+        """
+        ai_analysis = ComplianceEngine.local_analysis(project, report)
+        project.combined_score = ai_analysis.score
+        db.add(ai_analysis)
+        await db.commit()
+
+        logger.info(
+            f"🧾 Análise por IA dispensada: {project.id} com {len(report.findings)} pendências locais"
+        )
+
+        await NotificationService.create_notification(
+            db,
+            user_id=project.user_id,
+            title="Pendências obrigatórias no projeto",
+            message=f"O projeto \"{project.title}\" precisa de correções antes da análise por IA.",
+            notification_type=NotificationType.AI_ANALYSIS_COMPLETED,
+            severity=NotificationSeverity.WARNING,
+            data={
+                "project_id": str(project.id),
+                "combined_score": ai_analysis.score,
+                "analysis_type": "auto",
+                "blocking": True,
+            },
+            action_url=f"/dashboard/projects/{project.id}?tab=analysis",
+        )
+
+        return {
+            "openai": None,
+            "gemini": None,
+            "local": ai_analysis.result,
+            "combined_score": ai_analysis.score,
+            "partial": False,
+            "errors": {},
+            "sections_analyzed": [],
+            "sections_reused": [],
+            "compliance_precheck": report.to_dict(),
+        }
+
     @staticmethod
     async def get_project_summary(
         db: AsyncSession,
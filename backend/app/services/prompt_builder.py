@@ -0,0 +1,117 @@
+"""
+Montagem de Prompts por Orçamento de Tokens
+Cada seção do prompt (system, context, content, history, retrieved) tem um
+orçamento em tokens; textos maiores são cortados em fim de parágrafo, linha
+ou frase, e o `max_tokens` da resposta vem do que sobra na janela da chamada
+"""
+
+from typing import Dict, List, Optional, Union
+import logging
+import re
+
+from app.config import settings
+from app.services.tokenizer import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+TRUNCATION_MARKER = "\n[...]"
+
+# Fronteiras preferidas para o corte, da mais forte para a mais fraca
+_BOUNDARIES = (
+    re.compile(r"\n\s*\n"),          # parágrafo
+    re.compile(r"\n"),               # linha (ex.: linhas de tabela)
+    re.compile(r"(?<=[.!?;])\s+"),   # frase
+    re.compile(r"\s+"),              # palavra
+)
+
+# Só recua até uma fronteira se ela preservar ao menos esta fração do prefixo
+MIN_KEEP_RATIO = 0.6
+
+# Tokens extras por mensagem do chat (papel e delimitadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def section_budget(section: str) -> int:
+    """Orçamento configurado de uma seção do prompt."""
+    return {
+        "system": settings.PROMPT_SYSTEM_TOKEN_BUDGET,
+        "context": settings.PROMPT_CONTEXT_TOKEN_BUDGET,
+        "content": settings.PROMPT_CONTENT_TOKEN_BUDGET,
+        "history": settings.CHAT_HISTORY_TOKEN_BUDGET,
+        "retrieved": settings.RAG_CONTEXT_TOKEN_BUDGET,
+    }[section]
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Mantém o início de `text` dentro de `max_tokens`, cortando na fronteira
+    mais forte próxima do limite e sinalizando o corte com TRUNCATION_MARKER.
+    """
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - count_tokens(TRUNCATION_MARKER)
+    prefix = truncate_tokens(text, budget)
+    minimum = int(len(prefix) * MIN_KEEP_RATIO)
+    for boundary in _BOUNDARIES:
+        cut = None
+        for match in boundary.finditer(prefix):
+            cut = match.start()
+        if cut is not None and cut >= minimum:
+            prefix = prefix[:cut]
+            break
+    return prefix.rstrip() + TRUNCATION_MARKER
+
+
+def messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """Tokens de uma lista de mensagens do chat, incluindo o overhead de cada uma."""
+    return sum(
+        count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+        for message in messages
+    )
+
+
+class PromptBudget:
+    """
+    Orçamento de uma chamada: janela total (limitada por
+    PROMPT_TOTAL_TOKEN_BUDGET), seções do prompt e tokens de resposta.
+    """
+
+    CONTEXT_WINDOWS = {
+        "openai": lambda: settings.OPENAI_CONTEXT_WINDOW,
+        "gemini": lambda: settings.GEMINI_CONTEXT_WINDOW,
+    }
+
+    def __init__(self, provider: str, max_output_tokens: int):
+        self.provider = provider
+        self.total = min(self.CONTEXT_WINDOWS[provider](), settings.PROMPT_TOTAL_TOKEN_BUDGET)
+        self.max_output_tokens = max_output_tokens
+        self.used: Dict[str, int] = {}
+        self.trimmed: List[str] = []
+
+    def fit(self, section: str, text: Optional[str], budget: Optional[int] = None) -> str:
+        """Ajusta o texto de uma seção ao seu orçamento."""
+        limit = section_budget(section) if budget is None else budget
+        fitted = trim_to_tokens(text or "", limit)
+        self.used[section] = count_tokens(fitted)
+        if len(fitted) < len(text or ""):
+            self.trimmed.append(section)
+            # Histórico e trechos recuperados são cortados por rotina; o
+            # conteúdo analisado cortado significa texto que o modelo não viu
+            log = logger.warning if section == "content" else logger.debug
+            log("✂️ Seção '%s' cortada para %s tokens (%s)", section, self.used[section], self.provider)
+        return fitted
+
+    def output_tokens(self, prompt: Union[str, List[Dict[str, str]]]) -> int:
+        """
+        `max_tokens` da resposta: o desejado, limitado ao que resta da janela
+        depois do prompt (nunca abaixo de PROMPT_MIN_OUTPUT_TOKENS).
+        """
+        if isinstance(prompt, str):
+            prompt_tokens = count_tokens(prompt)
+        else:
+            prompt_tokens = messages_tokens(prompt)
+        remaining = self.total - prompt_tokens
+        return max(settings.PROMPT_MIN_OUTPUT_TOKENS, min(self.max_output_tokens, remaining))
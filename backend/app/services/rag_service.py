@@ -0,0 +1,292 @@
+"""
+RAG do Chat de Projetos
+Indexa conteúdo, anexos e textos de documentos em trechos com embedding
+(pgvector) e recupera os mais relevantes para cada pergunta dentro de um
+orçamento de tokens
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+import hashlib
+import logging
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, text
+
+from app.config import settings
+from app.db.database import release_connection
+from app.models.document import Document
+from app.models.job import Job, JobType
+from app.models.project import Project
+from app.models.project_chunk import ProjectChunk
+from app.services.chunked_analysis import split_into_chunks
+from app.services.embeddings import get_embedding_backend
+from app.services.incremental_analysis import PROJECT_SECTIONS, extract_sections
+from app.services.job_service import JobService
+from app.services.usage_service import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SECTION_TITLES = dict(PROJECT_SECTIONS)
+
+# Candidatos avaliados pelo HNSW por consulta; o filtro por projeto é aplicado
+# depois da busca no índice, então o valor padrão (40) pode devolver poucos trechos
+HNSW_EF_SEARCH = 200
+
+
+@dataclass
+class PendingChunk:
+    """Trecho desejado no índice e ainda não indexado."""
+    source: str
+    title: str
+    chunk_index: int
+    text: str
+    content_hash: str
+    document_id: Optional[UUID] = None
+
+
+@dataclass
+class IndexPlan:
+    """Diferença entre o índice atual do projeto e o conteúdo atual."""
+    project_id: UUID
+    backend: str
+    missing: List[PendingChunk] = field(default_factory=list)
+    stale_ids: List[UUID] = field(default_factory=list)
+    kept: int = 0
+
+
+class RAGService:
+    """Indexação e recuperação de trechos do projeto para o chat."""
+
+    @staticmethod
+    def _sources(
+        project: Project,
+        documents: List[Document],
+    ) -> List[Tuple[str, str, str, Optional[UUID]]]:
+        """(origem, título, texto, documento) de tudo que deve ser indexado."""
+        sources = [
+            (name, SECTION_TITLES.get(name, name), section_text, None)
+            for name, section_text in extract_sections(project).items()
+        ]
+        for document in documents:
+            sources.append((
+                f"document:{document.id}",
+                document.original_filename[:200],
+                document.extracted_text,
+                document.id,
+            ))
+        return sources
+
+    @staticmethod
+    async def plan_index(db: AsyncSession, project: Project) -> IndexPlan:
+        """Compara os trechos atuais do projeto com os já indexados (por hash)."""
+        backend = get_embedding_backend()
+        result = await db.execute(
+            select(Document).where(
+                Document.project_id == project.id,
+                Document.extracted_text.isnot(None),
+            )
+        )
+        documents = list(result.scalars().all())
+
+        desired: Dict[Tuple[str, int, str], PendingChunk] = {}
+        seen_hashes = set()
+        for source, title, source_text, document_id in RAGService._sources(project, documents):
+            for chunk in split_into_chunks(source_text, settings.RAG_CHUNK_CHARS):
+                content_hash = hashlib.sha256(chunk.text.encode("utf-8")).hexdigest()
+                # Documento importado costuma repetir o conteúdo do projeto
+                if content_hash in seen_hashes:
+                    continue
+                seen_hashes.add(content_hash)
+                desired[(source, chunk.index, content_hash)] = PendingChunk(
+                    source=source,
+                    title=title,
+                    chunk_index=chunk.index,
+                    text=chunk.text,
+                    content_hash=content_hash,
+                    document_id=document_id,
+                )
+
+        result = await db.execute(
+            select(
+                ProjectChunk.id,
+                ProjectChunk.source,
+                ProjectChunk.chunk_index,
+                ProjectChunk.content_hash,
+                ProjectChunk.embedding_backend,
+            ).where(ProjectChunk.project_id == project.id)
+        )
+
+        plan = IndexPlan(project_id=project.id, backend=backend.name)
+        for row in result.all():
+            key = (row.source, row.chunk_index, row.content_hash)
+            if row.embedding_backend == backend.name and desired.pop(key, None) is not None:
+                plan.kept += 1
+            else:
+                plan.stale_ids.append(row.id)
+        plan.missing = list(desired.values())
+        return plan
+
+    @staticmethod
+    async def apply_index(db: AsyncSession, plan: IndexPlan, vectors: List[List[float]]) -> None:
+        """
+        Remove trechos obsoletos e adiciona os novos (commit fica com o chamador).
+        Trechos já gravados por outra indexação concorrente são ignorados pelo
+        índice único (project_id, source, chunk_index, content_hash).
+        """
+        if plan.stale_ids:
+            await db.execute(delete(ProjectChunk).where(ProjectChunk.id.in_(plan.stale_ids)))
+        if plan.missing:
+            await db.execute(
+                insert(ProjectChunk)
+                .values([
+                    {
+                        "project_id": plan.project_id,
+                        "document_id": chunk.document_id,
+                        "source": chunk.source,
+                        "title": chunk.title,
+                        "chunk_index": chunk.chunk_index,
+                        "text": chunk.text,
+                        "content_hash": chunk.content_hash,
+                        "token_count": estimate_tokens(chunk.text),
+                        "embedding_backend": plan.backend,
+                        "embedding": vector,
+                    }
+                    for chunk, vector in zip(plan.missing, vectors)
+                ])
+                .on_conflict_do_nothing(
+                    index_elements=[
+                        ProjectChunk.project_id,
+                        ProjectChunk.source,
+                        ProjectChunk.chunk_index,
+                        ProjectChunk.content_hash,
+                    ]
+                )
+            )
+        if plan.missing or plan.stale_ids:
+            logger.info(
+                "🧭 Índice RAG do projeto %s: +%s trechos, -%s obsoletos, %s mantidos",
+                plan.project_id, len(plan.missing), len(plan.stale_ids), plan.kept,
+            )
+
+    @staticmethod
+    async def refresh_index(db: AsyncSession, project: Project) -> IndexPlan:
+        """
+        Atualiza o índice do projeto (apenas trechos alterados) e confirma.
+        A conexão do pool é liberada enquanto os embeddings são gerados.
+        """
+        plan = await RAGService.plan_index(db, project)
+        await release_connection(db)
+
+        vectors: List[List[float]] = []
+        if plan.missing:
+            vectors = await get_embedding_backend().embed([chunk.text for chunk in plan.missing])
+        await RAGService.apply_index(db, plan, vectors)
+        await db.commit()
+        return plan
+
+    @staticmethod
+    async def schedule_index(db: AsyncSession, project: Project, marker: Optional[str] = None) -> Job:
+        """
+        Enfileira a atualização do índice para o worker (e confirma a transação).
+        Alterações do mesmo estado (versão do projeto ou `marker`, ex.: um
+        documento) reaproveitam o job pendente.
+        """
+        return await JobService.enqueue(
+            db,
+            job_type=JobType.PROJECT_INDEX,
+            user_id=project.user_id,
+            project_id=project.id,
+            payload={"project_version": project.version},
+            dedupe_key=f"{JobType.PROJECT_INDEX.value}:{project.id}:{marker or project.version}",
+        )
+
+    @staticmethod
+    async def has_index(db: AsyncSession, project_id: UUID) -> bool:
+        """Se o projeto já tem trechos indexados com o backend de embedding atual."""
+        result = await db.execute(
+            select(ProjectChunk.id)
+            .where(
+                ProjectChunk.project_id == project_id,
+                ProjectChunk.embedding_backend == get_embedding_backend().name,
+            )
+            .limit(1)
+        )
+        return result.first() is not None
+
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        project_id: UUID,
+        query_vector: List[float],
+        top_k: Optional[int] = None,
+        token_budget: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Trechos mais similares (cosseno) que cabem no orçamento de tokens."""
+        top_k = top_k or settings.RAG_TOP_K
+        token_budget = token_budget or settings.RAG_CONTEXT_TOKEN_BUDGET
+        backend = get_embedding_backend()
+
+        await db.execute(text(f"SET LOCAL hnsw.ef_search = {HNSW_EF_SEARCH}"))
+        distance = ProjectChunk.embedding.cosine_distance(query_vector)
+        result = await db.execute(
+            select(
+                ProjectChunk.source,
+                ProjectChunk.title,
+                ProjectChunk.text,
+                ProjectChunk.token_count,
+                distance.label("distance"),
+            )
+            .where(
+                ProjectChunk.project_id == project_id,
+                ProjectChunk.embedding_backend == backend.name,
+            )
+            .order_by(distance)
+            .limit(top_k)
+        )
+
+        selected: List[Dict[str, Any]] = []
+        used = 0
+        for row in result.all():
+            if used + row.token_count > token_budget:
+                continue
+            used += row.token_count
+            selected.append({
+                "source": row.source,
+                "title": row.title,
+                "text": row.text,
+                "similarity": round(1 - float(row.distance), 4),
+            })
+        return selected
+
+    @staticmethod
+    async def retrieve_for_chat(
+        db: AsyncSession,
+        project: Project,
+        question: str,
+    ) -> List[Dict[str, Any]]:
+        """
+        Recupera os trechos relevantes para a pergunta. O índice é atualizado
+        pelo worker quando o projeto ou seus documentos mudam; aqui só é
+        montado se o projeto ainda não tem nenhum (ex.: projeto anterior ao
+        RAG ou troca de backend). A conexão do pool é liberada enquanto os
+        embeddings são gerados.
+        """
+        backend = get_embedding_backend()
+        plan: Optional[IndexPlan] = None
+        if not await RAGService.has_index(db, project.id):
+            plan = await RAGService.plan_index(db, project)
+        await release_connection(db)
+
+        missing = plan.missing if plan else []
+        vectors = await backend.embed([chunk.text for chunk in missing] + [question])
+        query_vector = vectors.pop()
+
+        if plan:
+            await RAGService.apply_index(db, plan, vectors)
+
+        chunks = await RAGService.search(db, project.id, query_vector)
+        await release_connection(db)
+        return chunks
@@ -0,0 +1,267 @@
+"""
+Limitador de Taxa dos Provedores de IA
+Token bucket por provedor (requisições/min e tokens/min) compartilhado entre
+workers via Redis, com fila de espera e retentativas com backoff exponencial
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import random
+import time
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Consome de todos os buckets de uma vez ou de nenhum. Cada bucket recebe
+# (capacidade, recarga por ms, quantidade); quantidade negativa devolve tokens.
+# Retorna 0 quando concedido ou os ms de espera até haver saldo suficiente.
+TOKEN_BUCKET_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local requested = tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if requested > tokens then
+        wait = math.max(wait, math.ceil((requested - tokens) / rate))
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 3 - 2])
+    local rate = tonumber(ARGV[i * 3 - 1])
+    local tokens = math.min(capacity, levels[i] - tonumber(ARGV[i * 3]))
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(capacity / rate) + 1000)
+end
+return 0
+"""
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """Segundos indicados em `retry-after-ms` / `Retry-After` (número ou data HTTP)."""
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimitTimeoutError(RuntimeError):
+    """A espera na fila do limitador excedeu o máximo configurado."""
+
+
+@dataclass
+class BucketSpec:
+    """Bucket com capacidade por minuto (recarga contínua)."""
+    name: str
+    per_minute: int
+
+    @property
+    def refill_per_ms(self) -> float:
+        return self.per_minute / 60000.0
+
+
+class LocalTokenBuckets:
+    """Mesmo algoritmo do script Redis, em memória (fallback por processo)."""
+
+    def __init__(self) -> None:
+        self._state: Dict[str, Tuple[float, float]] = {}
+        self._lock = asyncio.Lock()
+
+    async def take(self, requests: List[Tuple[str, BucketSpec, float]]) -> int:
+        async with self._lock:
+            now = time.monotonic() * 1000
+            levels = []
+            wait = 0
+            for key, spec, amount in requests:
+                tokens, ts = self._state.get(key, (float(spec.per_minute), now))
+                tokens = min(spec.per_minute, tokens + max(0.0, now - ts) * spec.refill_per_ms)
+                levels.append(tokens)
+                if amount > tokens:
+                    wait = max(wait, int((amount - tokens) / spec.refill_per_ms) + 1)
+            if wait:
+                return wait
+            for (key, spec, amount), tokens in zip(requests, levels):
+                self._state[key] = (min(spec.per_minute, tokens - amount), now)
+            return 0
+
+
+class ProviderRateLimiter:
+    """
+    Limita requisições e tokens por minuto de um provedor. Chamadas sem saldo
+    aguardam (fila) em vez de falhar; 429 e erros transitórios são repetidos
+    com backoff exponencial com jitter, respeitando `Retry-After`.
+    """
+
+    PREFIX = "ratelimit:"
+    FAILURE_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, provider: str, rpm: int, tpm: int, enabled: bool = True):
+        self.provider = provider
+        self.requests = BucketSpec("rpm", max(1, rpm))
+        self.tokens = BucketSpec("tpm", max(1, tpm))
+        self.enabled = enabled
+        self._local = LocalTokenBuckets()
+        self._redis_disabled_until = 0.0
+        self._script = None
+        self._waiting = 0
+
+    def _key(self, spec: BucketSpec) -> str:
+        return f"{self.PREFIX}{self.provider}:{spec.name}"
+
+    async def _take(self, requests: List[Tuple[BucketSpec, float]]) -> int:
+        """Tenta consumir dos buckets; retorna ms de espera (0 = concedido)."""
+        keyed = [(self._key(spec), spec, amount) for spec, amount in requests]
+
+        if time.monotonic() >= self._redis_disabled_until:
+            try:
+                if self._script is None:
+                    self._script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+                args: List[Any] = []
+                for _, spec, amount in keyed:
+                    args.extend([spec.per_minute, spec.refill_per_ms, amount])
+                return int(await self._script(keys=[key for key, _, _ in keyed], args=args))
+            except (RedisError, OSError) as exc:
+                self._redis_disabled_until = time.monotonic() + self.FAILURE_BACKOFF_SECONDS
+                logger.warning(
+                    "⚠️ Limitador %s sem Redis, usando limite local: %s", self.provider, exc
+                )
+
+        return await self._local.take(keyed)
+
+    async def acquire(self, tokens: int) -> None:
+        """Aguarda saldo de 1 requisição + `tokens` tokens."""
+        if not self.enabled:
+            return
+
+        tokens = min(max(0, tokens), self.tokens.per_minute)
+        deadline = time.monotonic() + settings.PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS
+        self._waiting += 1
+        try:
+            while True:
+                wait_ms = await self._take([(self.requests, 1), (self.tokens, tokens)])
+                if wait_ms <= 0:
+                    return
+                delay = wait_ms / 1000 + random.uniform(0, 0.05)
+                if time.monotonic() + delay > deadline:
+                    raise RateLimitTimeoutError(
+                        f"Limite de taxa do provedor {self.provider} excedido: "
+                        f"espera maior que {settings.PROVIDER_RATE_LIMIT_MAX_WAIT_SECONDS:g}s"
+                    )
+                await asyncio.sleep(delay)
+        finally:
+            self._waiting -= 1
+
+    async def refund(self, tokens: int) -> None:
+        """Devolve tokens reservados e não consumidos (reserva > uso real)."""
+        if self.enabled and tokens > 0:
+            await self._take([(self.tokens, -tokens)])
+
+    @staticmethod
+    def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+        """`Retry-After` quando informado; senão exponencial com jitter completo."""
+        if retry_after is not None and retry_after >= 0:
+            return min(retry_after, settings.PROVIDER_RETRY_MAX_SECONDS)
+        ceiling = min(
+            settings.PROVIDER_RETRY_MAX_SECONDS,
+            settings.PROVIDER_RETRY_BASE_SECONDS * (2 ** attempt),
+        )
+        return random.uniform(0, ceiling)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        reserve_tokens: int,
+        is_retryable: Callable[[BaseException], bool],
+        retry_after: Callable[[BaseException], Optional[float]] = lambda exc: None,
+        used_tokens: Callable[[Any], Optional[int]] = lambda result: None,
+    ) -> Any:
+        """
+        Executa `call` respeitando o limite e repetindo erros transitórios.
+        `used_tokens` informa o consumo real para devolver a sobra da reserva;
+        tentativas que falham devolvem a reserva inteira.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(reserve_tokens)
+            try:
+                result = await call()
+            except Exception as exc:
+                # A tentativa falhou sem consumir a reserva: devolve antes de
+                # repetir (a requisição continua contada no limite de RPM)
+                await self.refund(reserve_tokens)
+                if not is_retryable(exc) or attempt >= settings.PROVIDER_MAX_RETRIES:
+                    raise
+                delay = self.backoff_delay(attempt, retry_after(exc))
+                attempt += 1
+                logger.warning(
+                    "🔁 %s: %s — tentativa %s/%s em %.1fs",
+                    self.provider, exc.__class__.__name__, attempt,
+                    settings.PROVIDER_MAX_RETRIES, delay,
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            used = used_tokens(result)
+            if used is not None and used < reserve_tokens:
+                await self.refund(reserve_tokens - used)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rpm": self.requests.per_minute,
+            "tpm": self.tokens.per_minute,
+            "waiting": self._waiting,
+        }
+
+
+rate_limiters: Dict[str, ProviderRateLimiter] = {
+    "openai": ProviderRateLimiter(
+        "openai",
+        rpm=settings.OPENAI_RPM_LIMIT,
+        tpm=settings.OPENAI_TPM_LIMIT,
+        enabled=settings.PROVIDER_RATE_LIMIT_ENABLED,
+    ),
+    "gemini": ProviderRateLimiter(
+        "gemini",
+        rpm=settings.GEMINI_RPM_LIMIT,
+        tpm=settings.GEMINI_TPM_LIMIT,
+        enabled=settings.PROVIDER_RATE_LIMIT_ENABLED,
+    ),
+}
@@ -0,0 +1,174 @@
+"""
+Coalescência de Análises Idênticas (single-flight)
+Requisições iguais e simultâneas aguardam a mesma execução: no processo via
+Future compartilhado e entre workers via lock Redis + difusão do resultado
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import json
+import logging
+import time
+import uuid
+
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Remove o lock apenas se ainda pertencer a quem o criou
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """
+    Executa `compute` uma única vez por chave entre chamadas concorrentes.
+    O resultado precisa ser serializável em JSON para ser difundido.
+    """
+
+    LOCK_PREFIX = "singleflight:lock:"
+    RESULT_PREFIX = "singleflight:result:"
+    CHANNEL_PREFIX = "singleflight:done:"
+    FAILURE_BACKOFF_SECONDS = 30.0
+
+    def __init__(self, lock_ttl_seconds: float, result_ttl_seconds: int, wait_seconds: float):
+        self.lock_ttl_seconds = lock_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+        self.wait_seconds = wait_seconds
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._redis_disabled_until = 0.0
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Retorna (resultado, compartilhado); `compartilhado` indica carona em outra execução."""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            logger.info("🔗 Aguardando análise idêntica em andamento: %s", key)
+            return await asyncio.shield(existing), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, shared = await self._do_distributed(key, compute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Evita aviso de exceção não lida quando não há outros aguardando
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value, shared
+        finally:
+            self._inflight.pop(key, None)
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= self._redis_disabled_until
+
+    def _mark_failure(self, exc: Exception) -> None:
+        self._redis_disabled_until = time.monotonic() + self.FAILURE_BACKOFF_SECONDS
+        logger.warning("⚠️ Single-flight sem Redis, coalescendo apenas no processo: %s", exc)
+
+    async def _do_distributed(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, bool]:
+        deadline = time.monotonic() + self.wait_seconds
+        while self._redis_available():
+            redis = get_redis()
+            token = uuid.uuid4().hex
+            try:
+                acquired = await redis.set(
+                    self.LOCK_PREFIX + key,
+                    token,
+                    nx=True,
+                    px=int(self.lock_ttl_seconds * 1000),
+                )
+            except (RedisError, OSError) as exc:
+                self._mark_failure(exc)
+                break
+
+            if acquired:
+                return await self._lead(key, token, compute), False
+
+            logger.info("🔗 Análise idêntica em outro worker, aguardando resultado: %s", key)
+            value = await self._wait_remote(key, deadline)
+            if value is not _MISSING:
+                return value, True
+            if time.monotonic() >= deadline:
+                break
+            # O líder falhou sem publicar: tentar assumir a execução
+
+        return await compute(), False
+
+    async def _lead(self, key: str, token: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Executa como líder, publica o resultado e libera o lock."""
+        redis = get_redis()
+        try:
+            value = await compute()
+            try:
+                encoded = json.dumps(value, ensure_ascii=False, default=str)
+                async with redis.pipeline(transaction=False) as pipe:
+                    pipe.set(self.RESULT_PREFIX + key, encoded, ex=self.result_ttl_seconds)
+                    pipe.publish(self.CHANNEL_PREFIX + key, encoded)
+                    await pipe.execute()
+            except (RedisError, OSError) as exc:
+                self._mark_failure(exc)
+            return value
+        finally:
+            try:
+                await redis.eval(RELEASE_LOCK_SCRIPT, 1, self.LOCK_PREFIX + key, token)
+            except (RedisError, OSError) as exc:
+                self._mark_failure(exc)
+
+    async def _wait_remote(self, key: str, deadline: float) -> Any:
+        """Aguarda o resultado do líder (pub/sub) ou a liberação do lock."""
+        redis = get_redis()
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(self.CHANNEL_PREFIX + key)
+            while time.monotonic() < deadline:
+                # Verificado após a inscrição para não perder uma publicação
+                raw = await redis.get(self.RESULT_PREFIX + key)
+                if raw is not None:
+                    return json.loads(raw)
+                if not await redis.exists(self.LOCK_PREFIX + key):
+                    raw = await redis.get(self.RESULT_PREFIX + key)
+                    return json.loads(raw) if raw is not None else _MISSING
+
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message and message.get("type") == "message":
+                    return json.loads(message["data"])
+            return _MISSING
+        except (RedisError, OSError) as exc:
+            self._mark_failure(exc)
+            return _MISSING
+        finally:
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.close()
+            except (RedisError, OSError):
+                pass
+
+
+def analysis_flight_key(project_id: Any, version: Any, analysis_type: str) -> str:
+    """Chave de coalescência: (projeto, versão do projeto, tipo de análise)."""
+    return f"analysis:{project_id}:{version or 0}:{analysis_type}"
+
+
+single_flight = SingleFlight(
+    lock_ttl_seconds=settings.SINGLE_FLIGHT_LOCK_TTL_SECONDS,
+    result_ttl_seconds=settings.SINGLE_FLIGHT_RESULT_TTL_SECONDS,
+    wait_seconds=settings.SINGLE_FLIGHT_WAIT_SECONDS,
+)
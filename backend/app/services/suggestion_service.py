@@ -2,16 +2,16 @@
 Serviço dedicado a sugestões assistidas por IA para o editor.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from app.services.openai_service import OpenAIService
+from app.services.openai_service import OpenAIService, get_openai_service
 
 
 class SuggestionService:
     """Encapsula geração de sugestões de melhoria a partir de trechos."""
 
-    def __init__(self) -> None:
-        self.openai_service = OpenAIService()
+    def __init__(self, openai_service: Optional[OpenAIService] = None) -> None:
+        self.openai_service = openai_service or OpenAIService()
 
     async def generate_contextual_suggestion(
         self,
@@ -34,3 +34,8 @@ class SuggestionService:
             "suggested_text": improved_text,
             "improvement_type": improvement_type,
         }
+
+
+def get_suggestion_service() -> SuggestionService:
+    """Dependência FastAPI: SuggestionService sobre o cliente OpenAI compartilhado."""
+    return SuggestionService(get_openai_service())
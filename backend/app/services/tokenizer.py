@@ -0,0 +1,96 @@
+"""
+Contagem de Tokens
+Usa o tiktoken (vocabulário do gpt-4o) quando o arquivo BPE está disponível
+localmente; caso contrário, um estimador offline por palavras, números e
+pontuação calibrado para texto em português
+"""
+
+from typing import Any, Optional
+import asyncio
+import logging
+import re
+
+from app.config import settings
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - dependência opcional
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Palavras, grupos de até 3 dígitos (como no BPE do gpt-4o) e pontuação
+_PIECE = re.compile(r"[^\W\d_]+|\d{1,3}|[^\w\s]", re.UNICODE)
+
+_encoding: Optional[Any] = None
+
+
+def estimate_tokens_offline(text: str) -> int:
+    """
+    Estimativa sem vocabulário: palavras curtas valem 1 token e as longas um
+    a mais a cada 5 letras; números e pontuação contam por grupo. Tende a
+    superestimar um pouco, o que é o lado seguro para orçamentos.
+    """
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 + (len(piece) - 1) // 5
+        else:
+            tokens += 1
+    return tokens
+
+
+def _load_encoding() -> Any:
+    return tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+
+
+async def init_tokenizer(timeout: float = 10.0) -> None:
+    """
+    Carrega o vocabulário do tiktoken (no startup, fora do event loop). Sem o
+    arquivo em cache (TIKTOKEN_CACHE_DIR) e sem rede, segue com o estimador.
+    """
+    global _encoding
+    if _encoding is not None or tiktoken is None or not settings.TOKENIZER_ENCODING:
+        return
+    try:
+        _encoding = await asyncio.wait_for(asyncio.to_thread(_load_encoding), timeout)
+        logger.info("🔤 Tokenizer %s carregado", settings.TOKENIZER_ENCODING)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning(
+            "⚠️ Tokenizer %s indisponível, usando estimativa offline: %s",
+            settings.TOKENIZER_ENCODING, exc,
+        )
+
+
+def count_tokens(text: str) -> int:
+    """Tokens de `text` pelo tokenizer carregado ou pela estimativa offline."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return estimate_tokens_offline(text)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Prefixo de `text` com no máximo `max_tokens` tokens (corte seco)."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        # Decodificar pode completar um caractere multibyte e passar de 1 token
+        prefix = _encoding.decode(tokens[:max_tokens])
+        while prefix and count_tokens(prefix) > max_tokens:
+            prefix = prefix[:-1]
+        return prefix
+
+    # Busca binária pelo maior prefixo que cabe
+    low, high = 0, min(len(text), max_tokens * 8)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate_tokens_offline(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
@@ -0,0 +1,132 @@
+"""
+Armazenamento de Uploads
+Copia o arquivo enviado em blocos de UPLOAD_CHUNK_SIZE para um temporário em
+UPLOAD_PATH/temp (gravação e SHA-256 fora do event loop), recusa o envio
+assim que passa de UPLOAD_MAX_SIZE e move o arquivo completo para o destino
+com os.replace (atômico: nunca há arquivo parcial no caminho final)
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+import asyncio
+import hashlib
+import logging
+import os
+import uuid
+
+from fastapi import UploadFile
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """O arquivo enviado passou do limite de tamanho."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Arquivo muito grande. Máximo: {limit / (1024 * 1024):.0f}MB")
+
+
+@dataclass
+class SpooledUpload:
+    """Arquivo completo no diretório temporário, ainda sem destino."""
+    temp_path: Path
+    size: int
+    sha256: str
+
+
+@dataclass
+class StoredUpload:
+    """Arquivo gravado no destino final."""
+    path: str
+    size: int
+    sha256: str
+
+
+def _write_chunk(handle: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+def _close(handle: BinaryIO, sync: bool) -> None:
+    if sync:
+        handle.flush()
+        os.fsync(handle.fileno())
+    handle.close()
+
+
+class UploadStorage:
+    """Gravação de uploads em disco sem carregar o arquivo inteiro na memória"""
+
+    @staticmethod
+    def temp_dir() -> Path:
+        return Path(settings.UPLOAD_PATH) / "temp"
+
+    @staticmethod
+    async def spool(file: UploadFile, max_size: Optional[int] = None) -> SpooledUpload:
+        """
+        Copia `file` para um temporário em UPLOAD_PATH/temp calculando o
+        SHA-256. Lança UploadTooLargeError sem deixar resíduos se o limite
+        for excedido; o chamador move ou remove o temporário.
+        """
+        limit = settings.UPLOAD_MAX_SIZE if max_size is None else max_size
+
+        # Tamanho conhecido pelo parser multipart: recusa antes de copiar
+        if file.size is not None and file.size > limit:
+            raise UploadTooLargeError(limit)
+
+        temp_dir = UploadStorage.temp_dir()
+        await asyncio.to_thread(temp_dir.mkdir, parents=True, exist_ok=True)
+        temp_path = temp_dir / f"{uuid.uuid4().hex}.part"
+
+        digest = hashlib.sha256()
+        size = 0
+        completed = False
+        handle = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            try:
+                while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > limit:
+                        raise UploadTooLargeError(limit)
+                    await asyncio.to_thread(_write_chunk, handle, digest, chunk)
+                completed = True
+            finally:
+                await asyncio.to_thread(_close, handle, completed)
+        except BaseException:
+            # Inclui cancelamento (cliente desconectou): unlink é uma syscall rápida
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        return SpooledUpload(temp_path=temp_path, size=size, sha256=digest.hexdigest())
+
+    @staticmethod
+    async def move(spooled: SpooledUpload, destination: Path) -> StoredUpload:
+        """Move o temporário para `destination` (atômico no mesmo sistema de arquivos)."""
+        try:
+            await asyncio.to_thread(destination.parent.mkdir, parents=True, exist_ok=True)
+            await asyncio.to_thread(os.replace, spooled.temp_path, destination)
+        except BaseException:
+            spooled.temp_path.unlink(missing_ok=True)
+            raise
+
+        logger.info(
+            f"💾 Upload gravado: {destination.name} ({spooled.size} bytes, sha256 {spooled.sha256[:12]})"
+        )
+        return StoredUpload(path=str(destination), size=spooled.size, sha256=spooled.sha256)
+
+    @staticmethod
+    async def save(
+        file: UploadFile,
+        destination: Path,
+        max_size: Optional[int] = None,
+    ) -> StoredUpload:
+        """
+        Grava `file` em `destination` e devolve tamanho e SHA-256. Lança
+        UploadTooLargeError sem deixar resíduos se o limite for excedido.
+        """
+        spooled = await UploadStorage.spool(file, max_size)
+        return await UploadStorage.move(spooled, destination)
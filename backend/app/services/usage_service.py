@@ -0,0 +1,186 @@
+"""
+Contabilização de Tokens e Latência dos Provedores de IA
+Os serviços registram cada chamada no coletor do contexto atual (contextvar);
+as rotas persistem o consumo junto da análise e o relatório agrega por dia
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+import logging
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, cast, Date
+
+from app.models.ai_usage import AIUsageEvent
+from app.services.tokenizer import count_tokens
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens de `text` pelo tokenizer local, quando o provedor não informa."""
+    return count_tokens(text)
+
+
+@dataclass
+class ProviderCall:
+    """Uma chamada concluída a um provedor."""
+    provider: str
+    operation: str
+    model: Optional[str]
+    prompt_tokens: int
+    completion_tokens: int
+    duration_ms: int
+    estimated: bool = False
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+@dataclass
+class UsageRecorder:
+    """Acumula as chamadas feitas dentro de um bloco `track_usage()`."""
+    calls: List[ProviderCall] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+
+    @property
+    def elapsed_ms(self) -> int:
+        """Tempo de parede do bloco (congelado ao sair do `track_usage()`)."""
+        return int(((self.finished or time.perf_counter()) - self.started) * 1000)
+
+    def total_tokens(self, provider: Optional[str] = None) -> int:
+        return sum(
+            call.total_tokens
+            for call in self.calls
+            if provider is None or call.provider == provider
+        )
+
+
+_current_recorder: ContextVar[Optional[UsageRecorder]] = ContextVar("ai_usage_recorder", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[UsageRecorder]:
+    """
+    Coleta as chamadas a provedores feitas no bloco, inclusive em tarefas
+    criadas dentro dele (asyncio copia o contexto ao criar a tarefa).
+    """
+    recorder = UsageRecorder()
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        recorder.finished = time.perf_counter()
+        _current_recorder.reset(token)
+
+
+def record_call(
+    provider: str,
+    operation: str,
+    model: Optional[str],
+    prompt_tokens: int,
+    completion_tokens: int,
+    duration_ms: int,
+    estimated: bool = False,
+) -> None:
+    """Registra uma chamada no coletor ativo (sem coletor, apenas loga)."""
+    call = ProviderCall(
+        provider=provider,
+        operation=operation,
+        model=model,
+        prompt_tokens=prompt_tokens or 0,
+        completion_tokens=completion_tokens or 0,
+        duration_ms=duration_ms,
+        estimated=estimated,
+    )
+    logger.debug(
+        "📊 %s.%s: %s+%s tokens em %sms",
+        provider, operation, call.prompt_tokens, call.completion_tokens, duration_ms,
+    )
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.calls.append(call)
+
+
+class UsageService:
+    """Persistência e relatórios de consumo dos provedores de IA."""
+
+    @staticmethod
+    def add_events(
+        db: AsyncSession,
+        recorder: UsageRecorder,
+        analysis_type: str,
+        project_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+    ) -> None:
+        """Adiciona à sessão uma linha por chamada (o commit fica com o chamador)."""
+        for call in recorder.calls:
+            db.add(AIUsageEvent(
+                project_id=project_id,
+                user_id=user_id,
+                provider=call.provider,
+                analysis_type=analysis_type,
+                operation=call.operation,
+                model=call.model,
+                prompt_tokens=call.prompt_tokens,
+                completion_tokens=call.completion_tokens,
+                duration_ms=call.duration_ms,
+                estimated=call.estimated,
+            ))
+
+    @staticmethod
+    async def get_report(
+        db: AsyncSession,
+        days: int = 30,
+        provider: Optional[str] = None,
+        user_id: Optional[UUID] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Tokens e latência p50/p95 por provedor, tipo de análise e dia
+        (apenas das chamadas de `user_id`, quando informado).
+        """
+        day = cast(AIUsageEvent.created_at, Date).label("day")
+        query = (
+            select(
+                day,
+                AIUsageEvent.provider,
+                AIUsageEvent.analysis_type,
+                func.count().label("calls"),
+                func.sum(AIUsageEvent.prompt_tokens).label("prompt_tokens"),
+                func.sum(AIUsageEvent.completion_tokens).label("completion_tokens"),
+                func.percentile_cont(0.5).within_group(AIUsageEvent.duration_ms).label("p50_ms"),
+                func.percentile_cont(0.95).within_group(AIUsageEvent.duration_ms).label("p95_ms"),
+                func.max(AIUsageEvent.duration_ms).label("max_ms"),
+            )
+            .where(AIUsageEvent.created_at >= datetime.utcnow() - timedelta(days=days))
+            .group_by(day, AIUsageEvent.provider, AIUsageEvent.analysis_type)
+            .order_by(day.desc(), AIUsageEvent.provider, AIUsageEvent.analysis_type)
+        )
+        if provider:
+            query = query.where(AIUsageEvent.provider == provider)
+        if user_id is not None:
+            query = query.where(AIUsageEvent.user_id == user_id)
+
+        result = await db.execute(query)
+        return [
+            {
+                "day": row.day,
+                "provider": row.provider,
+                "analysis_type": row.analysis_type,
+                "calls": row.calls,
+                "prompt_tokens": int(row.prompt_tokens or 0),
+                "completion_tokens": int(row.completion_tokens or 0),
+                "total_tokens": int((row.prompt_tokens or 0) + (row.completion_tokens or 0)),
+                "p50_ms": int(row.p50_ms or 0),
+                "p95_ms": int(row.p95_ms or 0),
+                "max_ms": int(row.max_ms or 0),
+            }
+            for row in result.all()
+        ]
@@ -5,6 +5,9 @@ Funções de validação
 import re
 from typing import Tuple
 
+# Valor máximo de um item orçamentário sem justificativa específica
+MAX_BUDGET_ITEM_VALUE = 1_000_000
+
 def validate_email(email: str) -> Tuple[bool, str]:
     """
     Valida formato de email
@@ -15,20 +18,34 @@ def validate_email(email: str) -> Tuple[bool, str]:
         return True, "Email válido"
     return False, "Email inválido"
 
+def _cnpj_check_digit(digits: str) -> str:
+    """Dígito verificador do CNPJ (módulo 11, pesos 2..9 da direita para a esquerda)"""
+    weights = [2, 3, 4, 5, 6, 7, 8, 9]
+    total = sum(
+        int(digit) * weights[index % len(weights)]
+        for index, digit in enumerate(reversed(digits))
+    )
+    remainder = total % 11
+    return "0" if remainder < 2 else str(11 - remainder)
+
 def validate_cnpj(cnpj: str) -> Tuple[bool, str]:
     """
-    Valida formato de CNPJ brasileiro
+    Valida CNPJ brasileiro (formato e dígitos verificadores)
     """
     # Remover caracteres especiais
-    cnpj = re.sub(r'\D', '', cnpj)
+    cnpj = re.sub(r'\D', '', cnpj or '')
     
     if len(cnpj) != 14:
         return False, "CNPJ deve ter 14 dígitos"
     
-    # Validação básica de CNPJ (simplificada)
     if cnpj == cnpj[0] * 14:
         return False, "CNPJ inválido"
     
+    first = _cnpj_check_digit(cnpj[:12])
+    second = _cnpj_check_digit(cnpj[:12] + first)
+    if cnpj[12:] != first + second:
+        return False, "CNPJ com dígitos verificadores inválidos"
+    
     return True, "CNPJ válido"
 
 def validate_project_title(title: str) -> Tuple[bool, str]:
@@ -62,7 +79,7 @@ def validate_budget_item(amount: float) -> Tuple[bool, str]:
     if amount < 0:
         return False, "Valor não pode ser negativo"
     
-    if amount > 1000000:  # Máximo de 1 milhão
+    if amount > MAX_BUDGET_ITEM_VALUE:
         return False, "Valor muito alto para item orçamentário"
     
     return True, "Valor válido"
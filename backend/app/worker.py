@@ -0,0 +1,194 @@
+"""
+Worker de jobs em segundo plano
+Processo independente da API, escalável separadamente:
+
+    python -m app.worker --concurrency 4
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+
+from app.config import settings
+from app.db.database import AsyncSessionLocal, close_db
+from app.db.redis_client import close_redis
+from app.models.project import Project
+from app.models.job import Job, JobType
+from app.services.blob_store import BlobStore
+from app.services.job_service import JobService
+from app.services.openai_client import init_openai_client, close_openai_client
+from app.services.gemini_service import gemini_executor
+from app.services.project_service import ProjectService
+from app.services.rag_service import RAGService
+from app.services.tokenizer import init_tokenizer
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("app.worker")
+
+JobHandler = Callable[[Job], Awaitable[Optional[Dict[str, Any]]]]
+
+
+async def handle_project_analysis(job: Job) -> Dict[str, Any]:
+    """Executa a análise automática completa do projeto."""
+    async with AsyncSessionLocal() as db:
+        return await ProjectService.auto_analyze_project(db, job.project_id)
+
+
+async def handle_project_index(job: Job) -> Dict[str, Any]:
+    """Atualiza o índice RAG do projeto após alterações no conteúdo ou documentos."""
+    async with AsyncSessionLocal() as db:
+        project = await db.get(Project, job.project_id)
+        if project is None:
+            return {"indexed": False}
+        plan = await RAGService.refresh_index(db, project)
+        return {
+            "indexed": True,
+            "added": len(plan.missing),
+            "removed": len(plan.stale_ids),
+            "kept": plan.kept,
+        }
+
+
+HANDLERS: Dict[JobType, JobHandler] = {
+    JobType.PROJECT_ANALYSIS: handle_project_analysis,
+    JobType.PROJECT_INDEX: handle_project_index,
+}
+
+
+async def heartbeat_loop(job: Job) -> None:
+    """
+    Renova locked_at enquanto o job roda, para não ser reivindicado de novo.
+    Só termina quando o job deixou de ser deste worker.
+    """
+    while True:
+        await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                if not await JobService.heartbeat(db, job.id, job.locked_by):
+                    logger.warning("⚠️ Job %s não está mais com %s", job.id, job.locked_by)
+                    return
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("❌ Erro no heartbeat do job %s: %s", job.id, exc)
+
+
+async def process_job(job: Job) -> None:
+    """
+    Executa o handler do job e registra sucesso ou falha. Se o heartbeat
+    perde o lock (outro worker reivindicou o job), a execução é interrompida
+    e nada é gravado; a gravação final também só vale para esta tentativa.
+    """
+    handler = HANDLERS.get(job.job_type)
+    if handler is None:
+        async with AsyncSessionLocal() as db:
+            await JobService.mark_failed(db, job, f"Tipo de job sem handler: {job.job_type.value}")
+        return
+
+    execution = asyncio.ensure_future(handler(job))
+    heartbeat = asyncio.create_task(heartbeat_loop(job))
+    try:
+        await asyncio.wait({execution, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        heartbeat.cancel()
+        if not execution.done():
+            execution.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await execution
+
+    if execution.cancelled():
+        logger.warning("🛑 Job %s interrompido: lock perdido por %s", job.id, job.locked_by)
+        return
+
+    exc = execution.exception()
+    async with AsyncSessionLocal() as db:
+        if exc is None:
+            await JobService.mark_succeeded(db, job, execution.result())
+        elif isinstance(exc, Exception):
+            logger.error("❌ Erro no job %s: %s", job.id, exc, exc_info=exc)
+            await JobService.mark_failed(db, job, str(exc) or exc.__class__.__name__)
+        else:
+            raise exc
+
+
+async def worker_loop(worker_id: str, stop_event: asyncio.Event) -> None:
+    """Loop de um slot: reivindica, processa e repete até o sinal de parada."""
+    while not stop_event.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                job = await JobService.claim_next(db, worker_id, HANDLERS.keys())
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("❌ Erro ao consultar fila: %s", exc)
+            job = None
+
+        if job is None:
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        await process_job(job)
+
+
+async def collect_orphan_blobs() -> None:
+    """Remove conteúdos que ficaram sem referências fora das rotas (ex.: usuários apagados)."""
+    try:
+        async with AsyncSessionLocal() as db:
+            removed = await BlobStore.collect(db)
+            await db.commit()
+        if removed:
+            logger.info("🧹 %s conteúdos órfãos removidos", removed)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.error("❌ Erro ao remover conteúdos órfãos: %s", exc)
+
+
+async def run_worker(concurrency: int) -> None:
+    """Inicia `concurrency` slots de processamento neste processo."""
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop_event = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass
+
+    init_openai_client()
+    await init_tokenizer()
+    await collect_orphan_blobs()
+    logger.info("🚀 Worker %s iniciado com %s slots", base_id, concurrency)
+
+    try:
+        await asyncio.gather(
+            *(worker_loop(f"{base_id}:{slot}", stop_event) for slot in range(concurrency))
+        )
+    finally:
+        logger.info("👋 Encerrando worker %s...", base_id)
+        await close_openai_client()
+        await close_redis()
+        gemini_executor.shutdown()
+        await close_db()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Worker de jobs PRONAS/PCD")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.JOB_WORKER_CONCURRENCY,
+        help="Jobs processados simultaneamente neste processo",
+    )
+    args = parser.parse_args()
+    asyncio.run(run_worker(max(1, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark de latência dos endpoints de IA
+
+Dispara requisições concorrentes contra uma API em execução e reporta
+p50/p95 de /api/ai/chat e /api/ai/suggestions. Rode antes e depois de
+mudanças no cliente OpenAI para comparar.
+
+Uso:
+    python benchmarks/bench_ai_latency.py \\
+        --base-url http://localhost:8000 \\
+        --token "$JWT" --project-id <uuid> \\
+        --requests 50 --concurrency 10
+
+Sem rede e sem custo, suba a API com os provedores simulados:
+
+    LLM_BACKEND=stub LLM_STUB_LATENCY_P50_MS=800 LLM_STUB_LATENCY_P95_MS=3000 \
+        uvicorn app.main:app
+
+ou grave respostas reais uma vez (LLM_BACKEND=record) e reproduza-as
+(LLM_BACKEND=replay, cassetes em LLM_CASSETTE_DIR). O limitador de taxa
+continua ativo; use PROVIDER_RATE_LIMIT_ENABLED=false para medir só a API.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient,
+    path: str,
+    payload: Dict,
+    total: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(path, json=payload)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return {
+        "ok": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": statistics.fmean(latencies) if latencies else 0.0,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="JWT de um usuário válido")
+    parser.add_argument("--project-id", required=True)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    endpoints = {
+        "/api/ai/chat": {
+            "project_id": args.project_id,
+            "message": "Quais são os principais pontos fracos do projeto?",
+        },
+        "/api/ai/suggestions": {
+            "project_id": args.project_id,
+            "section": "Justificativa",
+            "selected_text": "O projeto atende pessoas com deficiência na região.",
+        },
+    }
+
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        headers={"Authorization": f"Bearer {args.token}"},
+        timeout=120,
+    ) as client:
+        for path, payload in endpoints.items():
+            stats = await run_endpoint(client, path, payload, args.requests, args.concurrency)
+            print(
+                f"{path:<22} ok={stats['ok']:<4} erros={stats['errors']:<3} "
+                f"p50={stats['p50_ms']:.0f}ms p95={stats['p95_ms']:.0f}ms média={stats['mean_ms']:.0f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
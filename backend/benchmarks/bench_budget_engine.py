@@ -0,0 +1,164 @@
+"""
+Benchmark do motor de orçamento (Anexo VI)
+
+Gera um orçamento sintético (itens no formato da tabela do frontend, com
+uma fração de valores inválidos, totais divergentes, repetidos e atípicos)
+e compara a validação vetorizada do BudgetEngine com um laço item a item
+em Python puro com as regras por linha (totais, negativos, valores altos,
+repetidos e soma por categoria; sem a detecção de atípicos).
+
+Uso (a partir de backend/, com as variáveis obrigatórias do .env):
+    python benchmarks/bench_budget_engine.py --rows 100000 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.budget_engine import BudgetEngine, BudgetTable, to_float_array  # noqa: E402
+
+CATEGORIES = [
+    "Equipamentos",
+    "Material de consumo",
+    "Recursos humanos",
+    "Captação de recursos",
+    "Reformas",
+]
+
+
+def synthetic_items(rows: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    items = []
+    for index in range(rows):
+        quantity = rng.randint(1, 50)
+        unit_value = round(rng.lognormvariate(5, 1), 2)
+        item = {
+            "id": str(index),
+            "item": f"Item {index}",
+            "description": "",
+            "category": rng.choice(CATEGORIES),
+            "quantity": quantity,
+            "unitValue": unit_value,
+            "total": round(quantity * unit_value, 2),
+        }
+        roll = rng.random()
+        if roll < 0.001:
+            item["unitValue"] = -unit_value
+        elif roll < 0.002:
+            item["total"] += 10
+        elif roll < 0.003:
+            item["unitValue"] = unit_value * 1000
+            item["total"] = round(quantity * item["unitValue"], 2)
+        elif roll < 0.004 and items:
+            item.update({key: items[-1][key] for key in ("item", "unitValue")})
+            item["total"] = round(quantity * item["unitValue"], 2)
+        items.append(item)
+    return items
+
+
+def python_loop(annex: Dict[str, Any]) -> Dict[str, Any]:
+    """Referência item a item, sem NumPy."""
+    issues: Dict[str, List[int]] = {"quantity": [], "value": [], "total": [], "high": [], "duplicate": []}
+    seen: Dict[Any, int] = {}
+    by_category: Dict[str, float] = {}
+    grand = 0.0
+    for index, item in enumerate(annex["items"]):
+        quantity = item.get("quantity")
+        unit_value = item.get("unitValue")
+        if not isinstance(quantity, (int, float)) or quantity <= 0:
+            issues["quantity"].append(index)
+            continue
+        if not isinstance(unit_value, (int, float)) or unit_value < 0:
+            issues["value"].append(index)
+            continue
+        total = round(quantity * unit_value, 2)
+        if item.get("total") is not None and abs(item["total"] - total) > 0.01:
+            issues["total"].append(index)
+        if total > 1_000_000:
+            issues["high"].append(index)
+        key = (item.get("item", "").lower(), unit_value)
+        if key in seen:
+            issues["duplicate"].append(index)
+        seen[key] = index
+        category = item.get("category", "").lower()
+        by_category[category] = by_category.get(category, 0.0) + total
+        grand += total
+    return {"total": round(grand, 2), "by_category": by_category, "issues": issues}
+
+
+# Valores como aparecem em tabelas de PDF e planilhas, e o float esperado
+TEXT_FORMATS = {
+    "R$ 1.234,56": 1234.56,
+    "R$ 1.500": 1500.0,
+    "1.234.567": 1234567.0,
+    "1.234.567,89": 1234567.89,
+    "-1.500": -1500.0,
+    "2.5": 2.5,
+    "1500": 1500.0,
+    "0,75": 0.75,
+    "12.50": 12.5,
+}
+
+
+def check_text_formats() -> None:
+    """Confere a conversão de textos monetários antes de medir."""
+    parsed = to_float_array(list(TEXT_FORMATS) + ["", "abc"])
+    expected = list(TEXT_FORMATS.values())
+    for text, value, want in zip(TEXT_FORMATS, parsed, expected):
+        assert value == want, f"{text!r}: esperado {want}, obtido {value}"
+    assert all(value != value for value in parsed[len(expected):]), "inválidos devem virar NaN"
+    print(f"Formatos de texto conferidos: {len(TEXT_FORMATS)}\n")
+
+
+def vectorized(annex: Dict[str, Any]) -> Dict[str, Any]:
+    return BudgetEngine.validate(BudgetTable.from_annex(annex)).to_dict()
+
+
+def measure(
+    label: str,
+    func: Callable[[Dict[str, Any]], Any],
+    annex: Dict[str, Any],
+    repeat: int,
+) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(annex)
+        timings.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(timings)
+    print(f"{label:<28} mediana {median:9.1f} ms   min {min(timings):9.1f} ms")
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do motor de orçamento")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    check_text_formats()
+    annex = {"items": synthetic_items(args.rows, args.seed)}
+    print(f"Orçamento sintético: {args.rows} itens\n")
+
+    loop_ms = measure("laço Python (referência)", python_loop, annex, args.repeat)
+    engine_ms = measure("BudgetEngine (carga+regras)", vectorized, annex, args.repeat)
+    measure("  carga em colunas", BudgetTable.from_annex, annex, args.repeat)
+    table = BudgetTable.from_annex(annex)
+    measure("  regras vetorizadas", lambda _: BudgetEngine.validate(table), annex, args.repeat)
+    print(f"\nGanho: {loop_ms / engine_ms:.1f}x")
+
+    result = BudgetEngine.validate(table)
+    print(f"\nTotal: {result.total:,.2f}  ({result.checks} regras, {len(result.issues)} pendências)")
+    for issue in result.issues:
+        print(f"  [{issue['severity']}] {issue['issue'][:110]}")
+
+
+if __name__ == "__main__":
+    main()
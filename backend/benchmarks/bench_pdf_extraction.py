@@ -0,0 +1,111 @@
+"""
+Benchmark da extração paralela de PDFs
+
+Gera PDFs sintéticos de texto com diferentes números de páginas e compara a
+extração sequencial (PDFProcessor.extract_text_from_pdf em um processo) com
+a extração em faixas de páginas do pool (PDFWorkerPool.extract_text),
+conferindo que o texto remontado é idêntico.
+
+Uso (a partir de backend/, com as variáveis obrigatórias do .env):
+    python benchmarks/bench_pdf_extraction.py --pages 10 50 200 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.pdf_pool import PDFWorkerPool  # noqa: E402
+from app.services.pdf_processor import PDFProcessor  # noqa: E402
+
+LINE = "Projeto de atendimento a pessoas com deficiência, meta {page}.{line}: oficinas e terapias"
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 45) -> None:
+    """PDF mínimo (Helvetica, uma página de texto por objeto de conteúdo)."""
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # árvore de páginas, preenchida depois
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for page in range(1, pages + 1):
+        text = "".join(
+            f"({LINE.format(page=page, line=line)}) Tj T* " for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 14 TL 40 800 Td {text}ET".encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+async def measure(label: str, func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(timings)
+    print(f"  {label:<24} mediana {median:9.1f} ms   min {min(timings):9.1f} ms")
+    return median
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da extração paralela de PDFs")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pool = PDFWorkerPool(args.workers, timeout=600, max_tasks_per_child=0)
+    pool.start()
+    print(f"Pool com {args.workers} processos ({os.cpu_count()} CPUs)\n")
+    # Aguarda o aquecimento dos processos para não contá-lo na primeira medida
+    await asyncio.sleep(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"sintetico_{pages}.pdf")
+            write_pdf(path, pages)
+            print(f"{pages} páginas:")
+
+            sequential = PDFProcessor.extract_text_from_pdf(path)
+            parallel = await pool.extract_text(path)
+            assert parallel == sequential, "texto paralelo difere do sequencial"
+
+            single_ms = await measure(
+                "sequencial (1 processo)",
+                lambda: pool.run(PDFProcessor.extract_text_from_pdf, path),
+                args.repeat,
+            )
+            sharded_ms = await measure("faixas em paralelo", lambda: pool.extract_text(path), args.repeat)
+            print(f"  ganho: {single_ms / sharded_ms:.2f}x\n")
+
+    pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,7 +4,7 @@
 
 -- Extensões PostgreSQL
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
-CREATE EXTENSION IF NOT EXISTS "pgvector";
+CREATE EXTENSION IF NOT EXISTS "vector";
 
 -- ============================================
 -- TABELAS
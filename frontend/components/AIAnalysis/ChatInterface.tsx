@@ -20,6 +20,7 @@ export default function ChatInterface({ projectId }: ChatInterfaceProps) {
   const [isSending, setIsSending] = useState(false)
   const [isAssistantTyping, setIsAssistantTyping] = useState(false)
   const [errorMessage, setErrorMessage] = useState<string | null>(null)
+  const [conversationId, setConversationId] = useState<string | null>(null)
 
   const messagesEndRef = useRef<HTMLDivElement>(null)
 
@@ -30,6 +31,7 @@ export default function ChatInterface({ projectId }: ChatInterfaceProps) {
   useEffect(() => {
     // reset conversation when project changes
     setMessages([])
+    setConversationId(null)
     setErrorMessage(null)
     setIsAssistantTyping(false)
     setInput('')
@@ -67,9 +69,6 @@ export default function ChatInterface({ projectId }: ChatInterfaceProps) {
     hideTypingIndicator()
   }
 
-  const buildHistoryPayload = (history: ChatMessageData[]) =>
-    history.map(({ role, content, timestamp }) => ({ role, content, timestamp }))
-
   const sendMessageToAI = async () => {
     if (!projectId) {
       toast.error('Projeto não identificado.')
@@ -93,7 +92,6 @@ export default function ChatInterface({ projectId }: ChatInterfaceProps) {
       timestamp: new Date().toISOString(),
     }
 
-    const conversationSnapshot = [...messages, userMessage]
     updateMessagesArray(userMessage)
     setInput('')
     showTypingIndicator()
@@ -104,9 +102,13 @@ export default function ChatInterface({ projectId }: ChatInterfaceProps) {
       const { data } = await apiClient.post('/api/ai/chat', {
         project_id: projectId,
         message: trimmed,
-        conversation_history: buildHistoryPayload(conversationSnapshot),
+        conversation_id: conversationId,
       })
 
+      // O histórico fica no servidor; os próximos turnos enviam apenas o ID
+      if (data?.conversation_id) {
+        setConversationId(data.conversation_id)
+      }
       receiveAIResponse(data)
     } catch (error) {
       handleChatError(error)
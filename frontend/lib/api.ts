@@ -89,12 +89,16 @@ export const api = {
         section,
         content,
       }),
-    chat: (projectId: string, message: string, history: any[] = []) =>
+    chat: (projectId: string, message: string, conversationId?: string | null) =>
       getApiClient().post('/api/ai/chat', {
         project_id: projectId,
         message,
-        conversation_history: history,
+        conversation_id: conversationId ?? null,
       }),
+    conversations: (projectId: string) =>
+      getApiClient().get('/api/ai/conversations', { params: { project_id: projectId } }),
+    getConversation: (conversationId: string) =>
+      getApiClient().get(`/api/ai/conversations/${conversationId}`),
   },
 
   // Notifications